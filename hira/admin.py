@@ -1,7 +1,25 @@
 from django.contrib import admin
+from django.contrib import messages
 from django.contrib.admin import AdminSite
 from django.contrib.auth.models import User, Group
-from .models import Contact, Event, Booking,PreEventFeedback, PostEventFeedback
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
+from .models import (
+    Area, Booking, Broadcast, BroadcastDelivery, Contact, Event, EventSummary, PaymentStatement,
+    PostEventFeedback, PreEventFeedback, StatementTransaction, Zone,
+)
+from .analytics import SURVEYS, summarize
+from .bookings import cancel_booking, create_booking
+from .changelist import ScalableAdminMixin
+from .exports import csv_response, filtered, xlsx_response
+from .facets import facet_counts
+from .forms import StatementUploadForm
+from .search import search_contact_ids
+from .statements import import_statement
+from .summary import update_bookings
 
 # ===========================
 # Custom AdminSite
@@ -10,6 +28,12 @@ class HirapuraAdminSite(AdminSite):
     site_header = " Hirapura Admin Dashboard "       # Navbar title
     site_title = "Hirapura Admin"                       # Browser tab title
     index_title = "Welcome to Hirapura Admin Panel"     # Index page heading
+    index_template = "admin/hira/index.html"
+
+    def index(self, request, extra_context=None):
+        # One summary row per event (hira/summary.py), no booking scan
+        summaries = EventSummary.objects.select_related('event').order_by('-event__date', '-event__time')[:5]
+        return super().index(request, {'event_summaries': summaries, **(extra_context or {})})
 
 # Instantiate custom admin
 hirapura_admin = HirapuraAdminSite(name='hirapura_admin')
@@ -19,18 +43,83 @@ hirapura_admin = HirapuraAdminSite(name='hirapura_admin')
 # ===========================
 
 
+# ===========================
+# CSV / XLSX export actions (hira/exports.py)
+# ===========================
+class ExportActionsMixin:
+    """Streams the selected rows (narrowed by the list filters) as CSV or XLSX."""
+    export_kind = None
+
+    @admin.action(description="Export selected as CSV")
+    def export_csv(self, request, queryset):
+        return csv_response(self.export_kind, filtered(self.export_kind, queryset))
+
+    @admin.action(description="Export selected as Excel (.xlsx)")
+    def export_xlsx(self, request, queryset):
+        return xlsx_response(self.export_kind, filtered(self.export_kind, queryset))
+
+
 # ===========================
 # Contact Admin
 # ===========================
-class ContactAdmin(admin.ModelAdmin):
+class CachedFacetFilter(admin.SimpleListFilter):
+    """
+    Filter on a normalized area/zone FK. Choices and counts come from
+    hira.facets.facet_counts() (cached) instead of a SELECT DISTINCT per page load.
+    """
+    facet = None
+    prefix = ""  # path to the Contact from the filtered model
+
+    def lookups(self, request, model_admin):
+        return [(str(pk), f"{name} ({count})") for pk, name, count in facet_counts()[self.facet]]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{f"{self.prefix}{self.facet}_ref_id": self.value()})
+        return queryset
+
+
+class ZoneFilter(CachedFacetFilter):
+    title = "zone"
+    parameter_name = "zone_ref"
+    facet = "zone"
+
+
+class AreaFilter(CachedFacetFilter):
+    title = "area"
+    parameter_name = "area_ref"
+    facet = "area"
+
+
+class BookingZoneFilter(ZoneFilter):
+    """Zone of the booking's contact; the counts shown are still contacts."""
+    prefix = "contact__"
+
+
+class ContactAdmin(ExportActionsMixin, ScalableAdminMixin, admin.ModelAdmin):
+    export_kind = 'contacts'
+    actions = ['export_csv', 'export_xlsx']
+    # Canonical names (Area/Zone), so a rename in the admin shows at once
     list_display = (
-        'full_name', 'whatsapp_no', 'vip', 'area', 'zone', 'family_members', 'email'
+        'full_name', 'whatsapp_no', 'vip', 'area_ref', 'zone_ref', 'family_members', 'email'
+    )
+    list_select_related = ('area_ref', 'zone_ref')
+    list_only = (
+        'full_name', 'whatsapp_no', 'vip', 'area_ref__name', 'zone_ref__name', 'family_members', 'email',
     )
     search_fields = ('full_name', 'whatsapp_no', 'alternate_no', 'email', 'area', 'zone')
-    list_filter = ('vip', 'zone', 'area')
+    list_filter = ('vip', ZoneFilter, AreaFilter)
     list_per_page = 25
     ordering = ('full_name',)
-    
+
+    def get_search_results(self, request, queryset, search_term):
+        # One FTS5 lookup (prefix match, Gujarati and Latin) instead of
+        # six icontains scans; falls back to search_fields without the index
+        ids = search_contact_ids(search_term)
+        if ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=ids), False
+
     fieldsets = (
         ('Personal Info', {
             'fields': ('full_name', 'sub_cast', 'vip')
@@ -45,11 +134,37 @@ class ContactAdmin(admin.ModelAdmin):
 
 hirapura_admin.register(Contact, ContactAdmin)
 
+
+class DimensionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key', 'contact_count')
+    search_fields = ('name', 'key')
+    readonly_fields = ('key',)
+
+    def contact_count(self, obj):
+        counts = {pk: count for pk, _, count in facet_counts()[self.model._meta.model_name]}
+        return counts.get(obj.pk, 0)
+    contact_count.short_description = 'Contacts'
+
+    def save_model(self, request, obj, form, change):
+        # Renaming keeps the key, so later imports of any variant still match
+        if not obj.key:
+            obj.key = " ".join(obj.name.split()).casefold()
+        super().save_model(request, obj, form, change)
+
+
+hirapura_admin.register(Area, DimensionAdmin)
+hirapura_admin.register(Zone, DimensionAdmin)
+
 # ===========================
 # Event Admin
 # ===========================
 class EventAdmin(admin.ModelAdmin):
-    list_display = ('title', 'date', 'time', 'place', 'admin_name', 'admin_phone')
+    list_display = (
+        'title', 'date', 'time', 'place', 'capacity', 'seats_booked', 'people', 'amount', 'paid_amount',
+        'admin_name', 'admin_phone', 'feedback_link',
+    )
+    list_select_related = ('summary',)
+    readonly_fields = ('seats_booked',)
     search_fields = ('title', 'place', 'admin_name', 'admin_phone')
     list_filter = ('date', 'place')
     ordering = ('-date',)
@@ -58,26 +173,77 @@ class EventAdmin(admin.ModelAdmin):
         ('Event Details', {
             'fields': ('title', 'date', 'time', 'place')
         }),
+        ('Capacity', {
+            'fields': ('capacity', 'seats_booked')
+        }),
         ('Admin Contact', {
             'fields': ('admin_name', 'admin_phone')
         }),
     )
 
+    def get_urls(self):
+        return [
+            path('<int:event_id>/feedback/', self.admin_site.admin_view(self.feedback_view), name='hira_event_feedback'),
+        ] + super().get_urls()
+
+    def _summary(self, obj, counter):
+        # No row yet reads as zero; reconcile_event_summaries fills it in
+        return getattr(getattr(obj, 'summary', None), counter, 0)
+
+    @admin.display(description='People')
+    def people(self, obj):
+        return self._summary(obj, 'people')
+
+    @admin.display(description='Amount (₹)')
+    def amount(self, obj):
+        return self._summary(obj, 'amount')
+
+    @admin.display(description='Paid (₹)')
+    def paid_amount(self, obj):
+        return self._summary(obj, 'paid_amount')
+
+    def feedback_link(self, obj):
+        url = reverse(f'{self.admin_site.name}:hira_event_feedback', args=[obj.pk])
+        return format_html('<a href="{}">Analytics</a>', url)
+    feedback_link.short_description = 'Feedback'
+
+    def feedback_view(self, request, event_id):
+        """Rating distributions, means with 95% CIs, recommend score and daily trend (hira/analytics.py)."""
+        event = get_object_or_404(Event, pk=event_id)
+        if not self.has_view_permission(request, event):
+            raise PermissionDenied
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'original': event,
+            'title': f'Feedback analytics: {event}',
+            'surveys': [summarize(kind, event.pk) for kind in SURVEYS],
+        }
+        return TemplateResponse(request, 'admin/hira/event/feedback.html', context)
+
 hirapura_admin.register(Event, EventAdmin)
 
 # ===========================
 # Booking Admin
 # ===========================
-class BookingAdmin(admin.ModelAdmin):
-    readonly_fields = ("created_at", "upi_token")
-    list_display = ('name', 'phone', 'num_people', 'total_amount', 'is_vip', 'is_paid', 'event')
+class BookingAdmin(ExportActionsMixin, ScalableAdminMixin, admin.ModelAdmin):
+    export_kind = 'bookings'
+    readonly_fields = ("created_at", "upi_token", "status")
+    raw_id_fields = ('contact',)
+    list_select_related = ('event',)
+    list_display = ('name', 'phone', 'num_people', 'total_amount', 'is_vip', 'is_paid', 'status', 'event')
+    list_only = (
+        'name', 'phone', 'num_people', 'total_amount', 'is_vip', 'is_paid', 'status', 'created_at',
+        'event__title', 'event__date', 'event__time',
+    )
     search_fields = ('name', 'phone', 'event__title')
-    list_filter = ('is_vip', 'is_paid', 'event')
+    list_filter = ('is_vip', 'is_paid', 'status', 'event', BookingZoneFilter)
     ordering = ('-created_at',)
+    actions = ['cancel_bookings', 'mark_paid', 'export_csv', 'export_xlsx']
     
     fieldsets = (
         ('Booking Info', {
-            'fields': ('name', 'phone', 'num_people', 'total_amount', 'is_vip', 'is_paid')
+            'fields': ('contact', 'name', 'phone', 'num_people', 'total_amount', 'is_vip', 'is_paid', 'status')
         }),
         ('Event Info', {
             'fields': ('event',)
@@ -87,8 +253,138 @@ class BookingAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_readonly_fields(self, request, obj=None):
+        # Seats are only moved by create_booking / cancel_booking; an edit must not change them
+        if obj is not None:
+            return self.readonly_fields + ('num_people', 'event')
+        return self.readonly_fields
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            return super().save_model(request, obj, form, change)
+        # Reserve seats like the booking form does: confirmed if they fit, else waitlisted
+        booking = create_booking(
+            obj.event, obj.num_people,
+            **{name: getattr(obj, name) for name in ('contact', 'name', 'phone', 'total_amount', 'is_vip', 'is_paid')},
+        )
+        obj.pk, obj.status, obj.created_at = booking.pk, booking.status, booking.created_at
+        obj._state.adding = False
+        obj._state.db = booking._state.db
+
+    @admin.action(description="Cancel selected bookings (frees seats, promotes waitlist)")
+    def cancel_bookings(self, request, queryset):
+        promoted = []
+        for booking in queryset.exclude(status=Booking.CANCELLED):
+            promoted += cancel_booking(booking)
+        self.message_user(request, f"Cancelled selected bookings; {len(promoted)} promoted from the waitlist.")
+
+    @admin.action(description="Mark selected bookings as paid")
+    def mark_paid(self, request, queryset):
+        # One UPDATE, with the event summaries moved in the same transaction
+        updated = update_bookings(queryset.filter(is_paid=False), is_paid=True)
+        self.message_user(request, f"Marked {updated} bookings as paid.")
+
 hirapura_admin.register(Booking, BookingAdmin)
 
+# ===========================
+# Broadcast Admin (sent with manage.py send_broadcast)
+# ===========================
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ('name', 'channel', 'event', 'vip_only', 'created_at', 'last_contact_id', 'finished_at')
+    list_select_related = ('event',)
+    readonly_fields = ('created_at', 'last_contact_id', 'finished_at')
+    ordering = ('-created_at',)
+
+hirapura_admin.register(Broadcast, BroadcastAdmin)
+
+
+class BroadcastDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('address', 'contact', 'broadcast', 'status', 'detail', 'sent_at')
+    list_select_related = ('contact', 'broadcast')
+    list_filter = ('status', 'broadcast')
+    search_fields = ('address',)
+    raw_id_fields = ('contact',)
+    readonly_fields = ('broadcast', 'contact', 'address', 'status', 'detail', 'sent_at')
+
+hirapura_admin.register(BroadcastDelivery, BroadcastDeliveryAdmin)
+
+# ===========================
+# UPI reconciliation (hira/statements.py, also manage.py import_statement)
+# ===========================
+class PaymentStatementAdmin(admin.ModelAdmin):
+    list_display = (
+        'name', 'imported_at', 'credits', 'matched', 'partial', 'duplicate', 'unmatched', 'already_seen',
+        'marked_paid', 'transactions_link',
+    )
+    readonly_fields = list_display[:-1] + ('digest',)
+    ordering = ('-imported_at',)
+
+    def has_add_permission(self, request):
+        return False  # statements come in through the import view
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='hira_paymentstatement_import'),
+        ] + super().get_urls()
+
+    def transactions_link(self, obj):
+        url = reverse(f'{self.admin_site.name}:hira_statementtransaction_changelist')
+        return format_html('<a href="{}?statement__id__exact={}">Transactions</a>', url, obj.pk)
+    transactions_link.short_description = 'Transactions'
+
+    def import_view(self, request):
+        """Upload a statement and reconcile it; the outcome is shown on the statement list."""
+        if not self.has_view_permission(request) or not request.user.has_perm('hira.change_booking'):
+            raise PermissionDenied
+        form = StatementUploadForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['statement']
+            try:
+                statement, created = import_statement(upload, upload.name, dry_run=form.cleaned_data['dry_run'])
+            except ValueError as e:
+                form.add_error('statement', str(e))
+            else:
+                if not created:
+                    self.message_user(request, f"{upload.name} was already imported on {statement.imported_at:%d-%m-%Y %H:%M}; nothing changed.", messages.WARNING)
+                else:
+                    self.message_user(request, (
+                        f"{'Dry run: ' if form.cleaned_data['dry_run'] else ''}{statement.credits} credits: "
+                        f"{statement.matched} matched, {statement.partial} partial, {statement.duplicate} duplicate, "
+                        f"{statement.unmatched} unmatched, {statement.already_seen} already seen; "
+                        f"{statement.marked_paid} bookings marked paid."
+                    ))
+                if form.cleaned_data['dry_run']:
+                    return redirect(request.path)
+                return redirect(f'{self.admin_site.name}:hira_paymentstatement_changelist')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import bank statement',
+            'form': form,
+        }
+        return TemplateResponse(request, 'admin/hira/paymentstatement/import.html', context)
+
+hirapura_admin.register(PaymentStatement, PaymentStatementAdmin)
+
+
+class StatementTransactionAdmin(admin.ModelAdmin):
+    list_display = ('txn_key', 'paid_on', 'amount', 'booking', 'status', 'detail', 'reference', 'statement')
+    list_select_related = ('booking', 'statement')
+    list_filter = ('status', 'statement')
+    search_fields = ('txn_key', 'reference')
+    ordering = ('-id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False  # a record of the statement; fix bookings on the booking itself
+
+hirapura_admin.register(StatementTransaction, StatementTransactionAdmin)
+
 
 
 @admin.register(PreEventFeedback)
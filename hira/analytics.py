@@ -0,0 +1,182 @@
+"""
+Feedback analytics per event, for the admin page at
+/admin/hira/event/<id>/feedback/.
+
+The cached state of a survey (pre or post) is a few NumPy count arrays:
+per rating field, how many answers of each value 1-5; recommend yes/no;
+and per day, the response count plus the sum and count of the headline
+rating. Means, 95% confidence intervals, the recommend net score and
+trends all follow from those counts, so nothing is ever recomputed from
+rows. A refresh reads only the responses with an id above the cached
+watermark: the columns come back from one values_list and are folded in
+with bincount, with no loop over responses. Edits and deletes drop the
+cached state (hira.signals); the next view rebuilds it.
+
+would_recommend is yes/no, not a 0-10 score, so the "NPS" shown is the
+net share: % yes minus % no among those who answered.
+"""
+import math
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import TruncDate
+
+from .models import PostEventFeedback, PreEventFeedback
+
+STATS_KEY = "hira:feedback_stats:{}:{}"
+Z95 = 1.959964
+
+SURVEYS = {
+    # kind: (model, rating fields, headline rating for trends, recommend field)
+    "pre": (PreEventFeedback, ("expected_experience_rating", "ease_of_registration", "clarity_of_communications"),
+            "expected_experience_rating", None),
+    "post": (PostEventFeedback, ("overall_rating", "organization_rating", "venue_rating", "food_rating"),
+             "overall_rating", "would_recommend"),
+}
+SURVEY_OF = {model: kind for kind, (model, *_) in SURVEYS.items()}
+
+# Columns of the per-day matrix
+RESPONSES, HEADLINE_SUM, HEADLINE_N, YES, NO = range(5)
+
+
+# -------------------------------
+# STATE
+# -------------------------------
+def _empty(fields):
+    return {
+        "last_id": 0,
+        "ratings": {field: np.zeros(6, dtype=np.int64) for field in fields},  # index 0 = no answer
+        "recommend": np.zeros(3, dtype=np.int64),                          # no, yes, no answer
+        "days": np.zeros(0, dtype="datetime64[D]"),
+        "daily": np.zeros((0, 5), dtype=np.float64),
+    }
+
+
+def _fold(state, rows, fields, headline, recommend):
+    """Add a batch of values_list rows (id, day, *ratings[, recommend]) to the state."""
+    columns = list(zip(*rows))
+    state["last_id"] = max(state["last_id"], int(np.max(np.array(columns[0], dtype=np.int64))))
+
+    ratings = {}
+    for field, column in zip(fields, columns[2:2 + len(fields)]):
+        values = np.nan_to_num(np.array(column, dtype=np.float64), nan=0).astype(np.int64)
+        state["ratings"][field] += np.bincount(values, minlength=6)
+        ratings[field] = values
+
+    yes = no = np.zeros(len(rows))
+    if recommend:
+        answers = np.array(columns[-1], dtype=np.float64)  # True 1, False 0, None nan
+        yes, no = (answers == 1).astype(np.float64), (answers == 0).astype(np.float64)
+        state["recommend"] += np.array([no.sum(), yes.sum(), len(rows) - yes.sum() - no.sum()], dtype=np.int64)
+
+    # Per-day sums for this batch, then merged into the sorted day index
+    days, index = np.unique(np.array(columns[1], dtype="datetime64[D]"), return_inverse=True)
+    head = ratings[headline]
+    batch = np.column_stack([
+        np.bincount(index, minlength=len(days)),
+        np.bincount(index, weights=head, minlength=len(days)),
+        np.bincount(index, weights=head > 0, minlength=len(days)),
+        np.bincount(index, weights=yes, minlength=len(days)),
+        np.bincount(index, weights=no, minlength=len(days)),
+    ])
+    merged = np.union1d(state["days"], days)
+    daily = np.zeros((len(merged), 5))
+    daily[np.searchsorted(merged, state["days"])] += state["daily"]
+    daily[np.searchsorted(merged, days)] += batch
+    state["days"], state["daily"] = merged, daily
+
+
+def survey_state(kind, event_id):
+    """Cached counts for one survey of an event, brought up to date with new responses."""
+    model, fields, headline, recommend = SURVEYS[kind]
+    key = STATS_KEY.format(kind, event_id)
+    state = cache.get(key) or _empty(fields)
+
+    columns = ["id", "day", *fields] + ([recommend] if recommend else [])
+    rows = list(
+        model.objects.filter(event_id=event_id, id__gt=state["last_id"])
+        .annotate(day=TruncDate("submitted_at")).order_by().values_list(*columns)
+    )
+    if rows:
+        _fold(state, rows, fields, headline, recommend)
+        cache.set(key, state, getattr(settings, "FEEDBACK_STATS_CACHE_TTL", 86400))
+    return state
+
+
+def invalidate_survey(kind, event_id):
+    cache.delete(STATS_KEY.format(kind, event_id))
+
+
+def feedback_saved(instance, created):
+    """New responses are picked up by the watermark; anything else drops the cached state."""
+    kind = SURVEY_OF[type(instance)]
+    if created:
+        state = cache.get(STATS_KEY.format(kind, instance.event_id))
+        if state is None or instance.pk > state["last_id"]:
+            return
+    invalidate_survey(kind, instance.event_id)
+
+
+# -------------------------------
+# SUMMARY
+# -------------------------------
+def _rating_summary(counts):
+    values = np.arange(1, 6)
+    answered = counts[1:]
+    n = int(answered.sum())
+    summary = {
+        "n": n, "skipped": int(counts[0]), "mean": None, "ci": None,
+        "distribution": [
+            (int(v), int(c), float(100 * c / n) if n else 0.0) for v, c in zip(values, answered)
+        ],
+    }
+    if n:
+        mean = float((answered * values).sum() / n)
+        summary["mean"] = mean
+        if n > 1:
+            variance = float((answered * (values - mean) ** 2).sum() / (n - 1))
+            half = Z95 * math.sqrt(variance / n)
+            summary["ci"] = (max(1.0, mean - half), min(5.0, mean + half))
+    return summary
+
+
+def _net_score(no, yes):
+    """% yes minus % no among answers, with a 95% interval (normal approximation)."""
+    n = yes + no
+    if not n:
+        return None
+    p_yes, p_no = yes / n, no / n
+    score = p_yes - p_no
+    half = Z95 * math.sqrt(max(0.0, p_yes + p_no - score ** 2) / n)
+    return {"score": 100 * score, "ci": (100 * max(-1.0, score - half), 100 * min(1.0, score + half))}
+
+
+def summarize(kind, event_id):
+    """Everything the analytics page shows for one survey of an event."""
+    model, fields, headline, recommend = SURVEYS[kind]
+    state = survey_state(kind, event_id)
+    opts = model._meta
+    daily = state["daily"]
+    trend = [
+        {
+            "day": day.item(),
+            "responses": int(row[RESPONSES]),
+            "mean": float(row[HEADLINE_SUM] / row[HEADLINE_N]) if row[HEADLINE_N] else None,
+            "recommend": float(100 * row[YES] / (row[YES] + row[NO])) if row[YES] + row[NO] else None,
+        }
+        for day, row in zip(state["days"], daily)
+    ]
+    no, yes, unanswered = (int(x) for x in state["recommend"])
+    return {
+        "kind": kind,
+        "title": opts.verbose_name_plural,
+        "responses": int(daily[:, RESPONSES].sum()),
+        "headline": opts.get_field(headline).verbose_name,
+        "ratings": [
+            {"label": opts.get_field(field).verbose_name, **_rating_summary(state["ratings"][field])}
+            for field in fields
+        ],
+        "recommend": {"yes": yes, "no": no, "unanswered": unanswered, "net": _net_score(no, yes)} if recommend else None,
+        "trend": trend,
+    }
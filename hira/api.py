@@ -0,0 +1,205 @@
+"""
+JSON check-in API for volunteer tablets (staff accounts).
+
+    GET /api/events/<id>/bookings/?after=<cursor>&limit=500&fields=id,name,phone
+    GET /api/events/<id>/bookings/changes/?since=<cursor>
+    GET /api/events/<id>/manifest/?since=<version>
+
+
+The list is paged by keyset on (created_at, id), so every page is one index
+range scan, and there are no counts. Its first page returns a `sync` cursor.
+Tablets then poll `changes` with it, apply the `results` rows by id, then
+drop the ids listed in `removed`: bookings deleted or moved to another
+event since the cursor (RemovedBooking), which leave no row to send. A
+change is only served once it is CHECKIN_SYNC_SETTLE_SECONDS old, so a
+transaction still committing when the cursor moved past its timestamp is
+not skipped. Removals are kept for REMOVED_BOOKING_RETENTION_DAYS; a
+cursor older than that gets 410 and the tablet reloads the list.
+JSON responses are gzipped; the gate manifest (hira/manifest.py) is binary
+and compressed already.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_GET
+
+from .models import Booking, Event, RemovedBooking
+
+FIELDS = (
+    "id", "name", "phone", "num_people", "total_amount", "status", "is_vip",
+    "is_paid", "checked_in_at", "created_at", "updated_at", "contact_id",
+)
+DEFAULT_FIELDS = ("id", "name", "phone", "num_people", "status", "is_paid", "checked_in_at")
+MAX_LIMIT = 1000
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class BadRequest(Exception):
+    pass
+
+
+# -------------------------------
+# CURSORS
+# -------------------------------
+def encode_cursor(moment, pk):
+    return f"{(moment - _EPOCH) // timedelta(microseconds=1)}_{pk}"
+
+
+def decode_cursor(cursor):
+    try:
+        micros, pk = (int(part) for part in cursor.split("_"))
+    except (AttributeError, ValueError):
+        raise BadRequest("Invalid cursor")
+    return _EPOCH + timedelta(microseconds=micros), pk
+
+
+def _after(field, cursor):
+    """(field, id) > cursor. The leading >= lets SQLite seek the index instead of filtering from the start."""
+    moment, pk = decode_cursor(cursor)
+    return Q(**{f"{field}__gte": moment}) & (Q(**{f"{field}__gt": moment}) | Q(id__gt=pk))
+
+
+# -------------------------------
+# REQUEST HELPERS
+# -------------------------------
+def staff_api(view_func):
+    """Staff-only JSON view: 403/400 as JSON instead of login redirects and HTML errors."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not (request.user.is_active and request.user.is_staff):
+            return JsonResponse({"error": "Staff login required"}, status=403)
+        try:
+            return view_func(request, *args, **kwargs)
+        except BadRequest as e:
+            return JsonResponse({"error": str(e)}, status=400)
+    return wrapper
+
+
+def _fields(request):
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(DEFAULT_FIELDS)
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return ["id"] + [f for f in fields if f != "id"]
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get("limit", 500))
+    except ValueError:
+        raise BadRequest("Invalid limit")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _settled():
+    return timezone.now() - timedelta(seconds=getattr(settings, "CHECKIN_SYNC_SETTLE_SECONDS", 2))
+
+
+def removals_horizon():
+    """Oldest moment RemovedBooking rows are still kept for (hira.manifest.prune_removed)."""
+    return timezone.now() - timedelta(days=getattr(settings, "REMOVED_BOOKING_RETENTION_DAYS", 7))
+
+
+def _page(queryset, order_field, fields, limit):
+    """One page of rows as dicts (without the cursor column unless asked for) and the last cursor."""
+    columns = fields if order_field in fields else fields + [order_field]
+    rows = list(queryset.order_by(order_field, "id").values(*columns)[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    last = encode_cursor(rows[-1][order_field], rows[-1]["id"]) if rows else None
+    if order_field not in fields:
+        for row in rows:
+            del row[order_field]
+    return rows, last, more
+
+
+# -------------------------------
+# ENDPOINTS
+# -------------------------------
+@gzip_page
+@require_GET
+@staff_api
+def booking_list_api(request, event_id):
+    """Keyset-paged bookings of one event, oldest first."""
+    event = get_object_or_404(Event.objects.only("id"), pk=event_id)
+    fields, limit = _fields(request), _limit(request)
+    queryset = Booking.objects.filter(event=event)
+    after = request.GET.get("after")
+    if after:
+        queryset = queryset.filter(_after("created_at", after))
+
+    rows, last, more = _page(queryset, "created_at", fields, limit)
+    data = {"event": event.id, "results": rows, "next": last if more else None}
+    if not after:
+        # Start of a full download: changes from here on come from the change feed
+        data["sync"] = encode_cursor(_settled(), 0)
+    return JsonResponse(data)
+
+
+@gzip_page
+@require_GET
+@staff_api
+def booking_changes_api(request, event_id):
+    """
+    Bookings of one event changed after `since`, in change order, and the
+    ids of bookings removed from it up to the same point.
+    """
+    event = get_object_or_404(Event.objects.only("id"), pk=event_id)
+    since = request.GET.get("since")
+    if not since:
+        raise BadRequest("since is required (use the sync cursor from the list)")
+    if decode_cursor(since)[0] < removals_horizon():
+        # Removals that old may be pruned already: only a full reload is complete
+        return JsonResponse({"error": "Cursor expired; reload the list"}, status=410)
+    fields, limit = _fields(request), _limit(request)
+    settled = _settled()
+    queryset = Booking.objects.filter(event=event, updated_at__lte=settled).filter(_after("updated_at", since))
+
+    rows, last, more = _page(queryset, "updated_at", fields, limit)
+    if not more:
+        # Caught up: move the cursor to the settled watermark
+        watermark = encode_cursor(settled, 0)
+        last = watermark if last is None or decode_cursor(watermark) > decode_cursor(last) else last
+    # Removals up to where this page ends; a booking moved back in is sent as a row instead
+    removed = (
+        RemovedBooking.objects
+        .filter(event=event, removed_at__gt=decode_cursor(since)[0], removed_at__lte=decode_cursor(last)[0])
+        .exclude(booking_id__in=Booking.objects.filter(event=event).values("id"))
+        .values_list("booking_id", flat=True)
+        .distinct()
+    )
+    return JsonResponse({
+        "event": event.id, "results": rows, "removed": sorted(removed), "next": last, "more": more,
+    })
+
+
+@require_GET
+@staff_api
+def gate_manifest_api(request, event_id):
+    """Offline gate manifest: a delta from `since` when given, else the full manifest."""
+    from .manifest import build_delta, build_manifest  # manifest imports this module
+
+    event = get_object_or_404(Event.objects.only("id"), pk=event_id)
+    since = request.GET.get("since")
+    if since:
+        try:
+            since = int(since)
+        except ValueError:
+            raise BadRequest("Invalid since")
+        version, data = build_delta(event.id, since)
+    else:
+        version, data = build_manifest(event.id)
+    response = HttpResponse(data, content_type="application/octet-stream")
+    response["X-Manifest-Version"] = str(version)
+    response["Cache-Control"] = "no-store"
+    return response
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HiraConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hira'
+
+    def ready(self):
+        from . import db, signals  # noqa: F401  (connects receivers)
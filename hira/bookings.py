@@ -0,0 +1,174 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .db import atomic_retry
+from .models import Booking, Event
+from .summary import SOURCE_FIELDS, record_change
+
+
+# -------------------------------
+# SEAT COUNTER
+# -------------------------------
+# Event.seats_booked is only ever moved by single conditional UPDATEs, so
+# two requests racing for the last seats cannot both win: the database
+# applies one UPDATE, re-evaluates the WHERE for the other, and it matches
+# no row. There is never a count-then-insert window.
+
+def reserve_seats(event_id, seats):
+    """Take `seats` from the event if they fit. Returns True on success."""
+    return Event.objects.filter(pk=event_id).filter(
+        Q(capacity__isnull=True) | Q(capacity__gte=F("seats_booked") + seats)
+    ).update(seats_booked=F("seats_booked") + seats) == 1
+
+
+def release_seats(event_id, seats):
+    """Give `seats` back to the event."""
+    Event.objects.filter(pk=event_id, seats_booked__gte=seats).update(seats_booked=F("seats_booked") - seats)
+
+
+# -------------------------------
+# BOOKING LIFECYCLE
+# -------------------------------
+class AlreadyBooked(Exception):
+    """The contact already has a confirmed or waitlisted booking for the event."""
+
+
+def active_booking(contact, event):
+    """The contact's live booking for the event, or None (booking_contact_event_idx)."""
+    return (
+        Booking.objects.filter(contact=contact, event=event)
+        .exclude(status=Booking.CANCELLED)
+        .first()
+    )
+
+
+class IdempotencyConflict(Exception):
+    """The idempotency key belongs to a booking of another contact or event."""
+
+
+def _replayed(idempotency_key, event, contact):
+    # Only the same contact booking the same event replays; the same key on
+    # any other booking is a conflict (the INSERT hits the unique key)
+    if not idempotency_key:
+        return None
+    return Booking.objects.filter(idempotency_key=idempotency_key, contact=contact, event=event).first()
+
+
+def create_booking(event, num_people, idempotency_key=None, **fields):
+    """
+    Create a Booking for `event`: confirmed if the seats could be reserved,
+    otherwise waitlisted. Raises AlreadyBooked if `contact` already holds a
+    live booking for it (the unique constraint decides races).
+
+    With an idempotency_key, a repeated call (double tap, network retry)
+    returns the booking the first call created and writes nothing. Raises
+    IdempotencyConflict if the key belongs to another contact's or event's booking.
+    """
+    contact = fields.get("contact")
+    booking = _replayed(idempotency_key, event, contact)
+    if booking is not None:
+        return booking
+    try:
+        return _insert_booking(event, num_people, idempotency_key=idempotency_key, **fields)
+    except IntegrityError as e:
+        # A concurrent replay won the INSERT
+        booking = _replayed(idempotency_key, event, contact)
+        if booking is not None:
+            return booking
+        if idempotency_key and Booking.objects.filter(idempotency_key=idempotency_key).exists():
+            raise IdempotencyConflict(idempotency_key) from e
+        # Only the one-live-booking constraint means "already booked"; any
+        # other violation (a colliding upi_token, ...) is a real error
+        if contact is None or active_booking(contact, event) is None:
+            raise
+        raise AlreadyBooked(event) from e
+
+
+@atomic_retry
+def _insert_booking(event, num_people, **fields):
+    # The seat UPDATE and the INSERT share a transaction (retried as a whole
+    # if SQLite is locked), so a failed insert never leaks seats. Inside a
+    # caller's transaction (admin) the savepoint lets create_booking still
+    # query after an IntegrityError.
+    with transaction.atomic():
+        confirmed = reserve_seats(event.pk, num_people)
+        return Booking.objects.create(
+            event=event,
+            num_people=num_people,
+            status=Booking.CONFIRMED if confirmed else Booking.WAITLISTED,
+            **fields,
+        )
+
+
+def waitlist_position(booking):
+    """1-based place in the event's FIFO waitlist, or None if not waitlisted."""
+    if booking.status != Booking.WAITLISTED:
+        return None
+    ahead = Booking.objects.filter(
+        event_id=booking.event_id, status=Booking.WAITLISTED
+    ).filter(
+        Q(created_at__lt=booking.created_at) | Q(created_at=booking.created_at, id__lt=booking.id)
+    ).count()
+    return ahead + 1
+
+
+def promote_waitlist(event_id):
+    """
+    Confirm waitlisted bookings in arrival order while seats are free.
+    A party too large for the remaining seats is skipped (keeping its place)
+    so smaller parties behind it can still move up. Returns the promoted ids.
+    """
+    promoted = []
+    waiting = list(
+        Booking.objects.filter(event_id=event_id, status=Booking.WAITLISTED)
+        .order_by("created_at", "id")
+        .values("id", *SOURCE_FIELDS)
+    )
+    for booking in waiting:
+        if _promote(event_id, booking):
+            promoted.append(booking["id"])
+    return promoted
+
+
+@atomic_retry
+def _promote(event_id, booking):
+    if not reserve_seats(event_id, booking["num_people"]):
+        return False
+    # Another worker may have promoted or cancelled it meanwhile
+    if Booking.objects.filter(pk=booking["id"], status=Booking.WAITLISTED).update(
+        status=Booking.CONFIRMED, updated_at=timezone.now()
+    ):
+        record_change(booking, {**booking, "status": Booking.CONFIRMED})
+        return True
+    release_seats(event_id, booking["num_people"])
+    return False
+
+
+def cancel_booking(booking):
+    """
+    Cancel a booking. Confirmed seats go back to the event and the
+    waitlist is promoted. Returns the ids of promoted bookings.
+    """
+    was_confirmed = _cancel(booking)
+    booking.status = Booking.CANCELLED
+    return promote_waitlist(booking.event_id) if was_confirmed else []
+
+
+@atomic_retry
+def _cancel(booking):
+    now = timezone.now()
+    was_confirmed = Booking.objects.filter(pk=booking.pk, status=Booking.CONFIRMED).update(
+        status=Booking.CANCELLED, updated_at=now
+    )
+    if was_confirmed:
+        release_seats(booking.event_id, booking.num_people)
+        old_status = Booking.CONFIRMED
+    elif Booking.objects.filter(pk=booking.pk, status=Booking.WAITLISTED).update(status=Booking.CANCELLED, updated_at=now):
+        old_status = Booking.WAITLISTED
+    else:
+        old_status = None  # already cancelled
+    if old_status:
+        row = {name: getattr(booking, name) for name in SOURCE_FIELDS}
+        record_change({**row, "status": old_status}, {**row, "status": Booking.CANCELLED})
+    return bool(was_confirmed)
@@ -0,0 +1,243 @@
+"""
+Bulk invitations and reminders to every Contact, by SMS or email
+(manage.py send_broadcast).
+
+Recipients are read in id order, one chunk at a time. Each chunk gets a
+queued BroadcastDelivery row per contact, is sent by a small thread pool,
+and is then written back in one transaction together with the broadcast's
+checkpoint (last_contact_id). A run that crashes resumes after the last
+finished chunk; at most that one chunk is sent twice. Senders share a
+token bucket per channel (hira.ratelimit), so the provider rate holds
+across threads and across several runs.
+
+SMS goes through the configured gateway (settings.OTP_SMS_GATEWAY, so
+hira.sms.StubGateway in tests), email through Django's EMAIL_BACKEND
+with one connection per sender thread.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Count
+from django.utils import timezone
+
+from .db import atomic_retry
+from .models import Broadcast, BroadcastDelivery, Contact
+from .ratelimit import Rate, hit
+from .sms import get_gateway, retrying
+
+ADDRESS_FIELD = {Broadcast.SMS: "whatsapp_no", Broadcast.EMAIL: "email"}
+
+
+# -------------------------------
+# RECIPIENTS & MESSAGE
+# -------------------------------
+def recipients(broadcast):
+    """Contacts the broadcast goes to: those with an address on its channel."""
+    field = ADDRESS_FIELD[broadcast.channel]
+    queryset = Contact.objects.exclude(**{f"{field}__isnull": True}).exclude(**{field: ""})
+    if broadcast.vip_only:
+        queryset = queryset.filter(vip=True)
+    return queryset
+
+
+class _Placeholders(dict):
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+def check_message(broadcast):
+    """
+    Raise ValueError if the message cannot be rendered (a stray "{" or "}",
+    "{0}", ...), so a bad template stops the run before anything is sent
+    instead of inside a sender thread.
+    """
+    try:
+        render(broadcast, "")
+    except (ValueError, IndexError, KeyError, AttributeError) as e:
+        raise ValueError(f"Message cannot be rendered: {e}. Write a literal brace as {{{{ or }}}}.") from e
+
+
+def render(broadcast, name):
+    """The broadcast message for one recipient; unknown placeholders are left as they are."""
+    values = _Placeholders(name=name)
+    event = broadcast.event
+    if event is not None:
+        values.update(
+            event=event.title, date=event.date.strftime("%d-%m-%Y"),
+            time=event.time.strftime("%I:%M %p"), place=event.place,
+        )
+    return broadcast.message.format_map(values)
+
+
+# -------------------------------
+# SENDING (worker threads, no DB access)
+# -------------------------------
+_local = threading.local()
+_open_connections = set()
+_open_lock = threading.Lock()
+
+
+def _mail_connection():
+    connection = getattr(_local, "mail", None)
+    if connection is None:
+        connection = get_connection()
+        connection.open()
+        _local.mail = connection
+        with _open_lock:
+            _open_connections.add(connection)
+    return connection
+
+
+def _drop_mail_connection():
+    connection, _local.mail = getattr(_local, "mail", None), None
+    if connection is not None:
+        with _open_lock:
+            _open_connections.discard(connection)
+        connection.close()
+
+
+def _close_mail_connections():
+    with _open_lock:
+        connections = list(_open_connections)
+        _open_connections.clear()
+    for connection in connections:
+        connection.close()
+
+
+def _send_email(address, subject, text):
+    try:
+        EmailMessage(subject, text, settings.DEFAULT_FROM_EMAIL, [address], connection=_mail_connection()).send()
+        return {"Status": "Success", "Details": ""}
+    except Exception as e:
+        # Drop the connection so the retry reconnects
+        _drop_mail_connection()
+        return {"Status": "Error", "Details": str(e)}
+
+
+def _throttle(channel):
+    """Wait for a token from the channel's shared bucket."""
+    rate = Rate.parse(getattr(settings, "BROADCAST_RATES", {}).get(channel, "10/s"))
+    while not hit((f"broadcast:{channel}", rate)).allowed:
+        time.sleep(1 / rate.per_second)
+
+
+def _send(broadcast, address, text):
+    if broadcast.channel == Broadcast.SMS:
+        send, args = get_gateway().send_message, (address, text)
+    else:
+        send, args = _send_email, (address, broadcast.subject or broadcast.name, text)
+
+    def attempt():
+        # Every attempt, retries included, takes a token from the provider rate
+        _throttle(broadcast.channel)
+        return send(*args)
+
+    return retrying(attempt)
+
+
+# -------------------------------
+# RUN
+# -------------------------------
+def _deliver(executor, broadcast, rows):
+    """Send (delivery_id, name, address) rows; return unsaved deliveries with their outcome."""
+    responses = executor.map(lambda row: _send(broadcast, row[2], render(broadcast, row[1])), rows)
+    now = timezone.now()
+    deliveries = []
+    for (delivery_id, _, _), resp in zip(rows, responses):
+        ok = resp.get("Status") == "Success"
+        deliveries.append(BroadcastDelivery(
+            id=delivery_id,
+            status=BroadcastDelivery.SENT if ok else BroadcastDelivery.FAILED,
+            detail="" if ok else str(resp.get("Details") or "Failed to send")[:255],
+            sent_at=now if ok else None,
+        ))
+    return deliveries
+
+
+def _executor(workers):
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="broadcast")
+
+
+def run(broadcast, chunk_size=200, workers=None, progress=None):
+    """
+    Send the broadcast from its checkpoint to the last recipient.
+    progress(last_contact_id, sent, failed) is called after every chunk.
+    Raises ValueError for a message that cannot be rendered (check_message).
+    """
+    check_message(broadcast)
+    workers = workers or getattr(settings, "BROADCAST_WORKERS", 4)
+    field = ADDRESS_FIELD[broadcast.channel]
+    with _executor(workers) as executor:
+        try:
+            while True:
+                chunk = list(
+                    recipients(broadcast).filter(id__gt=broadcast.last_contact_id)
+                    .order_by("id").values_list("id", field)[:chunk_size]
+                )
+                if not chunk:
+                    break
+                BroadcastDelivery.objects.bulk_create(
+                    [BroadcastDelivery(broadcast=broadcast, contact_id=pk, address=address) for pk, address in chunk],
+                    ignore_conflicts=True,
+                )
+                # Rows already sent by an earlier run keep their outcome
+                rows = list(
+                    broadcast.deliveries.filter(contact_id__in=[pk for pk, _ in chunk])
+                    .exclude(status=BroadcastDelivery.SENT)
+                    .values_list("id", "contact__full_name", "address")
+                )
+                deliveries = _deliver(executor, broadcast, rows)
+                broadcast.last_contact_id = chunk[-1][0]
+                _save_chunk(broadcast, deliveries, ["last_contact_id"])
+                if progress:
+                    sent = sum(d.status == BroadcastDelivery.SENT for d in deliveries)
+                    progress(broadcast.last_contact_id, sent, len(deliveries) - sent)
+        finally:
+            _close_mail_connections()
+
+    broadcast.finished_at = timezone.now()
+    broadcast.save(update_fields=["finished_at"])
+    return counts(broadcast)
+
+
+def retry_failed(broadcast, chunk_size=200, workers=None, progress=None):
+    """Send the failed deliveries of a broadcast again, to the address recorded at the time."""
+    check_message(broadcast)
+    workers = workers or getattr(settings, "BROADCAST_WORKERS", 4)
+    last_id = 0
+    with _executor(workers) as executor:
+        try:
+            while True:
+                rows = list(
+                    broadcast.deliveries.filter(status=BroadcastDelivery.FAILED, id__gt=last_id)
+                    .order_by("id").values_list("id", "contact__full_name", "address")[:chunk_size]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                deliveries = _deliver(executor, broadcast, rows)
+                _save_chunk(broadcast, deliveries)
+                if progress:
+                    sent = sum(d.status == BroadcastDelivery.SENT for d in deliveries)
+                    progress(last_id, sent, len(deliveries) - sent)
+        finally:
+            _close_mail_connections()
+    return counts(broadcast)
+
+
+@atomic_retry
+def _save_chunk(broadcast, deliveries, broadcast_fields=()):
+    """Outcomes and checkpoint in one transaction, so a resumed run never skips an unrecorded chunk."""
+    BroadcastDelivery.objects.bulk_update(deliveries, ["status", "detail", "sent_at"])
+    if broadcast_fields:
+        broadcast.save(update_fields=list(broadcast_fields))
+
+
+def counts(broadcast):
+    """{status: deliveries} for a broadcast."""
+    totals = dict.fromkeys((BroadcastDelivery.QUEUED, BroadcastDelivery.SENT, BroadcastDelivery.FAILED), 0)
+    totals.update(broadcast.deliveries.values_list("status").annotate(n=Count("id")).order_by())
+    return totals
@@ -0,0 +1,134 @@
+"""
+Admin changelists that stay fast on large tables.
+
+Stock changelists run an exact COUNT(*) (twice without filters) and fetch
+page N with OFFSET, so page 5000 reads and sorts every row before it.
+ScalableAdminMixin changes three things:
+
+- Counts are cached for ADMIN_COUNT_CACHE_TTL seconds per query, and the
+  unfiltered total is not counted at all (show_full_result_count = False).
+- A page is fetched as keys first (pk plus the ordering columns, read from
+  the index) and then its rows by pk. When the previous page was seen
+  recently, its last key is kept as a bookmark and the next page is a
+  keyset seek ("after this row") instead of an OFFSET. Paging forward is
+  therefore flat; a jump straight to a deep page is one index-only
+  OFFSET scan.
+- Rows load only `list_only` columns, with `list_select_related` joined.
+
+Keyset seeks need an ordering of plain model fields; anything else
+(expressions, related lookups) falls back to OFFSET on the keys query.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+COUNT_KEY = "hira:admin_count:{}"
+BOOKMARK_KEY = "hira:admin_page:{}:{}"
+
+
+def _signature(queryset, *extra):
+    """Stable key for a queryset's SQL (filters and ordering), or None if it cannot be compiled."""
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    raw = repr((queryset.model._meta.label, sql, params) + extra)
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _keyset_ordering(queryset):
+    """[(field, descending)] for an ordering of plain fields, else None."""
+    opts = queryset.model._meta
+    order = []
+    for item in queryset.query.order_by:
+        if not isinstance(item, str):
+            return None
+        name = item.lstrip("-")
+        if "__" in name or name == "?":
+            return None
+        if name != "pk":
+            try:
+                field = opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.is_relation:
+                return None
+        order.append((name, item.startswith("-")))
+    return order or None
+
+
+def _seek(order, values):
+    """Rows after `values` in `order`. The leading bound lets the database seek the index."""
+    (first, first_desc), first_value = order[0], values[0]
+    chain, equal = Q(), Q()
+    for (name, desc), value in zip(order, values):
+        chain |= equal & Q(**{f"{name}__{'lt' if desc else 'gt'}": value})
+        equal &= Q(**{name: value})
+    return Q(**{f"{first}__{'lte' if first_desc else 'gte'}": first_value}) & chain
+
+
+class KeysetPaginator(Paginator):
+    """Cached count; pages fetched by keyset seek from a bookmark, else by an index-only OFFSET."""
+
+    @cached_property
+    def count(self):
+        signature = _signature(self.object_list)
+        if signature is None:
+            return 0
+        key = COUNT_KEY.format(signature)
+        count = cache.get(key)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, getattr(settings, "ADMIN_COUNT_CACHE_TTL", 60))
+        return count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        queryset = self.object_list
+        order = _keyset_ordering(queryset)
+        signature = _signature(queryset, self.per_page)
+        columns = ["pk"] + [name for name, _ in order or []]
+        keys = queryset.values_list(*columns)
+
+        bookmark = None
+        if order and signature and number > 1:
+            bookmark = cache.get(BOOKMARK_KEY.format(signature, number - 1))
+        if bookmark is not None:
+            rows = list(keys.filter(_seek(order, bookmark))[:self.per_page])
+        else:
+            bottom = (number - 1) * self.per_page
+            rows = list(keys[bottom:bottom + self.per_page])
+
+        if order and signature and rows and None not in rows[-1]:
+            cache.set(
+                BOOKMARK_KEY.format(signature, number), rows[-1][1:],
+                getattr(settings, "ADMIN_BOOKMARK_CACHE_TTL", 600),
+            )
+        return self._get_page(queryset.filter(pk__in=[row[0] for row in rows]), number, self)
+
+
+class ScalableChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        if self.model_admin.list_only:
+            self.result_list = self.result_list.only(*self.model_admin.list_only)
+
+
+class ScalableAdminMixin:
+    """
+    For ModelAdmins over large tables. Set `list_select_related` for FK
+    columns and `list_only` to the fields the list needs (related ones as
+    "event__title"); give the model an index matching `ordering` + "-pk".
+    """
+    paginator = KeysetPaginator
+    show_full_result_count = False
+    list_only = None
+
+    def get_changelist(self, request, **kwargs):
+        return ScalableChangeList
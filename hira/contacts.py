@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Contact
+
+CONTACT_CACHE_KEY = "hira:contact:{}"
+
+_MISSING = object()
+
+
+# -------------------------------
+# CACHED LOOKUP
+# -------------------------------
+def get_cached_contact(contact_id):
+    """
+    Contact by id (None if it no longer exists), cached for CONTACT_CACHE_TTL.
+    Contact post_save/post_delete signals and the bulk importer call
+    invalidate_contacts(). The cache is shared by all workers (CACHES), so
+    an admin change (VIP, phone) is seen by every worker on its next request;
+    a per-process cache here would price bookings from a stale contact.
+    """
+    key = CONTACT_CACHE_KEY.format(contact_id)
+    contact = cache.get(key, _MISSING)
+    if contact is _MISSING:
+        contact = Contact.objects.filter(pk=contact_id).first()
+        cache.set(key, contact, timeout=getattr(settings, "CONTACT_CACHE_TTL", 60))
+    return contact
+
+
+def invalidate_contacts(*contact_ids):
+    cache.delete_many([CONTACT_CACHE_KEY.format(contact_id) for contact_id in contact_ids])
+
+
+def session_contact(request):
+    """The logged-in contact for this request (memoised on the request), or None."""
+    if not hasattr(request, "_cached_contact"):
+        contact_id = request.session.get("contact_id")
+        request._cached_contact = get_cached_contact(contact_id) if contact_id else None
+    return request._cached_contact
@@ -0,0 +1,122 @@
+"""
+SQLite write-path settings and lock retries.
+
+Every new SQLite connection gets settings.SQLITE_PRAGMAS (busy timeout,
+cache sizes) through the connection_created signal. WAL is switched on only
+by serving processes (hirapura/wsgi.py calls use_wal()): the journal mode is
+stored in the database file, so tests and management commands leave the
+file as they found it. atomic_retry runs a function in a transaction and,
+when SQLite still reports the database as locked or busy, rolls back and
+retries it with jittered backoff. Retries are counted per function and
+shown in the view metrics JSON.
+"""
+import logging
+import random
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRAGMAS = {
+    "busy_timeout": 5000,          # ms to wait for a lock before "database is locked"
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -16000,          # negative = KiB, so 16 MB per connection
+    "temp_store": "MEMORY",
+}
+WAL_PRAGMAS = {
+    "journal_mode": "WAL",         # readers never block the writer
+    "synchronous": "NORMAL",       # safe with WAL; fsync only at checkpoints
+}
+_wal = False
+
+
+# -------------------------------
+# CONNECTION SETUP
+# -------------------------------
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", DEFAULT_PRAGMAS)
+    if _wal:
+        pragmas = {**WAL_PRAGMAS, **pragmas}
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def use_wal():
+    """Put this process's SQLite connections (and so the database file) in WAL mode."""
+    global _wal
+    _wal = True
+    connection.close()
+
+
+# -------------------------------
+# RETRY COUNTERS
+# -------------------------------
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _count(name, field):
+    with _stats_lock:
+        stats = _stats.setdefault(name, {"calls": 0, "retries": 0, "gave_up": 0})
+        stats[field] += 1
+
+
+def retry_stats():
+    """{function: {"calls", "retries", "gave_up"}} for this process."""
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in sorted(_stats.items())}
+
+
+# -------------------------------
+# RETRYING TRANSACTION
+# -------------------------------
+def is_lock_error(exc):
+    message = str(exc).lower()
+    return isinstance(exc, OperationalError) and ("locked" in message or "busy" in message)
+
+
+def atomic_retry(func=None, *, attempts=None, backoff=None):
+    """
+    Run func in transaction.atomic(), retrying on SQLite lock errors.
+    Use as @atomic_retry, @atomic_retry(attempts=5) or atomic_retry(obj.save)(...).
+
+    Inside an outer atomic block nothing can be retried, so func just runs
+    and the error goes to whoever owns the outer transaction.
+    """
+    if func is None:
+        return lambda f: atomic_retry(f, attempts=attempts, backoff=backoff)
+
+    name = getattr(func, "__qualname__", None) or repr(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if connection.in_atomic_block:
+            return func(*args, **kwargs)
+        tries = attempts or getattr(settings, "DB_LOCK_RETRIES", 4)
+        delay = backoff or getattr(settings, "DB_LOCK_BACKOFF", 0.05)
+        _count(name, "calls")
+        for attempt in range(tries):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as e:
+                if not is_lock_error(e):
+                    raise
+                if attempt == tries - 1:
+                    _count(name, "gave_up")
+                    logger.warning("%s: database still locked after %d attempts", name, tries)
+                    raise
+                _count(name, "retries")
+                time.sleep(delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    return wrapper
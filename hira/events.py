@@ -0,0 +1,76 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Event
+
+ACTIVE_EVENT_CACHE_KEY = "hira:active_event"
+
+_MISSING = object()
+_local = {"event": None, "expires": 0.0}
+_local_lock = threading.Lock()
+
+
+# -------------------------------
+# ACTIVE EVENT RULE
+# -------------------------------
+def resolve_active_event():
+    """
+    The event the site is about: the next event on or after today,
+    otherwise the most recent past one. Always hits the DB.
+    """
+    today = timezone.localdate()
+    upcoming = Event.objects.filter(date__gte=today).order_by("date", "time", "id").first()
+    if upcoming:
+        return upcoming
+    return Event.objects.order_by("-date", "-time", "-id").first()
+
+
+def _seconds_until_midnight():
+    # The rule depends on today's date, so no cached answer may outlive the day
+    now = timezone.localtime()
+    midnight = timezone.make_aware(datetime.combine(now.date() + timedelta(days=1), datetime.min.time()))
+    return max(1, int((midnight - now).total_seconds()))
+
+
+# -------------------------------
+# CACHED LOOKUP
+# -------------------------------
+def get_active_event():
+    """
+    Cached active event (may be None).
+    Served from process memory first, then the shared cache, then the DB.
+    Event post_save/post_delete signals call invalidate_active_event().
+    """
+    now = time.monotonic()
+    if _local["expires"] > now:
+        return _local["event"]
+
+    event = cache.get(ACTIVE_EVENT_CACHE_KEY, _MISSING)
+    if event is _MISSING:
+        event = resolve_active_event()
+        timeout = min(getattr(settings, "ACTIVE_EVENT_CACHE_TTL", 300), _seconds_until_midnight())
+        cache.set(ACTIVE_EVENT_CACHE_KEY, event, timeout=timeout)
+
+    local_ttl = min(getattr(settings, "ACTIVE_EVENT_LOCAL_TTL", 30), _seconds_until_midnight())
+    with _local_lock:
+        _local["event"] = event
+        _local["expires"] = now + local_ttl
+    return event
+
+
+def invalidate_active_event():
+    """Forget the cached active event in this process and in the shared cache."""
+    with _local_lock:
+        _local["event"] = None
+        _local["expires"] = 0.0
+    cache.delete(ACTIVE_EVENT_CACHE_KEY)
+
+
+def active_event(request):
+    """Template context processor: {{ active_event }} on every page."""
+    return {"active_event": get_active_event()}
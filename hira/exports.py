@@ -0,0 +1,172 @@
+"""
+Attendee and contact exports (CSV or XLSX) in constant memory.
+
+Rows are read with values_list(...).iterator(chunk_size), so the database
+cursor is drained a chunk at a time and no model instances are built.
+CSV is written one row at a time straight into a StreamingHttpResponse
+(or a file). XLSX uses openpyxl's write-only mode, which spools rows to a
+temporary file instead of keeping cells in memory; the finished workbook
+is then streamed from disk. Used by the admin export actions and
+manage.py export_data.
+"""
+import csv
+import tempfile
+from datetime import datetime
+
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .facets import normalize
+from .models import Booking, Contact
+
+CHUNK_SIZE = 2000
+# Excel/Sheets run cells starting with these as formulas (and openpyxl writes them as one)
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+# kind: (model, [(header, values_list field)])
+EXPORTS = {
+    "bookings": (Booking, [
+        ("Booking ID", "id"),
+        ("Event", "event__title"),
+        ("Event date", "event__date"),
+        ("Name", "name"),
+        ("Phone", "phone"),
+        ("People", "num_people"),
+        ("Amount", "total_amount"),
+        ("VIP", "is_vip"),
+        ("Paid", "is_paid"),
+        ("Status", "status"),
+        ("Zone", "contact__zone_ref__name"),
+        ("Area", "contact__area_ref__name"),
+        ("Checked in at", "checked_in_at"),
+        ("Booked at", "created_at"),
+    ]),
+    "contacts": (Contact, [
+        ("Contact ID", "id"),
+        ("Full Name", "full_name"),
+        ("Subcast", "sub_cast"),
+        ("Whatsapp Mobile Number", "whatsapp_no"),
+        ("Alternative Mobile Number", "alternate_no"),
+        ("Email", "email"),
+        ("Address", "address"),
+        ("Area", "area"),
+        ("Zone", "zone"),
+        ("Family Members", "family_members"),
+        ("VIP", "vip"),
+    ]),
+}
+
+
+# -------------------------------
+# QUERYSETS & FILTERS
+# -------------------------------
+def filtered(kind, queryset=None, event=None, zone=None, paid=None):
+    """
+    The rows to export. `event` is an id, `zone` a zone name (any spelling),
+    `paid` True/False/None. Contacts match on their live bookings: with an
+    event or paid filter, only contacts holding such a booking are kept.
+    """
+    model, _ = EXPORTS[kind]
+    queryset = model.objects.all() if queryset is None else queryset
+    zone_key = normalize(zone)[0] if zone else None
+    if kind == "bookings":
+        if event is not None:
+            queryset = queryset.filter(event_id=event)
+        if paid is not None:
+            queryset = queryset.filter(is_paid=paid)
+        if zone_key:
+            queryset = queryset.filter(contact__zone_ref__key=zone_key)
+        return queryset.order_by("event_id", "id")
+
+    if zone_key:
+        queryset = queryset.filter(zone_ref__key=zone_key)
+    if event is not None or paid is not None:
+        bookings = Booking.objects.exclude(status=Booking.CANCELLED).filter(contact_id__isnull=False)
+        if event is not None:
+            bookings = bookings.filter(event_id=event)
+        if paid is not None:
+            bookings = bookings.filter(is_paid=paid)
+        queryset = queryset.filter(pk__in=bookings.values("contact_id"))
+    return queryset.order_by("id")
+
+
+def _cell(value):
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, datetime):
+        # Local wall time; openpyxl cannot store time zones
+        return timezone.localtime(value).replace(tzinfo=None) if timezone.is_aware(value) else value
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Names and addresses are typed in by users: keep "=HYPERLINK(...)" text, not a formula
+        return "'" + value
+    return value
+
+
+def rows(kind, queryset):
+    """Header row, then one list per record, read a chunk at a time."""
+    _, columns = EXPORTS[kind]
+    yield [header for header, _ in columns]
+    for values in queryset.values_list(*[field for _, field in columns]).iterator(chunk_size=CHUNK_SIZE):
+        yield [_cell(value) for value in values]
+
+
+# -------------------------------
+# WRITERS
+# -------------------------------
+class _Echo:
+    """File-like object whose write() returns the text, for csv.writer in a generator."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(kind, queryset):
+    # BOM first so Excel reads the Gujarati names as UTF-8
+    yield "\ufeff"
+    writer = csv.writer(_Echo())
+    for row in rows(kind, queryset):
+        yield writer.writerow(["" if value is None else value for value in row])
+
+
+def write_csv(kind, queryset, out):
+    """Write CSV to a text file object; returns the number of records."""
+    count = -2  # BOM and header
+    for line in csv_lines(kind, queryset):
+        out.write(line)
+        count += 1
+    return count
+
+
+def write_xlsx(kind, queryset, out):
+    """Write an XLSX workbook (openpyxl write-only) to a path or binary file; returns the number of records."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(kind.capitalize())
+    count = -1  # header
+    for row in rows(kind, queryset):
+        sheet.append(row)
+        count += 1
+    workbook.save(out)
+    return count
+
+
+def _filename(kind, extension):
+    return f"{kind}-{timezone.localtime():%Y%m%d-%H%M}.{extension}"
+
+
+def csv_response(kind, queryset):
+    response = StreamingHttpResponse(csv_lines(kind, queryset), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{_filename(kind, "csv")}"'
+    return response
+
+
+def xlsx_response(kind, queryset):
+    # Built on disk (write-only mode keeps memory flat), then streamed in blocks
+    spool = tempfile.TemporaryFile()
+    write_xlsx(kind, queryset, spool)
+    spool.seek(0)
+    return FileResponse(
+        spool, as_attachment=True, filename=_filename(kind, "xlsx"),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
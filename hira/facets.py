@@ -0,0 +1,89 @@
+"""
+Area/Zone normalization and cached contact facet counts.
+
+Contact.area and Contact.zone keep the text as entered; every save and
+import also points Contact.area_ref / zone_ref at a canonical Area / Zone
+row (matched case- and whitespace-insensitively), which holds the
+canonical name. The admin lists and filters on those indexed integer
+columns, so renaming an Area shows everywhere at once; the per-value
+counts it shows come from one cached GROUP BY that is dropped whenever
+contacts, areas or zones change.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Area, Contact, Zone
+
+FACETS_CACHE_KEY = "hira:contact_facets"
+
+
+# -------------------------------
+# NORMALIZATION
+# -------------------------------
+def normalize(value):
+    """(key, display name) for a raw area/zone string, or (None, "") if blank."""
+    name = " ".join((value or "").split())
+    if not name or name.lower() == "nan":
+        return None, ""
+    if name.isupper() or name.islower():
+        name = name.title()
+    return name.casefold(), name
+
+
+def _lookup(model, keys_to_names):
+    """{key: row} for the given keys, creating missing rows in one INSERT."""
+    rows = {row.key: row for row in model.objects.filter(key__in=keys_to_names)}
+    missing = [model(key=key, name=name) for key, name in keys_to_names.items() if key not in rows]
+    if missing:
+        model.objects.bulk_create(missing, ignore_conflicts=True)
+        rows.update((row.key, row) for row in model.objects.filter(key__in=[m.key for m in missing]))
+    return rows
+
+
+def assign_dimensions(contacts):
+    """
+    Point each contact's area_ref/zone_ref at its canonical Area/Zone; the
+    area/zone text is left as entered. Unsaved changes only; callers save or
+    bulk-write the contacts. Two queries per model at most.
+    """
+    for field, ref, model in (("area", "area_ref", Area), ("zone", "zone_ref", Zone)):
+        wanted = {}
+        normalized = []
+        for contact in contacts:
+            key, name = normalize(getattr(contact, field))
+            normalized.append(key)
+            if key:
+                wanted.setdefault(key, name)
+        rows = _lookup(model, wanted) if wanted else {}
+        for contact, key in zip(contacts, normalized):
+            setattr(contact, ref, rows.get(key))
+
+
+# -------------------------------
+# FACET COUNTS
+# -------------------------------
+def facet_counts():
+    """
+    {"area": [(id, name, count)], "zone": [...]} over all contacts, largest
+    first. Cached until invalidate_facets() or FACETS_CACHE_TTL.
+    """
+    facets = cache.get(FACETS_CACHE_KEY)
+    if facets is None:
+        facets = {}
+        for ref, model in (("area_ref", Area), ("zone_ref", Zone)):
+            counts = dict(
+                Contact.objects.filter(**{f"{ref}__isnull": False})
+                .values_list(ref).annotate(n=Count("id")).order_by()
+            )
+            names = dict(model.objects.filter(pk__in=counts).values_list("id", "name"))
+            facets[ref[:-4]] = sorted(
+                ((pk, names[pk], n) for pk, n in counts.items() if pk in names),
+                key=lambda row: (-row[2], row[1]),
+            )
+        cache.set(FACETS_CACHE_KEY, facets, timeout=getattr(settings, "FACETS_CACHE_TTL", 3600))
+    return facets
+
+
+def invalidate_facets():
+    cache.delete(FACETS_CACHE_KEY)
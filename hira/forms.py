@@ -86,4 +86,15 @@ class PostEventFeedbackForm(forms.ModelForm):
             "would_recommend": forms.CheckboxInput(attrs={
                 "class": "h-5 w-5 rounded border-gray-600 text-green-400 focus:ring-green-500"
             }),
-        }
\ No newline at end of file
+        }
+
+class StatementUploadForm(forms.Form):
+    """Bank/UPI statement for reconciliation in the admin (hira/statements.py)."""
+    statement = forms.FileField(help_text="CSV or XLSX export of the account statement")
+    dry_run = forms.BooleanField(required=False, help_text="Only report what would be matched")
+
+    def clean_statement(self):
+        statement = self.cleaned_data['statement']
+        if not statement.name.lower().endswith(('.csv', '.xlsx', '.xlsm')):
+            raise forms.ValidationError("Upload a .csv or .xlsx statement.")
+        return statement
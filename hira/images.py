@@ -0,0 +1,166 @@
+"""
+Responsive derivatives of the app's static images.
+
+build_derivatives() writes resized WebP and JPEG copies of every image under
+RESPONSIVE_IMAGE_SOURCE_DIR into RESPONSIVE_IMAGE_ROOT (inside
+STATICFILES_DIRS, so collectstatic ships them) plus a manifest.json that the
+{% picture %} template tag reads. Derivative names carry the source hash,
+so only changed sources are reprocessed and browsers never see stale files.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def image_settings():
+    return {
+        "source_dir": Path(getattr(settings, "RESPONSIVE_IMAGE_SOURCE_DIR", settings.BASE_DIR / "hira" / "static")),
+        "root": Path(getattr(settings, "RESPONSIVE_IMAGE_ROOT", settings.BASE_DIR / "static" / "responsive")),
+        "static_prefix": getattr(settings, "RESPONSIVE_IMAGE_STATIC_PREFIX", "responsive/"),
+        "widths": sorted(getattr(settings, "RESPONSIVE_IMAGE_WIDTHS", [480, 960, 1600])),
+        "webp_quality": getattr(settings, "RESPONSIVE_IMAGE_WEBP_QUALITY", 80),
+        "jpeg_quality": getattr(settings, "RESPONSIVE_IMAGE_JPEG_QUALITY", 82),
+    }
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _options_key(conf):
+    # Changing widths or quality invalidates every derivative
+    return f"{conf['widths']}|{conf['webp_quality']}|{conf['jpeg_quality']}"
+
+
+# -------------------------------
+# WORKER (runs in a child process)
+# -------------------------------
+def _render(rel_path, source_hash, conf):
+    from PIL import Image, ImageOps
+
+    source = conf["source_dir"] / rel_path
+    stem, _ = os.path.splitext(rel_path)
+    with Image.open(source) as im:
+        im = ImageOps.exif_transpose(im)
+        width, height = im.size
+        if im.mode in ("RGBA", "LA", "P"):
+            im = im.convert("RGBA")
+            flat = Image.new("RGB", im.size, (255, 255, 255))
+            flat.paste(im, mask=im.getchannel("A"))
+        else:
+            flat = im.convert("RGB")
+
+        # Never upscale; the original width is always offered
+        targets = [w for w in conf["widths"] if w < width] + [width]
+        variants = {"webp": [], "jpeg": []}
+        for w in targets:
+            h = round(height * w / width)
+            resized = flat if w == width else flat.resize((w, h), Image.LANCZOS)
+            for fmt, ext, opts in (
+                ("webp", "webp", {"quality": conf["webp_quality"], "method": 6}),
+                ("jpeg", "jpg", {"quality": conf["jpeg_quality"], "optimize": True, "progressive": True}),
+            ):
+                rel_out = f"{stem}.{w}.{source_hash[:10]}.{ext}"
+                out = conf["root"] / rel_out
+                out.parent.mkdir(parents=True, exist_ok=True)
+                resized.save(out, fmt.upper(), **opts)
+                variants[fmt].append({"w": w, "path": rel_out, "bytes": out.stat().st_size})
+
+    return rel_path, {"hash": source_hash, "width": width, "height": height, "variants": variants}
+
+
+# -------------------------------
+# BUILD
+# -------------------------------
+def load_manifest(root=None):
+    root = root or image_settings()["root"]
+    try:
+        with open(root / MANIFEST_NAME, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_derivatives(force=False, workers=None, log=print):
+    """
+    (Re)build derivatives for new or changed sources and drop those of
+    deleted ones. Returns (built, skipped) counts.
+    """
+    conf = image_settings()
+    root, source_dir = conf["root"], conf["source_dir"]
+    root.mkdir(parents=True, exist_ok=True)
+
+    old = load_manifest(root)
+    fresh = old.get("version") == MANIFEST_VERSION and old.get("options") == _options_key(conf) and not force
+    old_images = old.get("images", {}) if fresh else {}
+
+    sources = sorted(
+        p.relative_to(source_dir).as_posix()
+        for p in source_dir.rglob("*")
+        if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS and root not in p.parents
+    )
+
+    images, todo = {}, []
+    for rel in sources:
+        source_hash = _file_hash(source_dir / rel)
+        entry = old_images.get(rel)
+        outputs_exist = entry and all(
+            (root / v["path"]).exists() for vs in entry["variants"].values() for v in vs
+        )
+        if entry and entry["hash"] == source_hash and outputs_exist:
+            images[rel] = entry
+        else:
+            todo.append((rel, source_hash))
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_render, rel, source_hash, conf) for rel, source_hash in todo]
+            for future in futures:
+                rel, entry = future.result()
+                images[rel] = entry
+                total = sum(v["bytes"] for v in entry["variants"]["webp"])
+                log(f"built {rel}: {len(entry['variants']['webp'])} widths, {total // 1024} KB webp")
+
+    # Remove derivatives no longer referenced by the manifest
+    keep = {v["path"] for e in images.values() for vs in e["variants"].values() for v in vs}
+    for path in root.rglob("*"):
+        if path.is_file() and path.name != MANIFEST_NAME and path.relative_to(root).as_posix() not in keep:
+            path.unlink()
+
+    manifest = {"version": MANIFEST_VERSION, "options": _options_key(conf), "images": images}
+    tmp = root / (MANIFEST_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1, sort_keys=True)
+    os.replace(tmp, root / MANIFEST_NAME)
+    return len(todo), len(sources) - len(todo)
+
+
+# -------------------------------
+# LOOKUP (template tag)
+# -------------------------------
+_cached = {"mtime": None, "images": {}}
+
+
+def manifest_entry(static_path):
+    """Manifest entry for a static path like "home/bg2.jpeg", or None. Reloaded when the file changes."""
+    path = image_settings()["root"] / MANIFEST_NAME
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    if mtime != _cached["mtime"]:
+        _cached["images"] = load_manifest().get("images", {})
+        _cached["mtime"] = mtime
+    return _cached["images"].get(static_path)
@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from hira.models import Booking, Contact
+
+
+class Command(BaseCommand):
+    help = (
+        "Link bookings without a contact to the Contact whose WhatsApp number matches "
+        "their phone, in id order and in batches. Safe to stop and re-run: linked rows "
+        "are skipped, and --after-id resumes from the last checkpoint printed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Bookings per transaction (default: 1000)')
+        parser.add_argument('--after-id', type=int, default=0, help='Resume after this booking id')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be linked without writing')
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        last_id, batch_size = opts['after_id'], opts['batch_size']
+        linked = unmatched = ambiguous = duplicates = 0
+        claimed = set()  # live pairs linked by this run (not yet visible to --dry-run queries)
+
+        while True:
+            batch = list(
+                Booking.objects.filter(contact__isnull=True, id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'phone', 'event_id', 'status')[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1][0]
+
+            # phone -> contact id, dropping numbers shared by several contacts
+            phones = {phone for _, phone, _, _ in batch}
+            owners = {}
+            shared = set(
+                Contact.objects.filter(whatsapp_no__in=phones).values('whatsapp_no')
+                .annotate(n=Count('id')).filter(n__gt=1).values_list('whatsapp_no', flat=True)
+            )
+            for contact_id, phone in Contact.objects.filter(whatsapp_no__in=phones - shared).values_list('id', 'whatsapp_no'):
+                owners[phone] = contact_id
+
+            # Live (contact, event) pairs already taken, so the unique constraint holds
+            contact_ids = set(owners.values())
+            taken = claimed | set(
+                Booking.objects.filter(contact_id__in=contact_ids)
+                .exclude(status=Booking.CANCELLED)
+                .values_list('contact_id', 'event_id')
+            )
+
+            updates = []
+            for booking_id, phone, event_id, status in batch:
+                contact_id = owners.get(phone)
+                if contact_id is None:
+                    if phone in shared:
+                        ambiguous += 1
+                    else:
+                        unmatched += 1
+                    continue
+                if status != Booking.CANCELLED:
+                    if (contact_id, event_id) in taken:
+                        duplicates += 1  # an earlier live booking keeps the link
+                        continue
+                    taken.add((contact_id, event_id))
+                    claimed.add((contact_id, event_id))
+                updates.append((contact_id, booking_id))
+
+            if updates and not opts['dry_run']:
+                qn = connection.ops.quote_name
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.executemany(
+                        f"UPDATE {qn(Booking._meta.db_table)} SET {qn('contact_id')} = %s WHERE {qn('id')} = %s",
+                        updates,
+                    )
+            linked += len(updates)
+            self.stdout.write(f"checkpoint --after-id {last_id}: {linked} linked so far")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {'Would link' if opts['dry_run'] else 'Linked'} {linked} bookings in {time.monotonic() - started:.1f}s; "
+            f"{unmatched} without a matching contact, {ambiguous} with a shared number, "
+            f"{duplicates} duplicate live bookings left unlinked"
+        ))
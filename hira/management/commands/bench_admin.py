@@ -0,0 +1,116 @@
+import datetime
+import statistics
+import time
+
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from hira.admin import hirapura_admin
+from hira.models import Booking, Event
+
+BENCH_USER = "bench-admin"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large throwaway event and time the booking admin changelist from "
+        "page 1 to deep pages, both jumping straight to a page and paging forward "
+        "to it. --stock repeats it with Django's OFFSET paginator and exact counts. "
+        "Run it against a copy of the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=200000, help='Bookings to seed (default: 200000)')
+        parser.add_argument('--per-page', type=int, default=25, help='Changelist page size (default: 25)')
+        parser.add_argument('--pages', default='1,10,100,1000,5000', help='Pages to time (default: 1,10,100,1000,5000)')
+        parser.add_argument('--repeat', type=int, default=3, help='Requests per measurement; the median is reported (default: 3)')
+        parser.add_argument('--stock', action='store_true', help='Also time the stock Django changelist')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark event and its bookings')
+
+    def handle(self, *args, **opts):
+        total, per_page = opts['bookings'], opts['per_page']
+        last_page = (total + per_page - 1) // per_page
+        pages = sorted({min(int(p), last_page - 1) for p in opts['pages'].split(',')})
+        if not pages or pages[0] < 1:
+            raise CommandError("--pages needs pages below the last one")
+        if User.objects.filter(username=BENCH_USER).exists():
+            raise CommandError(f"User {BENCH_USER!r} already exists; remove it or drop --keep leftovers first")
+
+        event = Event.objects.create(
+            title="Admin benchmark", date=datetime.date.today(), time=datetime.time(0, 0),
+            place="bench", admin_name="bench", admin_phone="0",
+        )
+        user = User.objects.create_superuser(BENCH_USER, password=None)
+        started = time.perf_counter()
+        self.stdout.write(f"Seeding {total} bookings…")
+        for start in range(0, total, 5000):
+            Booking.objects.bulk_create([
+                Booking(event=event, name=f"Bench Guest {i}", phone=f"01{i:08d}", num_people=1 + i % 4,
+                        total_amount=50 * (1 + i % 4), is_paid=i % 3 == 0, status=Booking.WAITLISTED)
+                for i in range(start, min(start + 5000, total))
+            ])
+        self.stdout.write(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+        model_admin = hirapura_admin._registry[Booking]
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"]):
+                client = Client()
+                client.force_login(user)
+                url = reverse("hirapura_admin:hira_booking_changelist")
+                model_admin.list_per_page = per_page
+                self.report("scalable", self.measure(client, url, pages, opts['repeat']))
+                if opts['stock']:
+                    model_admin.paginator = Paginator
+                    model_admin.show_full_result_count = True
+                    model_admin.get_changelist = lambda request, **kwargs: ChangeList
+                    self.report("stock", self.measure(client, url, pages, opts['repeat']))
+        finally:
+            for attr in ('list_per_page', 'paginator', 'show_full_result_count', 'get_changelist'):
+                model_admin.__dict__.pop(attr, None)
+            if not opts['keep']:
+                # Straight DELETE: the per-row delete signals are pointless for a throwaway event
+                qn = connection.ops.quote_name
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DELETE FROM {qn(Booking._meta.db_table)} WHERE {qn('event_id')} = %s", [event.pk])
+                event.delete()
+                user.delete()
+
+    def measure(self, client, url, pages, repeat):
+        def timed(page):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(url, {"p": page})
+                elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f"Page {page}: HTTP {response.status_code}")
+            return elapsed, len(queries)
+
+        timed(1)  # warm up: templates, session, count cache
+        results = []
+        for page in pages:
+            # Straight to the page, then on to the next one as the "next" link would
+            jumps, forwards = [], []
+            for _ in range(repeat):
+                jumps.append(timed(page))
+                forwards.append(timed(page + 1))
+            results.append((page, jumps, forwards))
+        return results
+
+    def report(self, label, results):
+        self.stdout.write(f"\n{label}: page    jump ms  queries    next ms  queries")
+        for page, jumps, forwards in results:
+            self.stdout.write(
+                f"{'':{len(label)}}  {page:>5}  {statistics.median(t for t, _ in jumps) * 1000:>8.1f}  {jumps[-1][1]:>7}"
+                f"  {statistics.median(t for t, _ in forwards) * 1000:>9.1f}  {forwards[-1][1]:>7}"
+            )
+        first = statistics.median(t for t, _ in results[0][2])
+        deepest = statistics.median(t for t, _ in results[-1][2])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {label}: paging forward at page {results[-1][0] + 1} takes {deepest / first:.1f}x page {results[0][0] + 1}"
+        ))
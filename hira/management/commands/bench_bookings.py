@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+from django.db.models import Count, Sum
+
+from hira.bookings import create_booking
+from hira.models import Booking, Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire parallel booking attempts at a throwaway capacity-limited event and "
+        "check that no seat is oversold. Run it against a copy of the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=200, help='Parallel booking attempts (default: 200)')
+        parser.add_argument('--capacity', type=int, default=120, help='Seats on the benchmark event (default: 120)')
+        parser.add_argument('--people', type=int, default=1, help='People per booking (default: 1)')
+        parser.add_argument('--threads', type=int, default=50, help='Concurrent workers (default: 50)')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark event and its bookings')
+
+    def handle(self, *args, **opts):
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                mode = cursor.fetchone()[0]
+            self.stdout.write(f"SQLite journal_mode={mode}")
+
+        event = Event.objects.create(
+            title="Booking benchmark",
+            date=datetime.date.today(),
+            time=datetime.time(18, 0),
+            place="bench",
+            admin_name="bench",
+            admin_phone="0",
+            capacity=opts['capacity'],
+        )
+        attempts, people = opts['attempts'], opts['people']
+        gate = threading.Barrier(min(opts['threads'], attempts))
+        latencies, errors = [], []
+
+        def attempt(i):
+            close_old_connections()
+            try:
+                gate.wait(timeout=10)
+            except threading.BrokenBarrierError:
+                pass
+            started = time.perf_counter()
+            try:
+                create_booking(
+                    event, people,
+                    name=f"bench {i}", phone=f"9{i:09d}", total_amount=50 * people,
+                )
+                latencies.append(time.perf_counter() - started)
+            except OperationalError as e:
+                errors.append(str(e))
+            finally:
+                close_old_connections()
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=opts['threads']) as pool:
+                list(pool.map(attempt, range(attempts)))
+            elapsed = time.perf_counter() - started
+
+            event.refresh_from_db()
+            bookings = Booking.objects.filter(event=event)
+            confirmed = bookings.filter(status=Booking.CONFIRMED).aggregate(n=Count('id'), seats=Sum('num_people'))
+            confirmed_seats = confirmed['seats'] or 0
+            waitlisted = bookings.filter(status=Booking.WAITLISTED).count()
+        finally:
+            if not opts['keep']:
+                event.delete()
+
+        lat = sorted(latencies) or [0]
+        self.stdout.write(
+            f"{attempts} attempts in {elapsed:.2f}s ({attempts / elapsed:.0f}/s), "
+            f"p50 {statistics.median(lat) * 1000:.1f}ms, p95 {lat[int(len(lat) * 0.95) - 1] * 1000:.1f}ms"
+        )
+        self.stdout.write(
+            f"capacity {event.capacity}: {confirmed['n']} confirmed "
+            f"({confirmed_seats} seats), {waitlisted} waitlisted, {len(errors)} lock errors; "
+            f"counter says {event.seats_booked}"
+        )
+        if confirmed_seats > event.capacity or confirmed_seats != event.seats_booked:
+            raise CommandError("❌ Oversold or counter drift detected")
+        self.stdout.write(self.style.SUCCESS("✅ No overselling"))
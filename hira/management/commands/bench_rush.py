@@ -0,0 +1,303 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import json
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from hira import sms
+from hira.facets import assign_dimensions, invalidate_facets
+from hira.models import Area, Booking, Contact, Event, Zone
+from hira.search import index_contacts
+
+# Synthetic members get 10-digit numbers starting with "01", which no real
+# Indian mobile number does, so they never collide with imported contacts.
+PHONE_PREFIX = "01"
+STEPS = ["send_otp", "sms_wait", "verify_otp", "details", "book"]
+
+
+class StepFailed(Exception):
+    pass
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the invitation-day rush: seed synthetic members, then run "
+        "send OTP → verify OTP → details → book for each of them concurrently "
+        "through the WSGI app with a stub SMS gateway. Writes per-step "
+        "throughput/latency as JSON. Runs against a throwaway copy of the "
+        "SQLite database unless --in-place is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500, help='Synthetic members to log in and book (default: 500)')
+        parser.add_argument('--concurrency', type=int, default=50, help='Members in flight at once (default: 50)')
+        parser.add_argument('--capacity', type=int, default=None, help='Seat capacity of the benchmark event (default: unlimited)')
+        parser.add_argument('--sms-latency', type=float, default=0.2, help='Simulated gateway latency in seconds (default: 0.2)')
+        parser.add_argument('--output', help='JSON results file (default: bench/rush-<time>-<commit>.json)')
+        parser.add_argument('--compare', help='Earlier results file to print p95 / throughput deltas against')
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help='Write to the configured database itself. The benchmark event is the active event '
+                 'for everyone while it runs; only use this on a staging copy.',
+        )
+        parser.add_argument('--keep', action='store_true', help='With --in-place: keep the synthetic members, event and bookings')
+
+    def handle(self, *args, **opts):
+        users = opts['users']
+        if users >= 10 ** 8:
+            raise CommandError("--users must be below 100000000")
+        in_place = opts['in_place']
+        if opts['keep'] and not in_place:
+            raise CommandError("--keep only makes sense with --in-place; the copy is discarded")
+        if not in_place and connection.vendor != 'sqlite':
+            raise CommandError("Only a SQLite database can be copied; pass --in-place to use the configured one")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            overrides = {
+                "OTP_SMS_GATEWAY": "hira.sms.StubGateway",
+                "OTP_STUB_LATENCY": opts['sms_latency'],
+                "RATELIMIT_DB": str(Path(tmp) / "ratelimit.sqlite3"),
+                "ALLOWED_HOSTS": ["testserver"],
+            }
+            if not in_place:
+                # Cached events and contacts of the copy must not reach the real workers
+                overrides["CACHES"] = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+                source = self.use_copy(Path(tmp) / "bench.sqlite3")
+            try:
+                with override_settings(**overrides):
+                    results = self.seed_and_run(opts, cleanup=in_place and not opts['keep'])
+            finally:
+                if not in_place:
+                    self.use_database(source)
+
+        results["options"] = {k: opts[k] for k in ('users', 'concurrency', 'capacity', 'sms_latency', 'in_place')}
+        self.report(results)
+
+        output = Path(opts['output'] or self.default_output(results))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=1))
+        self.stdout.write(f"Results written to {output}")
+
+        if opts['compare']:
+            self.compare(json.loads(Path(opts['compare']).read_text()), results)
+
+    # -------------------------------
+    # DATABASE
+    # -------------------------------
+    def use_database(self, name):
+        # Worker threads open their connections from this same settings dict
+        connection.close()
+        connection.settings_dict["NAME"] = name
+
+    def use_copy(self, path):
+        """Snapshot the configured SQLite database to `path` and switch to it; returns the original name."""
+        source = connection.settings_dict["NAME"]
+        self.stdout.write(f"Copying {source} to a throwaway database…")
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+        self.use_database(str(path))
+        return source
+
+    # -------------------------------
+    # SEEDING
+    # -------------------------------
+    def seed_and_run(self, opts, cleanup):
+        users = opts['users']
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode=WAL")
+
+        phones = [f"{PHONE_PREFIX}{i:08d}" for i in range(users)]
+        if Contact.objects.filter(whatsapp_no__startswith=PHONE_PREFIX).exists():
+            raise CommandError(f"Contacts with {PHONE_PREFIX}… numbers already exist; remove them or drop --keep leftovers first")
+
+        self.stdout.write(f"Seeding {users} members…")
+        contacts = [
+            Contact(full_name=f"Bench Member {i}", sub_cast="bench", address="bench",
+                    area="bench", zone="bench", whatsapp_no=phone)
+            for i, phone in enumerate(phones)
+        ]
+        # What save() and import_excel do: area/zone refs and the search index
+        assign_dimensions(contacts)
+        Contact.objects.bulk_create(contacts, batch_size=1000)
+        index_contacts(contacts)
+        invalidate_facets()
+        # Today at midnight: sorts ahead of real events, so it becomes the active event
+        event = Event.objects.create(
+            title="Registration rush benchmark",
+            date=datetime.date.today(),
+            time=datetime.time(0, 0),
+            place="bench",
+            admin_name="bench",
+            admin_phone="0",
+            capacity=opts['capacity'],
+        )
+
+        try:
+            sms.get_gateway.cache_clear()
+            return self.run_rush(phones, opts['concurrency'], event)
+        finally:
+            sms.get_gateway.cache_clear()
+            if cleanup:
+                event.delete()
+                Contact.objects.filter(whatsapp_no__startswith=PHONE_PREFIX).delete()
+                Area.objects.filter(key="bench", contacts__isnull=True).delete()
+                Zone.objects.filter(key="bench", contacts__isnull=True).delete()
+
+    # -------------------------------
+    # DRIVER
+    # -------------------------------
+    def run_rush(self, phones, concurrency, event):
+        timings = {step: [] for step in STEPS}
+        failures = {step: {"errors": 0, "lock_errors": 0} for step in STEPS}
+        lock = threading.Lock()
+        gateway = sms.get_gateway()
+        login_url, home_url = reverse("login"), reverse("home")
+
+        def timed(step, func):
+            started = time.perf_counter()
+            try:
+                func()
+            except OperationalError as e:
+                with lock:
+                    failures[step]["lock_errors" if "locked" in str(e) else "errors"] += 1
+                raise StepFailed(step)
+            except Exception:
+                with lock:
+                    failures[step]["errors"] += 1
+                raise StepFailed(step)
+            elapsed = time.perf_counter() - started
+            with lock:
+                timings[step].append(elapsed)
+
+        def expect(response, status, location=None):
+            if response.status_code != status:
+                raise AssertionError(f"HTTP {response.status_code}")
+            if location and not response["Location"].startswith(location):
+                raise AssertionError(f"redirected to {response['Location']}")
+
+        def member(i):
+            phone = phones[i]
+            # A distinct client address per member, as behind real carrier NATs
+            client = Client(REMOTE_ADDR=f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}")
+            close_old_connections()
+            try:
+                timed("send_otp", lambda: expect(
+                    client.post(login_url, {"action": "send_otp", "phone": phone}), 200))
+
+                def wait_for_sms():
+                    deadline = time.monotonic() + 30
+                    while phone not in gateway.sent:
+                        if time.monotonic() > deadline:
+                            raise TimeoutError("OTP never delivered")
+                        time.sleep(0.005)
+                timed("sms_wait", wait_for_sms)
+
+                timed("verify_otp", lambda: expect(
+                    client.post(login_url, {"action": "verify_otp", "phone": phone, "otp": gateway.sent[phone]}),
+                    302, home_url))
+                details_url = reverse("details", kwargs={"phone": phone})
+                timed("details", lambda: expect(client.get(details_url), 200))
+                timed("book", lambda: expect(client.post(details_url, {"num_people": 2}), 302))
+                return True
+            except StepFailed:
+                return False
+            finally:
+                close_old_connections()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            completed = sum(pool.map(member, range(len(phones))))
+        wall = time.perf_counter() - started
+
+        bookings = Booking.objects.filter(event=event)
+        steps = {}
+        for step in STEPS:
+            values = sorted(timings[step])
+            steps[step] = {
+                "ok": len(values),
+                **failures[step],
+                "throughput": round(len(values) / wall, 1),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+                "max_ms": round((values[-1] if values else 0) * 1000, 1),
+            }
+        return {
+            "commit": self.git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "database": connection.vendor,
+            "wall_seconds": round(wall, 2),
+            "flows_completed": completed,
+            "flows_per_second": round(completed / wall, 1),
+            "bookings": {
+                "confirmed": bookings.filter(status=Booking.CONFIRMED).count(),
+                "waitlisted": bookings.filter(status=Booking.WAITLISTED).count(),
+            },
+            "steps": steps,
+        }
+
+    # -------------------------------
+    # OUTPUT
+    # -------------------------------
+    @staticmethod
+    def git_commit():
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return "unknown"
+
+    @staticmethod
+    def default_output(results):
+        stamp = results["timestamp"].replace(":", "").replace("-", "")
+        return settings.BASE_DIR / "bench" / f"rush-{stamp}-{results['commit']}.json"
+
+    def report(self, results):
+        self.stdout.write(
+            f"{results['flows_completed']}/{results['options']['users']} flows in {results['wall_seconds']}s "
+            f"({results['flows_per_second']}/s); bookings {results['bookings']}"
+        )
+        self.stdout.write(f"{'step':<11}{'ok':>6}{'err':>5}{'lock':>6}{'/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for step, s in results["steps"].items():
+            self.stdout.write(
+                f"{step:<11}{s['ok']:>6}{s['errors']:>5}{s['lock_errors']:>6}{s['throughput']:>8}"
+                f"{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}"
+            )
+        if any(s["errors"] or s["lock_errors"] for s in results["steps"].values()):
+            self.stdout.write(self.style.WARNING("⚠️ Some steps failed"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ All flows completed"))
+
+    def compare(self, before, after):
+        self.stdout.write(f"Compared with {before.get('commit')} ({before.get('timestamp')}):")
+        for step, s in after["steps"].items():
+            old = before.get("steps", {}).get(step)
+            if not old:
+                continue
+            self.stdout.write(
+                f"  {step:<11} p95 {old['p95_ms']:>8} → {s['p95_ms']:>8} ms   "
+                f"throughput {old['throughput']:>7} → {s['throughput']:>7}/s"
+            )
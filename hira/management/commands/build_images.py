@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hira.images import build_derivatives, image_settings
+
+
+class Command(BaseCommand):
+    help = "Build resized WebP/JPEG derivatives of static images for the {% picture %} tag"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild every image, not only changed ones')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        built, skipped = build_derivatives(
+            force=opts['force'], workers=opts['workers'], log=self.stdout.write
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Images: {built} built, {skipped} unchanged in {time.monotonic() - started:.1f}s "
+            f"→ {image_settings()['root']}"
+        ))
@@ -0,0 +1,18 @@
+from django.contrib.staticfiles.management.commands.collectstatic import Command as CollectStaticCommand
+from django.core.management import call_command
+
+
+class Command(CollectStaticCommand):
+    """collectstatic that first refreshes the responsive image derivatives."""
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--skip-images', action='store_true',
+            help='Do not run build_images before collecting.'
+        )
+
+    def handle(self, **options):
+        if not options['skip_images']:
+            call_command('build_images', verbosity=options['verbosity'])
+        return super().handle(**options)
@@ -0,0 +1,47 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hira.exports import EXPORTS, filtered, write_csv, write_xlsx
+from hira.models import Event
+
+PAID = {'yes': True, 'no': False}
+
+
+class Command(BaseCommand):
+    help = (
+        "Export bookings or contacts as CSV or XLSX in constant memory, optionally "
+        "filtered by event, zone and paid status."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS), help='What to export')
+        parser.add_argument('-o', '--output', help='Output file; .xlsx selects Excel (default: CSV on stdout)')
+        parser.add_argument('--format', choices=['csv', 'xlsx'], help='Output format (default: from the file name, else csv)')
+        parser.add_argument('--event', type=int, help='Only this event (contacts: those with a live booking for it)')
+        parser.add_argument('--zone', help='Only this zone (any spelling)')
+        parser.add_argument('--paid', choices=sorted(PAID), help='Only paid / unpaid bookings')
+
+    def handle(self, *args, **opts):
+        kind, output = opts['kind'], opts['output']
+        fmt = opts['format'] or ('xlsx' if output and output.lower().endswith('.xlsx') else 'csv')
+        if fmt == 'xlsx' and not output:
+            raise CommandError("❌ XLSX needs an output file (-o attendees.xlsx)")
+        if opts['event'] is not None and not Event.objects.filter(pk=opts['event']).exists():
+            raise CommandError(f"❌ No event with id {opts['event']}")
+
+        queryset = filtered(kind, event=opts['event'], zone=opts['zone'], paid=PAID.get(opts['paid']))
+        started = time.monotonic()
+        if fmt == 'xlsx':
+            count = write_xlsx(kind, queryset, output)
+        elif output:
+            with open(output, 'w', encoding='utf-8', newline='') as f:
+                count = write_csv(kind, queryset, f)
+        else:
+            write_csv(kind, queryset, sys.stdout)  # not self.stdout: it would add newlines
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Exported {count} {kind} to {output} in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,42 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hira.manifest import FULL_MAGIC, GateManifest, build_delta, build_manifest, prune_removed
+from hira.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the offline gate manifest of an event (every valid ticket, packed and "
+        "compressed) for gate devices, or a delta from an earlier version with --since."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', type=int, help='Event to export')
+        parser.add_argument('--since', type=int, help='Version the device already has (writes a delta)')
+        parser.add_argument('-o', '--output', help='Output file (default: gate-<event>-<version>.bin)')
+
+    def handle(self, *args, **opts):
+        event_id = opts['event_id']
+        if not Event.objects.filter(pk=event_id).exists():
+            raise CommandError(f"❌ No event with id {event_id}")
+
+        started = time.monotonic()
+        # Removals older than the retention window only serve versions that get a full manifest
+        prune_removed()
+        if opts['since'] is not None:
+            version, data = build_delta(event_id, opts['since'])
+        else:
+            version, data = build_manifest(event_id)
+        elapsed = time.monotonic() - started
+
+        path = Path(opts['output'] or f"gate-{event_id}-{version}.bin")
+        path.write_bytes(data)
+
+        kind = "delta" if data[:4] != FULL_MAGIC else "full manifest"
+        summary = f"{len(GateManifest.parse(data))} tickets" if kind == "full manifest" else f"from {opts['since']}"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Wrote {kind} v{version} ({summary}, {len(data) / 1024:.1f} KB) to {path} in {elapsed:.2f}s"
+        ))
@@ -1,13 +1,41 @@
 from django.core.management.base import BaseCommand
+from django.db import connection, transaction
 import pandas as pd
-from hira.models import Contact
+from hira.contacts import invalidate_contacts
+from hira.facets import assign_dimensions, invalidate_facets
+from hira.search import index_contacts
+from hira.models import Contact, ImportFingerprint
+import hashlib
 import math
+import re
+import time
+
+# Fields rewritten on existing contacts (everything except the lookup key)
+UPDATE_FIELDS = [
+    'full_name', 'sub_cast', 'address', 'area', 'zone',
+    'alternate_no', 'family_members', 'email', 'vip',
+]
+# Not in the sheet; set by assign_dimensions() and written with UPDATE_FIELDS
+DERIVED_FIELDS = ['area_ref', 'zone_ref']
+
 
 class Command(BaseCommand):
     help = "Import data from Excel file into Contact model"
 
     def add_arguments(self, parser):
         parser.add_argument('excel_path', type=str, help='Path to Excel file')
+        parser.add_argument(
+            '--stream', action='store_true',
+            help='Read rows lazily and write them in batched transactions (for large sheets)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Rows per lookup/write batch in --stream mode (default: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report created/updated/unchanged/conflicting rows without writing (implies --stream)'
+        )
 
     def safe_str(self, value):
         """Convert value to string and strip, handle NaN/None."""
@@ -15,8 +43,25 @@ class Command(BaseCommand):
             return ''
         return str(value).strip()
 
+    def safe_phone(self, value):
+        """
+        Normalized mobile number: digits only, without the +91 / 0 prefix, so
+        "+91 98765 43210", "098765 43210" and 9876543210.0 are all "9876543210".
+        """
+        if isinstance(value, float) and not math.isnan(value) and value.is_integer():
+            value = int(value)
+        digits = re.sub(r'\D', '', self.safe_str(value))
+        if len(digits) == 12 and digits.startswith('91'):
+            digits = digits[2:]
+        elif len(digits) == 11 and digits.startswith('0'):
+            digits = digits[1:]
+        return digits
+
     def handle(self, *args, **kwargs):
         path = kwargs['excel_path']
+        if kwargs['stream'] or kwargs['dry_run']:
+            return self.handle_stream(path, max(1, kwargs['chunk_size']), kwargs['dry_run'])
+
         df = pd.read_excel(path)
 
         # Clean column names
@@ -25,14 +70,14 @@ class Command(BaseCommand):
         for index, row in df.iterrows():
             try:
                 contact, created = Contact.objects.update_or_create(
-                    whatsapp_no=self.safe_str(row.get('Whatsapp Mobile Number')),
+                    whatsapp_no=self.safe_phone(row.get('Whatsapp Mobile Number')),
                     defaults={
                         'full_name': self.safe_str(row.get('Full Name')),
                         'sub_cast': self.safe_str(row.get('Subcast')),
                         'address': self.safe_str(row.get('Address')),
                         'area': self.safe_str(row.get('Area')),
                         'zone': self.safe_str(row.get('Zone')),
-                        'alternate_no': self.safe_str(row.get('Alternative Mobile Number')) or None,
+                        'alternate_no': self.safe_phone(row.get('Alternative Mobile Number')) or None,
                         'family_members': int(row.get('Family Members') or 0),
                         'email': self.safe_str(row.get('Email')) or None,
                         'vip': False
@@ -45,3 +90,237 @@ class Command(BaseCommand):
 
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"❌ Error with row {index + 2}: {e}"))
+
+    # -------------------------------
+    # STREAMING IMPORT
+    # -------------------------------
+    # Every imported row leaves an ImportFingerprint (sha256 of its Contact
+    # fields) keyed by the normalized phone (safe_phone). On re-import a row
+    # whose hash matches is skipped without touching the database, so only
+    # changed rows are written. Rows that cannot be tied to exactly one contact (no phone,
+    # the same phone twice with different data, or several existing
+    # contacts sharing it) are reported as conflicts and left alone.
+    def iter_sheet_rows(self, path):
+        """
+        Yield (excel_row_number, {header: value}) from the first sheet
+        without loading the whole workbook into memory.
+        """
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            header = [self.safe_str(col) for col in header]
+            for row_no, values in enumerate(rows, start=2):
+                if not values or all(v is None for v in values):
+                    continue
+                yield row_no, dict(zip(header, values))
+        finally:
+            wb.close()
+
+    def fingerprint(self, fields):
+        """Stable content hash of the Contact fields a row maps to."""
+        parts = [fields['whatsapp_no']] + ['' if fields[name] is None else str(fields[name]) for name in UPDATE_FIELDS]
+        return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+    def row_to_fields(self, row):
+        """Map one sheet row to Contact field values (same rules as the pandas path)."""
+        family = row.get('Family Members')
+        if isinstance(family, float) and math.isnan(family):
+            family = None
+        return {
+            'whatsapp_no': self.safe_phone(row.get('Whatsapp Mobile Number')),
+            'full_name': self.safe_str(row.get('Full Name')),
+            'sub_cast': self.safe_str(row.get('Subcast')),
+            'address': self.safe_str(row.get('Address')),
+            'area': self.safe_str(row.get('Area')),
+            'zone': self.safe_str(row.get('Zone')),
+            'alternate_no': self.safe_phone(row.get('Alternative Mobile Number')) or None,
+            'family_members': int(family or 0),
+            'email': self.safe_str(row.get('Email')) or None,
+            'vip': False,
+        }
+
+    def bulk_update_rows(self, contacts):
+        """
+        Write UPDATE_FIELDS for contacts (matched by pk) with one executemany.
+        QuerySet.bulk_update builds a CASE WHEN per field and row, which costs
+        more Python time than the per-row update_or_create it replaces.
+        """
+        qn = connection.ops.quote_name
+        fields = [Contact._meta.get_field(name) for name in UPDATE_FIELDS + DERIVED_FIELDS]
+        sql = "UPDATE {} SET {} WHERE {} = %s".format(
+            qn(Contact._meta.db_table),
+            ", ".join(f"{qn(f.column)} = %s" for f in fields),
+            qn(Contact._meta.pk.column),
+        )
+        params = [
+            [f.get_db_prep_save(getattr(contact, f.attname), connection) for f in fields] + [contact.pk]
+            for contact in contacts
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+    def classify_chunk(self, chunk):
+        """
+        Sort one chunk of {phone: (row_no, fields, digest)} into
+        (to_create, to_update, unchanged, conflicts, fingerprints).
+
+        to_update holds (contact_id, fields) pairs; fingerprints holds
+        (phone, contact_id or None, digest) for every row that must (re)record
+        its hash. Stored hashes are checked first so unchanged rows cost one
+        indexed lookup; contacts are only loaded for phones never fingerprinted.
+        """
+        to_create, to_update, unchanged, conflicts, fingerprints = [], [], [], [], []
+
+        known = {
+            fp.phone: fp
+            for fp in ImportFingerprint.objects.filter(phone__in=list(chunk)).only('phone', 'contact_id', 'digest')
+        }
+
+        matches = {}
+        unknown = [phone for phone in chunk if phone not in known]
+        if unknown:
+            for contact in Contact.objects.filter(whatsapp_no__in=unknown).order_by('id'):
+                matches.setdefault(contact.whatsapp_no, []).append(contact)
+
+        for phone, (row_no, fields, digest) in chunk.items():
+            fp = known.get(phone)
+            if fp is not None:
+                if fp.digest == digest:
+                    unchanged.append(row_no)
+                else:
+                    to_update.append((fp.contact_id, fields))
+                    fingerprints.append((phone, fp.contact_id, digest))
+                continue
+
+            contacts = matches.get(phone, [])
+            if len(contacts) > 1:
+                conflicts.append((row_no, f"{len(contacts)} contacts already use {phone}"))
+            elif not contacts:
+                to_create.append(fields)
+                fingerprints.append((phone, None, digest))
+            else:
+                # First import of an existing contact: only rewrite it if the sheet differs
+                contact = contacts[0]
+                current = {name: getattr(contact, name) for name in ['whatsapp_no'] + UPDATE_FIELDS}
+                if self.fingerprint(current) == digest:
+                    unchanged.append(row_no)
+                else:
+                    to_update.append((contact.id, fields))
+                fingerprints.append((phone, contact.id, digest))
+
+        return to_create, to_update, unchanged, conflicts, fingerprints
+
+    def write_chunk(self, to_create, to_update, fingerprints):
+        """
+        Apply one classified chunk in a single transaction: bulk insert new
+        contacts, one executemany UPDATE for changed ones, and one upsert
+        of their fingerprints.
+        """
+        with transaction.atomic():
+            created = {}
+            if to_create:
+                new_contacts = [Contact(**fields) for fields in to_create]
+                assign_dimensions(new_contacts)
+                Contact.objects.bulk_create(new_contacts)
+                created = {contact.whatsapp_no: contact.pk for contact in new_contacts}
+                index_contacts(new_contacts)
+            if to_update:
+                changed = [Contact(id=contact_id, **fields) for contact_id, fields in to_update]
+                assign_dimensions(changed)
+                self.bulk_update_rows(changed)
+                # Raw writes skip the post_save signal that normally does these
+                index_contacts(changed)
+                contact_ids = [contact.pk for contact in changed]
+                transaction.on_commit(lambda: invalidate_contacts(*contact_ids))
+            if to_create or to_update:
+                transaction.on_commit(invalidate_facets)
+            if fingerprints:
+                ImportFingerprint.objects.bulk_create(
+                    [
+                        ImportFingerprint(phone=phone, contact_id=contact_id or created[phone], digest=digest)
+                        for phone, contact_id, digest in fingerprints
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['phone'],
+                    update_fields=['contact', 'digest', 'imported_at'],
+                )
+
+    def handle_stream(self, path, chunk_size, dry_run=False):
+        started = time.monotonic()
+        rows_read = created = updated = unchanged = conflicts = errors = 0
+        seen = {}  # phone -> digest of the first row using it
+        chunk = {}
+
+        def report(style, label, row_no, detail):
+            if dry_run:
+                self.stdout.write(style(f"{label:<10} row {row_no}: {detail}"))
+
+        def flush():
+            nonlocal created, updated, unchanged, conflicts, errors
+            try:
+                new, changed, same, clashes, fingerprints = self.classify_chunk(chunk)
+                if not dry_run:
+                    self.write_chunk(new, changed, fingerprints)
+            except Exception as e:
+                errors += len(chunk)
+                self.stdout.write(self.style.ERROR(f"❌ Error writing batch of {len(chunk)} rows: {e}"))
+                chunk.clear()
+                return
+
+            rows = {fields['whatsapp_no']: row_no for row_no, fields, _ in chunk.values()}
+            for fields in new:
+                report(self.style.SUCCESS, "created", rows[fields['whatsapp_no']], fields['full_name'])
+            for _, fields in changed:
+                report(self.style.WARNING, "updated", rows[fields['whatsapp_no']], fields['full_name'])
+            for row_no, reason in clashes:
+                report(self.style.ERROR, "conflict", row_no, reason)
+            created += len(new)
+            updated += len(changed)
+            unchanged += len(same)
+            conflicts += len(clashes)
+            chunk.clear()
+
+        for row_no, row in self.iter_sheet_rows(path):
+            rows_read += 1
+            try:
+                fields = self.row_to_fields(row)
+            except Exception as e:
+                errors += 1
+                self.stdout.write(self.style.ERROR(f"❌ Error with row {row_no}: {e}"))
+                continue
+
+            phone = fields['whatsapp_no']
+            digest = self.fingerprint(fields)
+            if not phone:
+                conflicts += 1
+                report(self.style.ERROR, "conflict", row_no, "no WhatsApp number")
+                continue
+            if phone in seen:
+                if seen[phone] == digest:
+                    unchanged += 1
+                else:
+                    conflicts += 1
+                    report(self.style.ERROR, "conflict", row_no, f"{phone} already used by an earlier row")
+                continue
+            seen[phone] = digest
+
+            chunk[phone] = (row_no, fields, digest)
+            if len(chunk) >= chunk_size:
+                flush()
+
+        if chunk:
+            flush()
+
+        elapsed = time.monotonic() - started
+        rate = rows_read / elapsed if elapsed else 0
+        prefix = "🔍 Dry run:" if dry_run else "✅"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} Streamed {rows_read} rows in {elapsed:.2f}s ({rate:.0f} rows/s): "
+            f"{created} created, {updated} updated, {unchanged} unchanged, "
+            f"{conflicts} conflicts, {errors} errors"
+        ))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hira.statements import import_statement
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconcile UPI payments from bank/UPI statement exports (CSV or XLSX): match credits "
+        "to bookings by reference and amount, flag partial, duplicate and unmatched ones, and "
+        "mark fully paid bookings as paid. Importing a statement again changes nothing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Statement files (.csv or .xlsx)')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be matched without writing')
+
+    def handle(self, *args, **opts):
+        for path in opts['paths']:
+            started = time.monotonic()
+            try:
+                statement, created = import_statement(path, dry_run=opts['dry_run'])
+            except (OSError, ValueError) as e:
+                raise CommandError(f"{path}: {e}")
+            elapsed = time.monotonic() - started
+
+            if not created:
+                self.stdout.write(self.style.WARNING(
+                    f"⚠️  {path}: already imported on {statement.imported_at:%d-%m-%Y %H:%M}, nothing to do"
+                ))
+                continue
+            prefix = "🔍 Dry run:" if opts['dry_run'] else "✅"
+            self.stdout.write(self.style.SUCCESS(
+                f"{prefix} {path}: {statement.credits} credits in {elapsed:.2f}s: "
+                f"{statement.matched} matched, {statement.partial} partial, {statement.duplicate} duplicate, "
+                f"{statement.unmatched} unmatched, {statement.already_seen} already seen; "
+                f"{statement.marked_paid} bookings marked paid"
+            ))
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hira.manifest import prune_removed
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete removed-booking records older than REMOVED_BOOKING_RETENTION_DAYS. "
+        "Gate devices and tablets that last synced before then resync in full. Run it daily."
+    )
+
+    def handle(self, *args, **opts):
+        deleted = prune_removed()
+        days = getattr(settings, "REMOVED_BOOKING_RETENTION_DAYS", 7)
+        self.stdout.write(self.style.SUCCESS(f"✅ Pruned {deleted} removed-booking records older than {days} days"))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hira.models import Contact
+from hira.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text contact search index from the contact table"
+
+    def handle(self, *args, **opts):
+        if not fts_available():
+            raise CommandError("❌ No search index on this database (SQLite only; run migrate first)")
+        started = time.monotonic()
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Indexed {Contact.objects.count()} contacts in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hira.summary import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every event's booking summary from its bookings, report the counters "
+        "that had drifted, and overwrite them (use --dry-run to only report)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        drift = reconcile(fix=not opts['dry_run'])
+        for event_id, counters in sorted(drift.items()):
+            changes = ", ".join(
+                f"{counter} {'missing' if stored is None else stored} → {actual}"
+                for counter, (stored, actual) in counters.items()
+            )
+            self.stdout.write(self.style.WARNING(f"⚠️  Event {event_id}: {changes}"))
+
+        elapsed = time.monotonic() - started
+        if not drift:
+            self.stdout.write(self.style.SUCCESS(f"✅ All event summaries match their bookings ({elapsed:.2f}s)"))
+        elif opts['dry_run']:
+            self.stdout.write(f"{len(drift)} events drifted (dry run, nothing written)")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {len(drift)} drifted event summaries in {elapsed:.2f}s"))
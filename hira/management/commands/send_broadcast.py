@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hira import broadcast as broadcasts
+from hira.models import Broadcast, Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Send an invitation or reminder to every contact by SMS or email. The broadcast "
+        "is stored under NAME with its progress: running the same NAME again resumes "
+        "where it stopped, and --retry-failed re-sends the failed deliveries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Broadcast name (new, or an earlier one to resume)')
+        parser.add_argument('--channel', choices=[c for c, _ in Broadcast.CHANNEL_CHOICES], help='sms or email (new broadcasts)')
+        parser.add_argument('--message', help='Text with {name}, {event}, {date}, {time}, {place} placeholders (new broadcasts)')
+        parser.add_argument('--message-file', help='Read the message from this UTF-8 file instead')
+        parser.add_argument('--subject', default='', help='Email subject (default: the broadcast name)')
+        parser.add_argument('--event', type=int, help='Event filling the {event}/{date}/{time}/{place} placeholders')
+        parser.add_argument('--vip-only', action='store_true', help='Only VIP contacts')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Contacts per checkpoint (default: 200)')
+        parser.add_argument('--workers', type=int, help='Concurrent senders (default: settings.BROADCAST_WORKERS)')
+        parser.add_argument('--retry-failed', action='store_true', help='Re-send the failed deliveries of NAME')
+        parser.add_argument('--dry-run', action='store_true', help='Show the recipient count and first message, send nothing')
+
+    def handle(self, *args, **opts):
+        broadcast = Broadcast.objects.filter(name=opts['name']).select_related('event').first()
+        if broadcast is None:
+            if opts['retry_failed']:
+                raise CommandError(f"❌ No broadcast named {opts['name']!r}")
+            broadcast = self.new_broadcast(opts)
+        elif opts['message'] or opts['message_file']:
+            raise CommandError(f"❌ Broadcast {opts['name']!r} already exists; resume it without --message or pick a new name")
+
+        try:
+            broadcasts.check_message(broadcast)
+        except ValueError as e:
+            raise CommandError(f"❌ {e}")
+
+        if opts['dry_run']:
+            remaining = broadcasts.recipients(broadcast).filter(id__gt=broadcast.last_contact_id)
+            first = remaining.order_by('id').first()
+            self.stdout.write(f"{remaining.count()} recipients left for {broadcast}")
+            if first:
+                self.stdout.write(broadcasts.render(broadcast, first.full_name))
+            if broadcast.pk is None:
+                self.stdout.write("(dry run: broadcast not saved)")
+            return
+
+        if broadcast.pk is None:
+            broadcast.save()
+        elif broadcast.last_contact_id and not opts['retry_failed']:
+            self.stdout.write(f"↻ Resuming {broadcast} after contact {broadcast.last_contact_id}")
+
+        started = time.monotonic()
+
+        def progress(last_id, sent, failed):
+            self.stdout.write(f"  … up to #{last_id}: {sent} sent, {failed} failed")
+
+        send = broadcasts.retry_failed if opts['retry_failed'] else broadcasts.run
+        counts = send(broadcast, chunk_size=opts['chunk_size'], workers=opts['workers'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {broadcast}: {counts['sent']} sent, {counts['failed']} failed, "
+            f"{counts['queued']} queued in {time.monotonic() - started:.1f}s"
+        ))
+
+    def new_broadcast(self, opts):
+        if not opts['channel']:
+            raise CommandError("❌ --channel is required for a new broadcast")
+        message = opts['message']
+        if opts['message_file']:
+            with open(opts['message_file'], encoding='utf-8') as f:
+                message = f.read()
+        if not message:
+            raise CommandError("❌ --message or --message-file is required for a new broadcast")
+        event = None
+        if opts['event'] is not None:
+            event = Event.objects.filter(pk=opts['event']).first()
+            if event is None:
+                raise CommandError(f"❌ No event with id {opts['event']}")
+        return Broadcast(
+            name=opts['name'], channel=opts['channel'], message=message, subject=opts['subject'],
+            event=event, vip_only=opts['vip_only'],
+        )
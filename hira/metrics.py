@@ -0,0 +1,225 @@
+"""
+Per-view cost metrics: SQL query count, DB time, template render time and
+total latency for every request, grouped by URL name.
+
+Opt-in: ViewMetricsMiddleware does nothing unless settings.VIEW_METRICS_ENABLE
+is set. Numbers are kept in fixed-bucket histograms in process memory (each
+gunicorn worker has its own) and served as JSON by view_metrics_view.
+query_budget() is the test-side helper for asserting a view's query count.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+# Upper bucket bounds; the last bucket is open-ended
+MS_BOUNDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+COUNT_BOUNDS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current = contextvars.ContextVar("hira_view_metrics", default=None)
+
+
+# -------------------------------
+# HISTOGRAMS
+# -------------------------------
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th value (max for the open bucket)."""
+        if not self.count:
+            return 0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else 0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": round(self.max, 2),
+            "buckets": dict(zip([*map(str, self.bounds), "inf"], self.buckets)),
+        }
+
+
+class ViewStats:
+    def __init__(self):
+        self.queries = Histogram(COUNT_BOUNDS)
+        self.db_ms = Histogram(MS_BOUNDS)
+        self.template_ms = Histogram(MS_BOUNDS)
+        self.total_ms = Histogram(MS_BOUNDS)
+
+    def as_dict(self):
+        return {name: hist.as_dict() for name, hist in vars(self).items()}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self.started = time.time()
+
+    def record(self, view_name, sample):
+        with self._lock:
+            stats = self._views.get(view_name)
+            if stats is None:
+                stats = self._views[view_name] = ViewStats()
+            stats.queries.add(sample.queries)
+            stats.db_ms.add(sample.db_ms)
+            stats.template_ms.add(sample.template_ms)
+            stats.total_ms.add(sample.total_ms)
+
+    def snapshot(self):
+        with self._lock:
+            views = {name: stats.as_dict() for name, stats in sorted(self._views.items())}
+        return {"since": int(self.started), "views": views}
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self.started = time.time()
+
+
+registry = MetricsRegistry()
+
+
+# -------------------------------
+# PER-REQUEST SAMPLE
+# -------------------------------
+class Sample:
+    __slots__ = ("queries", "db_ms", "template_ms", "total_ms", "sql")
+
+    def __init__(self, keep_sql=False):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self.sql = [] if keep_sql else None
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - started) * 1000
+            if self.sql is not None:
+                self.sql.append(sql)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend that adds render time to the current request's sample."""
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        sample = _current.get()
+        if sample is None:
+            return self._template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self._template.render(context, request)
+        finally:
+            sample.template_ms += (time.perf_counter() - started) * 1000
+
+
+# -------------------------------
+# MIDDLEWARE
+# -------------------------------
+class ViewMetricsMiddleware:
+    """
+    Records one Sample per request under its URL name ("admin:index",
+    "home", ...). Place it first so total latency covers other middleware.
+    Views over their VIEW_QUERY_BUDGETS entry are logged as warnings.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "VIEW_METRICS_ENABLE", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.budgets = getattr(settings, "VIEW_QUERY_BUDGETS", {})
+
+    def __call__(self, request):
+        sample = Sample()
+        token = _current.set(sample)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(sample):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        sample.total_ms = (time.perf_counter() - started) * 1000
+
+        match = request.resolver_match
+        view_name = match.view_name if match else "<unresolved>"
+        registry.record(view_name, sample)
+
+        budget = self.budgets.get(view_name)
+        if budget is not None and sample.queries > budget:
+            logger.warning("%s made %d queries (budget %d)", view_name, sample.queries, budget)
+        return response
+
+
+# -------------------------------
+# TEST HELPER
+# -------------------------------
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries, label="block"):
+    """
+    Fail if the block runs more than max_queries SQL statements:
+
+        with query_budget(1, "home"):
+            client.get("/")
+
+    Yields the Sample, so the caller can also inspect .queries and .sql.
+    """
+    sample = Sample(keep_sql=True)
+    with connection.execute_wrapper(sample):
+        yield sample
+    if sample.queries > max_queries:
+        listing = "\n".join(f"  {i}. {sql}" for i, sql in enumerate(sample.sql, 1))
+        raise QueryBudgetExceeded(
+            f"{label} made {sample.queries} queries, budget is {max_queries}:\n{listing}"
+        )
@@ -0,0 +1,18 @@
+from django.utils.functional import SimpleLazyObject
+
+from .contacts import session_contact
+
+
+class ContactMiddleware:
+    """
+    Sets request.contact to the logged-in Contact, loaded lazily and at most
+    once per request (usually from the cache). Falsy when nobody is logged in.
+    Must come after SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.contact = SimpleLazyObject(lambda: session_contact(request))
+        return self.get_response(request)
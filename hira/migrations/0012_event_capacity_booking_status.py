@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-16 20:55
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def count_booked_seats(apps, schema_editor):
+    """Existing bookings are all confirmed: start each event's counter at their headcount."""
+    Event = apps.get_model('hira', 'Event')
+    Booking = apps.get_model('hira', 'Booking')
+    totals = Booking.objects.values('event_id').annotate(seats=Sum('num_people'))
+    for row in totals:
+        Event.objects.filter(pk=row['event_id']).update(seats_booked=row['seats'] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hira', '0011_phoneotp_delivery_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='status',
+            field=models.CharField(choices=[('confirmed', 'Confirmed'), ('waitlisted', 'Waitlisted'), ('cancelled', 'Cancelled')], default='confirmed', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='seats_booked',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['event', 'status', 'created_at'], name='booking_event_status_idx'),
+        ),
+        migrations.RunPython(count_booked_seats, migrations.RunPython.noop),
+    ]
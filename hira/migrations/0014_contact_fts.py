@@ -0,0 +1,38 @@
+# Full-text index for contact search (hira/search.py). SQLite only: on other
+# databases this is a no-op and the admin keeps its icontains search.
+
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS hira_contact_fts USING fts5(
+            full_name, phones, email, area, zone,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    schema_editor.execute("""
+        INSERT INTO hira_contact_fts (rowid, full_name, phones, email, area, zone)
+        SELECT id, full_name, COALESCE(whatsapp_no, '') || ' ' || COALESCE(alternate_no, ''),
+               COALESCE(email, ''), area, zone
+        FROM hira_contact
+    """)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS hira_contact_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hira', '0013_booking_checked_in_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
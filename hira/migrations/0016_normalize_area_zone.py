@@ -0,0 +1,81 @@
+# Point every contact at a canonical Area/Zone, in batches of BATCH contacts.
+# The free-text area/zone columns are left as entered; the canonical
+# spelling lives only on Area.name / Zone.name.
+
+from django.db import migrations
+
+BATCH = 2000
+
+
+def normalize(value):
+    # Frozen copy of hira.facets.normalize
+    name = " ".join((value or "").split())
+    if not name or name.lower() == "nan":
+        return None, ""
+    if name.isupper() or name.islower():
+        name = name.title()
+    return name.casefold(), name
+
+
+def lookup(model, wanted):
+    rows = {row.key: row for row in model.objects.filter(key__in=wanted)}
+    missing = [model(key=key, name=name) for key, name in wanted.items() if key not in rows]
+    if missing:
+        model.objects.bulk_create(missing)
+        rows.update((row.key, row) for row in model.objects.filter(key__in=[m.key for m in missing]))
+    return rows
+
+
+def forwards(apps, schema_editor):
+    Contact = apps.get_model('hira', 'Contact')
+    Area = apps.get_model('hira', 'Area')
+    Zone = apps.get_model('hira', 'Zone')
+    connection = schema_editor.connection
+    qn = connection.ops.quote_name
+    sql = "UPDATE {} SET {} = %s, {} = %s WHERE {} = %s".format(
+        qn(Contact._meta.db_table), qn('area_ref_id'), qn('zone_ref_id'), qn('id')
+    )
+
+    last_id = 0
+    while True:
+        batch = list(
+            Contact.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'area', 'zone')[:BATCH]
+        )
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        areas, zones = {}, {}
+        for _, area, zone in batch:
+            for value, wanted in ((area, areas), (zone, zones)):
+                key, name = normalize(value)
+                if key:
+                    wanted.setdefault(key, name)
+        area_rows, zone_rows = lookup(Area, areas), lookup(Zone, zones)
+
+        params = []
+        for pk, area, zone in batch:
+            a = area_rows.get(normalize(area)[0])
+            z = zone_rows.get(normalize(zone)[0])
+            params.append([a.id if a else None, z.id if z else None, pk])
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+
+
+def backwards(apps, schema_editor):
+    # Text was never touched, so dropping the links restores the 0015 state
+    Contact = apps.get_model('hira', 'Contact')
+    Contact.objects.update(area_ref=None, zone_ref=None)
+    apps.get_model('hira', 'Area').objects.all().delete()
+    apps.get_model('hira', 'Zone').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hira', '0015_area_zone'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
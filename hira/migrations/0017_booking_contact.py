@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-16 21:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hira', '0016_normalize_area_zone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='contact',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='hira.contact'),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='whatsapp_no',
+            field=models.CharField(blank=True, db_index=True, max_length=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['contact', 'event'], name='booking_contact_event_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'cancelled'), _negated=True), fields=('contact', 'event'), name='booking_one_active_per_contact'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+
+# Frozen copy of hira.summary.COUNTERS at the time of this migration
+COUNTERS = {
+    "bookings": ({"status": "confirmed"}, 1),
+    "people": ({"status": "confirmed"}, "num_people"),
+    "amount": ({"status": "confirmed"}, "total_amount"),
+    "paid_bookings": ({"status": "confirmed", "is_paid": True}, 1),
+    "paid_people": ({"status": "confirmed", "is_paid": True}, "num_people"),
+    "paid_amount": ({"status": "confirmed", "is_paid": True}, "total_amount"),
+    "vip_bookings": ({"status": "confirmed", "is_vip": True}, 1),
+    "vip_people": ({"status": "confirmed", "is_vip": True}, "num_people"),
+    "waitlisted_bookings": ({"status": "waitlisted"}, 1),
+    "waitlisted_people": ({"status": "waitlisted"}, "num_people"),
+    "cancelled_bookings": ({"status": "cancelled"}, 1),
+}
+
+
+def build_summaries(apps, schema_editor):
+    """One summary row per event, totalled from its bookings in a single GROUP BY."""
+    Event = apps.get_model('hira', 'Event')
+    Booking = apps.get_model('hira', 'Booking')
+    EventSummary = apps.get_model('hira', 'EventSummary')
+    aggregates = {
+        counter: Sum(Case(
+            When(Q(**condition), then=Value(1) if value == 1 else F(value)),
+            default=Value(0), output_field=IntegerField(),
+        ))
+        for counter, (condition, value) in COUNTERS.items()
+    }
+    totals = {
+        row.pop('event_id'): row
+        for row in Booking.objects.order_by().values('event_id').annotate(**aggregates)
+    }
+    EventSummary.objects.bulk_create([
+        EventSummary(event_id=pk, **{k: v or 0 for k, v in totals.get(pk, {}).items()})
+        for pk in Event.objects.values_list('id', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hira', '0021_admin_changelist_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSummary',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='hira.event')),
+                ('bookings', models.IntegerField(default=0)),
+                ('people', models.IntegerField(default=0)),
+                ('amount', models.BigIntegerField(default=0)),
+                ('paid_bookings', models.IntegerField(default=0)),
+                ('paid_people', models.IntegerField(default=0)),
+                ('paid_amount', models.BigIntegerField(default=0)),
+                ('vip_bookings', models.IntegerField(default=0)),
+                ('vip_people', models.IntegerField(default=0)),
+                ('waitlisted_bookings', models.IntegerField(default=0)),
+                ('waitlisted_people', models.IntegerField(default=0)),
+                ('cancelled_bookings', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-16 22:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hira', '0022_eventsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('imported_at', models.DateTimeField(auto_now_add=True)),
+                ('credits', models.PositiveIntegerField(default=0)),
+                ('already_seen', models.PositiveIntegerField(default=0)),
+                ('matched', models.PositiveIntegerField(default=0)),
+                ('partial', models.PositiveIntegerField(default=0)),
+                ('duplicate', models.PositiveIntegerField(default=0)),
+                ('unmatched', models.PositiveIntegerField(default=0)),
+                ('marked_paid', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatementTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('txn_key', models.CharField(max_length=64, unique=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('paid_on', models.DateField(blank=True, null=True)),
+                ('reference', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('matched', 'Matched'), ('partial', 'Partial'), ('duplicate', 'Duplicate'), ('unmatched', 'Unmatched')], max_length=10)),
+                ('detail', models.CharField(blank=True, max_length=255)),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payments', to='hira.booking')),
+                ('statement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='hira.paymentstatement')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['statement', 'status'], name='statement_txn_status_idx')],
+            },
+        ),
+    ]
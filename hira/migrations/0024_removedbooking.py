@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-16 23:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hira', '0023_payment_statements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RemovedBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_id', models.PositiveIntegerField()),
+                ('removed_at', models.DateTimeField(auto_now_add=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='removed_bookings', to='hira.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'removed_at'], name='removed_booking_event_idx')],
+            },
+        ),
+    ]
@@ -2,6 +2,31 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 import hashlib
+from .db import atomic_retry
+
+
+class Zone(models.Model):
+    """Canonical zone name; `key` (case-folded, single-spaced) merges spelling variants."""
+    name = models.CharField(max_length=50)
+    key = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
+class Area(models.Model):
+    """Canonical area name; see Zone."""
+    name = models.CharField(max_length=50)
+    key = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
 
 
 class Contact(models.Model):
@@ -10,16 +35,45 @@ class Contact(models.Model):
     address = models.TextField()
     area = models.CharField(max_length=50)
     zone = models.CharField(max_length=50)
-    whatsapp_no = models.CharField(max_length=10, unique=False, blank=True, null=True)
+    # Set from area/zone on save and import (hira/facets.py); used for filtering
+    area_ref = models.ForeignKey(Area, on_delete=models.PROTECT, null=True, blank=True, related_name="contacts", verbose_name="area (normalized)")
+    zone_ref = models.ForeignKey(Zone, on_delete=models.PROTECT, null=True, blank=True, related_name="contacts", verbose_name="zone (normalized)")
+    whatsapp_no = models.CharField(max_length=10, unique=False, blank=True, null=True, db_index=True)
     alternate_no = models.CharField(max_length=10,unique=False, blank=True, null=True)
     family_members = models.IntegerField(default=0)
     email = models.EmailField(unique=False, blank=True, null=True)
     vip = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Admin changelist order (full_name, then newest first); see hira/changelist.py
+            models.Index(fields=["full_name", "-id"], name="contact_name_idx"),
+        ]
+
+    def save(self, *args, update_fields=None, **kwargs):
+        # The pre_save hook re-derives area_ref/zone_ref from area/zone; save them with it
+        if update_fields is not None and {"area", "zone"} & set(update_fields):
+            update_fields = {*update_fields, "area_ref", "zone_ref"}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
     def __str__(self):
         return f"{self.full_name} ({self.whatsapp_no})"
 
 
+class ImportFingerprint(models.Model):
+    """
+    Content hash of the sheet row a Contact was last imported from,
+    keyed by the normalized phone. Lets import_excel skip unchanged rows.
+    """
+    phone = models.CharField(max_length=15, unique=True)
+    contact = models.ForeignKey(Contact, on_delete=models.CASCADE, related_name="import_fingerprints")
+    digest = models.CharField(max_length=64)
+    imported_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.phone} -> {self.digest[:12]}"
+
+
 
 
 
@@ -31,11 +85,27 @@ class Event(models.Model):
     admin_name = models.CharField(max_length=100)
     admin_phone = models.CharField(max_length=15)
 
+    # Seats are people, not bookings. Leave capacity empty for no limit.
+    # seats_booked is only changed through hira.bookings (conditional F() updates).
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    seats_booked = models.PositiveIntegerField(default=0)
+
     def __str__(self):
         return f"{self.title} on {self.date} at {self.time}"
 
+    @property
+    def seats_left(self):
+        if self.capacity is None:
+            return None
+        return max(0, self.capacity - self.seats_booked)
+
 
 class Booking(models.Model):
+    CONFIRMED = "confirmed"
+    WAITLISTED = "waitlisted"
+    CANCELLED = "cancelled"
+    STATUS_CHOICES = [(CONFIRMED, "Confirmed"), (WAITLISTED, "Waitlisted"), (CANCELLED, "Cancelled")]
+
     name = models.CharField(max_length=100)
     phone = models.CharField(max_length=15)
     num_people = models.PositiveIntegerField()
@@ -46,15 +116,147 @@ class Booking(models.Model):
 
     # Relationship with event (1 event = many bookings)
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="bookings")
+    # name/phone stay as a snapshot; old rows are linked by backfill_booking_contacts
+    contact = models.ForeignKey(
+        Contact, on_delete=models.SET_NULL, null=True, blank=True, related_name="bookings",
+        db_index=False,  # covered by booking_contact_event_idx
+    )
     upi_token = models.CharField(max_length=50, blank=True, null=True, unique=True)
+    # Per-form token from the booking page; a resubmitted form finds its booking by it
+    idempotency_key = models.CharField(max_length=64, blank=True, null=True, unique=True, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=CONFIRMED)
+    checked_in_at = models.DateTimeField(null=True, blank=True)  # set by the gate scanner (hira.tickets)
+    # Drives the check-in sync API (hira/api.py); QuerySet.update() callers must set it too
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # FIFO waitlist scan per event
+            models.Index(fields=["event", "status", "created_at"], name="booking_event_status_idx"),
+            # "my bookings" and duplicate checks
+            models.Index(fields=["contact", "event"], name="booking_contact_event_idx"),
+            # Check-in API: keyset pages and change feed per event
+            models.Index(fields=["event", "created_at", "id"], name="booking_event_created_idx"),
+            models.Index(fields=["event", "updated_at", "id"], name="booking_event_updated_idx"),
+            # Admin changelist, all events: newest first, keyset-paged (hira/changelist.py)
+            models.Index(fields=["created_at", "id"], name="booking_created_idx"),
+        ]
+        constraints = [
+            # One live (confirmed or waitlisted) booking per contact and event
+            models.UniqueConstraint(
+                fields=["contact", "event"],
+                condition=~models.Q(status="cancelled"),
+                name="booking_one_active_per_contact",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.phone}) - {self.num_people} people"
     
 
 
+class RemovedBooking(models.Model):
+    """
+    A booking deleted from, or moved out of, an event. Deltas cannot see a
+    row that is gone, so the check-in change feed (hira/api.py) and gate
+    manifest deltas (hira/manifest.py) report these as removals.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="removed_bookings")
+    booking_id = models.PositiveIntegerField()  # the row may no longer exist: not a foreign key
+    removed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["event", "removed_at"], name="removed_booking_event_idx"),
+        ]
+
+    def __str__(self):
+        return f"Booking #{self.booking_id} removed from event {self.event_id}"
+
+
  
+class EventSummary(models.Model):
+    """
+    Booking totals of one event, moved by F() deltas on every booking write
+    (hira/summary.py). Confirmed bookings only unless the name says otherwise;
+    rebuilt by manage.py reconcile_event_summaries.
+    """
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name="summary")
+    bookings = models.IntegerField(default=0)
+    people = models.IntegerField(default=0)
+    amount = models.BigIntegerField(default=0)
+    paid_bookings = models.IntegerField(default=0)
+    paid_people = models.IntegerField(default=0)
+    paid_amount = models.BigIntegerField(default=0)
+    vip_bookings = models.IntegerField(default=0)
+    vip_people = models.IntegerField(default=0)
+    waitlisted_bookings = models.IntegerField(default=0)
+    waitlisted_people = models.IntegerField(default=0)
+    cancelled_bookings = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def unpaid_amount(self):
+        return self.amount - self.paid_amount
+
+    def __str__(self):
+        return f"{self.event}: {self.people} people, ₹{self.amount}"
+
+
+class PaymentStatement(models.Model):
+    """
+    A bank/UPI statement file imported by hira.statements. The file digest
+    makes importing the same file twice a no-op; counts are of the
+    transactions this import recorded.
+    """
+    name = models.CharField(max_length=255)
+    digest = models.CharField(max_length=64, unique=True)  # sha256 of the file
+    imported_at = models.DateTimeField(auto_now_add=True)
+    credits = models.PositiveIntegerField(default=0)        # credit rows read
+    already_seen = models.PositiveIntegerField(default=0)   # recorded by an earlier statement
+    matched = models.PositiveIntegerField(default=0)
+    partial = models.PositiveIntegerField(default=0)
+    duplicate = models.PositiveIntegerField(default=0)
+    unmatched = models.PositiveIntegerField(default=0)
+    marked_paid = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} ({self.imported_at:%d-%m-%Y %H:%M})"
+
+
+class StatementTransaction(models.Model):
+    """One credit from a statement, matched to a booking by its reference and amount."""
+    MATCHED = "matched"
+    PARTIAL = "partial"
+    DUPLICATE = "duplicate"
+    UNMATCHED = "unmatched"
+    STATUS_CHOICES = [(MATCHED, "Matched"), (PARTIAL, "Partial"), (DUPLICATE, "Duplicate"), (UNMATCHED, "Unmatched")]
+
+    statement = models.ForeignKey(PaymentStatement, on_delete=models.CASCADE, related_name="transactions")
+    # UTR / bank reference, or a content hash when the statement has none; never recorded twice
+    txn_key = models.CharField(max_length=64, unique=True)
+    booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name="payments")
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    paid_on = models.DateField(null=True, blank=True)
+    reference = models.CharField(max_length=255, blank=True)  # narration / note as in the statement
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    detail = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["statement", "status"], name="statement_txn_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.txn_key}: ₹{self.amount} ({self.status})"
+
+
 class PhoneOTP(models.Model):
+    QUEUED = "queued"
+    SENT = "sent"
+    FAILED = "failed"
+    DELIVERY_CHOICES = [(QUEUED, "Queued"), (SENT, "Sent"), (FAILED, "Failed")]
+
     contact = models.ForeignKey(Contact, on_delete=models.CASCADE, related_name="phone_otps", null=True, blank=True)
     hashed_otp = models.CharField(max_length=128)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -62,6 +264,10 @@ class PhoneOTP(models.Model):
     attempts = models.PositiveSmallIntegerField(default=0)
     used = models.BooleanField(default=False)
 
+    # Filled in by the background SMS dispatcher (hira.sms)
+    delivery_status = models.CharField(max_length=10, choices=DELIVERY_CHOICES, default=QUEUED)
+    delivery_detail = models.CharField(max_length=255, blank=True)
+
     def is_expired(self):
         """Check if OTP is expired."""
         return timezone.now() > self.expires_at
@@ -73,10 +279,61 @@ class PhoneOTP(models.Model):
     def mark_used(self):
         """Mark the OTP as used."""
         self.used = True
-        self.save(update_fields=["used"])
+        atomic_retry(self.save)(update_fields=["used"])
 
     def __str__(self):
         return f"OTP for {self.contact.full_name} ({self.contact.whatsapp_no})"
+
+
+class Broadcast(models.Model):
+    """
+    One invitation or reminder sent to every matching Contact over one
+    channel (manage.py send_broadcast). `last_contact_id` is the resume
+    checkpoint: contacts up to it have a recorded delivery.
+    """
+    SMS = "sms"
+    EMAIL = "email"
+    CHANNEL_CHOICES = [(SMS, "SMS"), (EMAIL, "Email")]
+
+    name = models.CharField(max_length=100, unique=True)
+    channel = models.CharField(max_length=5, choices=CHANNEL_CHOICES)
+    event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True, related_name="broadcasts")
+    subject = models.CharField(max_length=200, blank=True)  # email only
+    # Placeholders: {name}, {event}, {date}, {time}, {place}
+    message = models.TextField()
+    vip_only = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_contact_id = models.PositiveBigIntegerField(default=0, editable=False)
+    finished_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_channel_display()})"
+
+
+class BroadcastDelivery(models.Model):
+    QUEUED = "queued"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [(QUEUED, "Queued"), (SENT, "Sent"), (FAILED, "Failed")]
+
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name="deliveries")
+    contact = models.ForeignKey(Contact, on_delete=models.CASCADE, related_name="broadcast_deliveries")
+    address = models.CharField(max_length=254)  # phone or email at send time
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    detail = models.CharField(max_length=255, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "broadcast deliveries"
+        constraints = [
+            models.UniqueConstraint(fields=["broadcast", "contact"], name="broadcast_delivery_once"),
+        ]
+        indexes = [
+            models.Index(fields=["broadcast", "status", "id"], name="broadcast_delivery_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.broadcast.name} -> {self.address}: {self.status}"
     
 
 
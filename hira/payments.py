@@ -0,0 +1,184 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+
+import qrcode
+
+
+CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+# qrcode.QRCode options; part of the cache key, so changing them re-renders
+QR_OPTIONS = {"box_size": 8, "border": 2}
+
+
+# -------------------------------
+# UPI DEEP LINK
+# -------------------------------
+def payment_reference(booking_id):
+    """
+    Booking reference put in the UPI note. Bank statements usually carry only
+    the note in their narration, so hira.statements matches payments on it.
+    """
+    return f"{getattr(settings, 'UPI_REFERENCE_PREFIX', 'HP')}{booking_id}"
+
+
+def build_upi_url(booking, upi_id):
+    """UPI deep link for a booking; tid/tr and the note carry the booking id for reconciliation."""
+    note = quote(f"{payment_reference(booking.id)} Booking for {booking.num_people} people")
+    return (
+        f"upi://pay?pa={upi_id}&pn=Hirapura%20Event"
+        f"&mc=0000&tid={booking.id}&tr={booking.id}"
+        f"&tn={note}"
+        f"&am={booking.total_amount}&cu=INR"
+    )
+
+
+def qr_etag(payload, fmt):
+    """Content hash of a rendered QR: same payload, format and QR_OPTIONS, same bytes."""
+    options = ",".join(f"{name}={value}" for name, value in sorted(QR_OPTIONS.items()))
+    return hashlib.sha256(f"{fmt}\n{options}\n{payload}".encode()).hexdigest()[:32]
+
+
+# -------------------------------
+# RENDER CACHE
+# -------------------------------
+class QRCache:
+    """
+    Rendered QR images keyed by content hash: a byte-bounded in-process LRU
+    in front of a size-bounded directory shared by all workers.
+    """
+
+    def __init__(self, directory, memory_bytes, disk_bytes):
+        self.directory = Path(directory)
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._lru = OrderedDict()
+        self._size = 0
+        self._disk_size = None  # estimated; rescanned when over budget
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._lru.get(key)
+            if data is not None:
+                self._lru.move_to_end(key)
+                return data
+        try:
+            data = (self.directory / key).read_bytes()
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        self._remember(key, data)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, self.directory / key)
+            if self._disk_size is None:
+                self._disk_size = self._scan_disk()[0]
+            else:
+                self._disk_size += len(data)
+            if self._disk_size > self.disk_bytes:
+                self._trim_disk()
+        except OSError:
+            pass  # the disk tier is an optimisation only
+
+    def _remember(self, key, data):
+        with self._lock:
+            if key in self._lru:
+                return
+            self._lru[key] = data
+            self._size += len(data)
+            while self._size > self.memory_bytes and len(self._lru) > 1:
+                _, old = self._lru.popitem(last=False)
+                self._size -= len(old)
+
+    def _scan_disk(self):
+        files = [(f.stat(), f) for f in self.directory.iterdir() if f.is_file() and not f.name.startswith(".")]
+        return sum(st.st_size for st, _ in files), files
+
+    def _trim_disk(self):
+        """Delete least recently written files until the directory fits its budget."""
+        total, files = self._scan_disk()
+        for st, f in sorted(files, key=lambda item: item[0].st_mtime):
+            if total <= self.disk_bytes:
+                break
+            try:
+                f.unlink()
+                total -= st.st_size
+            except OSError:
+                pass
+        self._disk_size = total
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_qr_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QRCache(
+                    getattr(settings, "UPI_QR_CACHE_DIR", settings.BASE_DIR / "cache" / "upi_qr"),
+                    memory_bytes=getattr(settings, "UPI_QR_CACHE_MEMORY_BYTES", 4 * 1024 * 1024),
+                    disk_bytes=getattr(settings, "UPI_QR_CACHE_DISK_BYTES", 64 * 1024 * 1024),
+                )
+    return _cache
+
+
+def _svg(matrix):
+    """
+    Minimal SVG: one path of horizontal runs in module units. Much smaller
+    and faster than qrcode's SvgPathImage, and needs no Pillow.
+    """
+    size = len(matrix)
+    runs = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if row[x]:
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                runs.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+            else:
+                x += 1
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/><path d="{"".join(runs)}"/></svg>'
+    ).encode()
+
+
+def render_qr(payload, fmt):
+    """PNG (Pillow) or SVG (plain text, cheaper to produce) bytes for a QR code."""
+    qr = qrcode.QRCode(**QR_OPTIONS)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    if fmt == "svg":
+        return _svg(qr.get_matrix())
+    buffer = BytesIO()
+    qr.make_image().save(buffer)
+    return buffer.getvalue()
+
+
+def cached_qr(payload, fmt):
+    """(etag, bytes) for a QR, rendered at most once per content hash."""
+    key = qr_etag(payload, fmt)
+    cache = get_qr_cache()
+    data = cache.get(key)
+    if data is None:
+        data = render_qr(payload, fmt)
+        cache.put(key, data)
+    return key, data
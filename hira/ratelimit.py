@@ -0,0 +1,209 @@
+"""
+Token-bucket rate limiting shared by every worker process.
+
+Buckets live in a small SQLite file (settings.RATELIMIT_DB) rather than in
+the per-process LocMemCache, so N gunicorn workers enforce one limit, not N.
+Each check is a single UPSERT on the bucket's primary key: it refills the
+bucket for the elapsed time and takes a token only if one is available,
+so concurrent checks cannot both pass on the last token.
+"""
+import os
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    key    TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    ts     REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+# Refill for elapsed time, then take one token; the WHERE makes the UPDATE
+# (and so the RETURNING row) disappear when the bucket is empty.
+_TAKE = """
+INSERT INTO buckets (key, tokens, ts) VALUES (:key, :capacity - 1, :now)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = MIN(:capacity, tokens + (:now - ts) * :rate) - 1,
+    ts = :now
+WHERE MIN(:capacity, tokens + (:now - ts) * :rate) >= 1
+RETURNING tokens
+"""
+
+_PEEK = "SELECT tokens, ts FROM buckets WHERE key = ?"
+
+
+@dataclass(frozen=True)
+class Rate:
+    """`limit` events per `period` seconds, e.g. Rate.parse("5/h")."""
+    limit: int
+    period: float
+
+    UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+    @classmethod
+    def parse(cls, value):
+        if isinstance(value, Rate):
+            return value
+        count, _, unit = str(value).partition("/")
+        unit = unit or "s"
+        multiplier = int(unit[:-1]) if unit[:-1] else 1
+        return cls(int(count), multiplier * cls.UNITS[unit[-1]])
+
+    @property
+    def per_second(self):
+        return self.limit / self.period
+
+
+@dataclass(frozen=True)
+class Result:
+    allowed: bool
+    remaining: int
+    retry_after: int  # seconds until the next token (0 when allowed)
+    key: str = ""
+
+
+def _refilled(tokens, ts, rate, now):
+    return min(rate.limit, tokens + (now - ts) * rate.per_second)
+
+
+def _wait(tokens, rate):
+    return int((1 - tokens) / rate.per_second) + 1
+
+
+class SQLiteBucketStore:
+    """Token buckets in one SQLite file, one connection per thread and process."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, checks, now=None):
+        """
+        Atomically take one token from every (key, Rate) in `checks`.
+        Either all buckets are charged or none are. Returns a Result for
+        the first bucket that refused, else for the last one checked.
+        """
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = None
+            for key, rate in checks:
+                row = conn.execute(
+                    _TAKE, {"key": key, "capacity": rate.limit, "rate": rate.per_second, "now": now}
+                ).fetchone()
+                if row is None:
+                    tokens, ts = conn.execute(_PEEK, (key,)).fetchone()
+                    result = Result(False, 0, _wait(_refilled(tokens, ts, rate, now), rate), key)
+                    break
+                result = Result(True, int(row[0]), 0, key)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("ROLLBACK" if result is not None and not result.allowed else "COMMIT")
+
+        if random.random() < 0.001:
+            self.purge(now)
+        return result
+
+    def peek(self, key, rate, now=None):
+        """Current state of a bucket without taking a token."""
+        now = time.time() if now is None else now
+        row = self._connection().execute(_PEEK, (key,)).fetchone()
+        if row is None:
+            return Result(True, rate.limit, 0, key)
+        tokens = _refilled(row[0], row[1], rate, now)
+        if tokens >= 1:
+            return Result(True, int(tokens), 0, key)
+        return Result(False, 0, _wait(tokens, rate), key)
+
+    def reset(self, key):
+        self._connection().execute("DELETE FROM buckets WHERE key = ?", (key,))
+
+    def purge(self, now=None, max_idle=86400):
+        """Drop buckets idle for a day; any bucket is full again by then."""
+        now = time.time() if now is None else now
+        self._connection().execute("DELETE FROM buckets WHERE ts < ?", (now - max_idle,))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The store for settings.RATELIMIT_DB, reopened if the setting changes (tests override it)."""
+    global _store
+    path = str(getattr(settings, "RATELIMIT_DB", settings.BASE_DIR / "ratelimit.sqlite3"))
+    if _store is None or _store.path != path:
+        with _store_lock:
+            if _store is None or _store.path != path:
+                _store = SQLiteBucketStore(path)
+    return _store
+
+
+# -------------------------------
+# PUBLIC API
+# -------------------------------
+def hit(*checks):
+    """
+    Take a token from each (key, rate) pair, all or nothing.
+    `rate` is a Rate or a string like "5/h", "1/60s", "30/m".
+    """
+    return get_store().take([(key, Rate.parse(rate)) for key, rate in checks])
+
+
+def peek(key, rate):
+    return get_store().peek(key, Rate.parse(rate))
+
+
+def client_ip(request):
+    """Client address; behind the Heroku router that is the last X-Forwarded-For hop (earlier ones are client-supplied)."""
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    if forwarded:
+        return forwarded.split(",")[-1].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def ratelimit(name, rate, key=client_ip, methods=("POST",)):
+    """
+    View decorator: allow `rate` requests per `key(request)` for the
+    given methods and answer 429 with Retry-After once it is used up.
+
+        @ratelimit("login", "30/m")
+        def login_view(request): ...
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods and getattr(settings, "RATELIMIT_ENABLE", True):
+                result = hit((f"{name}:{key(request)}", rate))
+                if not result.allowed:
+                    response = HttpResponse(
+                        f"Too many requests. Please try again in {result.retry_after} seconds.",
+                        status=429,
+                    )
+                    response["Retry-After"] = str(result.retry_after)
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,108 @@
+"""
+Full-text contact search on an SQLite FTS5 table.
+
+hira_contact_fts holds one row per Contact (rowid = contact id) with its
+name, phones, email, area and zone. The unicode61 tokenizer splits Gujarati
+and Latin text alike, so "રમે" or "ram" prefix-match names in either script.
+The index is kept current by Contact signals and by import_excel's bulk
+writes; rebuild_search_index repairs it. On other databases, or before the
+migration has run, search_contact_ids() returns None and callers fall back.
+"""
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = "hira_contact_fts"
+
+CREATE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    full_name, phones, email, area, zone,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+_REBUILD_SQL = f"""
+INSERT INTO {FTS_TABLE} (rowid, full_name, phones, email, area, zone)
+SELECT id, full_name, COALESCE(whatsapp_no, '') || ' ' || COALESCE(alternate_no, ''),
+       COALESCE(email, ''), area, zone
+FROM hira_contact
+"""
+
+_available = False
+
+
+def fts_available():
+    # Only a positive answer is remembered: before `migrate` creates the
+    # table, every call looks again, so a running process picks it up
+    global _available
+    if connection.vendor != "sqlite":
+        return False
+    if not _available:
+        _available = FTS_TABLE in connection.introspection.table_names()
+    return _available
+
+
+def _row(contact):
+    phones = " ".join(p for p in (contact.whatsapp_no, contact.alternate_no) if p)
+    return (contact.pk, contact.full_name, phones, contact.email or "", contact.area, contact.zone)
+
+
+# -------------------------------
+# INDEX MAINTENANCE
+# -------------------------------
+def index_contacts(contacts):
+    """(Re)index saved contacts. Bulk writers call this; signals cover single saves."""
+    if not fts_available():
+        return
+    rows = [_row(contact) for contact in contacts]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, full_name, phones, email, area, zone) VALUES (%s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def unindex_contacts(contact_ids):
+    if not fts_available() or not contact_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in contact_ids])
+
+
+def rebuild_index():
+    """Empty and refill the whole index from hira_contact, then merge its segments."""
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(_REBUILD_SQL)
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+
+# -------------------------------
+# QUERY
+# -------------------------------
+def match_expression(term):
+    """
+    'ram pat' -> '"ram"* AND "pat"*': every word as a quoted prefix. Words are
+    split on whitespace only (\\w would cut Gujarati words at their vowel
+    signs); FTS5's tokenizer splits the rest, e.g. "ramesh@gm". None if
+    nothing searchable.
+    """
+    words = [w for w in term.split() if any(c.isalnum() for c in w)]
+    if not words:
+        return None
+    return " AND ".join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+def search_contact_ids(term):
+    """
+    Subquery of matching contact ids for use in pk__in, or None when the
+    index cannot answer (no FTS table, or nothing searchable in the term).
+    """
+    expression = match_expression(term)
+    if expression is None or not fts_available():
+        return None
+    return RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (expression,))
@@ -0,0 +1,116 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .analytics import SURVEY_OF, feedback_saved, invalidate_survey
+from .bookings import promote_waitlist, release_seats
+from .contacts import invalidate_contacts
+from .events import invalidate_active_event
+from .facets import assign_dimensions, invalidate_facets
+from .manifest import mark_removed
+from .search import index_contacts, unindex_contacts
+from .summary import SOURCE_FIELDS, record_change
+from .models import (
+    Area, Booking, Contact, Event, EventSummary, ImportFingerprint, PostEventFeedback, PreEventFeedback, Zone,
+)
+
+
+# -------------------------------
+# EVENT CACHE INVALIDATION
+# -------------------------------
+@receiver([post_save, post_delete], sender=Event)
+def event_changed(sender, **kwargs):
+    invalidate_active_event()
+
+
+@receiver(post_save, sender=Event)
+def event_created(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        EventSummary.objects.get_or_create(event=instance)
+
+
+# -------------------------------
+# CONTACT CACHE, FACETS & SEARCH INDEX
+# -------------------------------
+@receiver([post_save, post_delete], sender=Contact)
+def contact_changed(sender, instance, **kwargs):
+    invalidate_contacts(instance.pk)
+    invalidate_facets()
+
+
+@receiver(post_save, sender=Contact)
+def contact_saved(sender, instance, **kwargs):
+    index_contacts([instance])
+    # The row no longer matches the sheet row it was imported from (admin edit,
+    # non-stream import): the next import_excel --stream must compare it again
+    ImportFingerprint.objects.filter(contact=instance).delete()
+
+
+@receiver(post_delete, sender=Contact)
+def contact_deleted(sender, instance, **kwargs):
+    unindex_contacts([instance.pk])
+
+
+# -------------------------------
+# AREA / ZONE
+# -------------------------------
+@receiver(pre_save, sender=Contact)
+def contact_normalize(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and not {"area", "zone"} & set(update_fields)):
+        return
+    assign_dimensions([instance])
+
+
+@receiver([post_save, post_delete], sender=Area)
+@receiver([post_save, post_delete], sender=Zone)
+def dimension_changed(sender, **kwargs):
+    invalidate_facets()
+
+
+# -------------------------------
+# SEAT COUNTER, EVENT SUMMARY & GATE MANIFESTS
+# -------------------------------
+@receiver(pre_save, sender=Booking)
+def booking_before_save(sender, instance, raw=False, **kwargs):
+    # The stored row, so post_save can apply the summary delta
+    instance._summary_before = None
+    if not raw and not instance._state.adding:
+        instance._summary_before = Booking.objects.filter(pk=instance.pk).values(*SOURCE_FIELDS).first()
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, "_summary_before", None)
+    record_change(before, instance)
+    # Moved to another event: gate manifests of the old one must drop it
+    if before is not None and before["event_id"] != instance.event_id:
+        mark_removed(before["event_id"], instance.pk)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting the event takes its summary and removal records with it
+    if not (isinstance(origin, Event) or getattr(origin, "model", None) is Event):
+        # Deltas cannot see a missing row: gate manifests learn of it from the record
+        mark_removed(instance.event_id, instance.pk)
+        record_change(instance, None)
+    # Deleting a confirmed booking (e.g. from the admin) frees its seats
+    if instance.status == Booking.CONFIRMED:
+        release_seats(instance.event_id, instance.num_people)
+        promote_waitlist(instance.event_id)
+
+
+# -------------------------------
+# FEEDBACK ANALYTICS
+# -------------------------------
+@receiver(post_save, sender=PreEventFeedback)
+@receiver(post_save, sender=PostEventFeedback)
+def feedback_changed(sender, instance, created=False, **kwargs):
+    feedback_saved(instance, created)
+
+
+@receiver(post_delete, sender=PreEventFeedback)
+@receiver(post_delete, sender=PostEventFeedback)
+def feedback_deleted(sender, instance, **kwargs):
+    invalidate_survey(SURVEY_OF[sender], instance.event_id)
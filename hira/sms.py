@@ -0,0 +1,213 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+import requests
+from requests.adapters import HTTPAdapter
+
+from .db import atomic_retry
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# GATEWAYS
+# -------------------------------
+class SMSGateway:
+    """
+    Interface for SMS providers: OTPs, and free text for broadcasts (hira.broadcast).
+    Both return a 2Factor-style dict: {"Status": "Success"|"Error", "Details": ...}
+    """
+
+    def send_otp(self, phone, otp):
+        raise NotImplementedError
+
+    def send_message(self, phone, text):
+        raise NotImplementedError
+
+
+class TwoFactorGateway(SMSGateway):
+    """2Factor.in over one pooled, keep-alive requests.Session per process."""
+
+    template_name = "HiraPuraLogin"  # your approved SMS template
+    timeout = (3.05, 10)  # connect, read
+
+    def __init__(self):
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    pool_size = getattr(settings, "OTP_DISPATCH_WORKERS", 4)
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def send_otp(self, phone, otp):
+        api_key = getattr(settings, "TWO_FACTOR_API_KEY", None)
+        if not api_key:
+            return {"Status": "Error", "Details": "API key not configured."}
+
+        url = f"https://2factor.in/API/V1/{api_key}/SMS/{phone}/{otp}/{self.template_name}?force=SMS"
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            return response.json()
+        except Exception as e:
+            return {"Status": "Error", "Details": str(e)}
+
+    def send_message(self, phone, text):
+        api_key = getattr(settings, "TWO_FACTOR_API_KEY", None)
+        sender = getattr(settings, "TWO_FACTOR_SENDER_ID", None)
+        if not (api_key and sender):
+            return {"Status": "Error", "Details": "API key or sender id not configured."}
+
+        data = {"module": "TRANS_SMS", "apikey": api_key, "to": phone, "from": sender, "msg": text}
+        try:
+            response = self.session.post("https://2factor.in/API/R1/", data=data, timeout=self.timeout)
+            return response.json()
+        except Exception as e:
+            return {"Status": "Error", "Details": str(e)}
+
+
+class StubGateway(SMSGateway):
+    """
+    Local gateway for development and load tests: no network, optional
+    simulated latency (OTP_STUB_LATENCY seconds). The last OTP per phone is
+    kept in `sent` so test drivers can complete the login flow.
+    """
+
+    def __init__(self):
+        self.latency = getattr(settings, "OTP_STUB_LATENCY", 0)
+        self.sent = {}
+        self.log = deque(maxlen=1000)
+
+    def send_otp(self, phone, otp):
+        if self.latency:
+            time.sleep(self.latency)
+        self.sent[phone] = otp
+        self.log.append((phone, otp))
+        return {"Status": "Success", "Details": "stub"}
+
+    def send_message(self, phone, text):
+        if self.latency:
+            time.sleep(self.latency)
+        self.log.append((phone, text))
+        return {"Status": "Success", "Details": "stub"}
+
+
+@lru_cache(maxsize=None)
+def get_gateway():
+    """Process-wide gateway instance chosen by settings.OTP_SMS_GATEWAY."""
+    path = getattr(settings, "OTP_SMS_GATEWAY", "hira.sms.TwoFactorGateway")
+    return import_string(path)()
+
+
+# -------------------------------
+# BACKGROUND DISPATCH
+# -------------------------------
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Created lazily so each gunicorn worker gets its own threads after fork
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "OTP_DISPATCH_WORKERS", 4),
+                    thread_name_prefix="otp-dispatch",
+                )
+    return _executor
+
+
+def retrying(send, *args):
+    """Call a gateway method, retrying failures with jittered exponential backoff."""
+    retries = getattr(settings, "OTP_DISPATCH_RETRIES", 2)
+    backoff = getattr(settings, "OTP_DISPATCH_BACKOFF", 0.5)
+
+    resp = {}
+    for attempt in range(retries + 1):
+        resp = send(*args)
+        if resp.get("Status") == "Success":
+            break
+        if attempt < retries:
+            time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+    return resp
+
+
+def send_with_retries(phone, otp):
+    """Send an OTP through the configured gateway, with retries."""
+    return retrying(get_gateway().send_otp, phone, otp)
+
+
+@atomic_retry
+def _record(otp_id, queued_only=False, **fields):
+    from .models import PhoneOTP
+
+    otps = PhoneOTP.objects.filter(id=otp_id)
+    if queued_only:
+        otps = otps.filter(delivery_status=PhoneOTP.QUEUED)
+    return otps.update(**fields)
+
+
+def deliver_otp(otp_id, phone, otp):
+    """Send one OTP and record the outcome on its PhoneOTP row."""
+    from .models import PhoneOTP
+
+    resp = send_with_retries(phone, otp)
+    if resp.get("Status") == "Success":
+        _record(otp_id, delivery_status=PhoneOTP.SENT, delivery_detail="")
+        return True
+    # A failed OTP can never be verified
+    _record(
+        otp_id,
+        delivery_status=PhoneOTP.FAILED,
+        delivery_detail=str(resp.get("Details") or "Failed to send OTP")[:255],
+        used=True,
+    )
+    return False
+
+
+def _deliver_in_worker(otp_id, phone, otp):
+    # Worker threads own their DB connections; drop them like a request would
+    from .models import PhoneOTP
+
+    close_old_connections()
+    try:
+        return deliver_otp(otp_id, phone, otp)
+    except Exception:
+        # Nobody reads the future: log it, and don't leave the OTP queued forever
+        logger.exception("OTP %s: delivery failed", otp_id)
+        try:
+            _record(otp_id, queued_only=True, delivery_status=PhoneOTP.FAILED, delivery_detail="Delivery error", used=True)
+        except Exception:
+            logger.exception("OTP %s: could not record the failure", otp_id)
+        return False
+    finally:
+        close_old_connections()
+
+
+def enqueue_otp(otp_id, phone, otp):
+    """
+    Queue an OTP for background delivery and return immediately; the
+    worker starts once the PhoneOTP row is committed. With
+    OTP_DISPATCH_ASYNC = False it is delivered inline and the success
+    flag is returned instead.
+    """
+    if not getattr(settings, "OTP_DISPATCH_ASYNC", True):
+        return deliver_otp(otp_id, phone, otp)
+    transaction.on_commit(lambda: _get_executor().submit(_deliver_in_worker, otp_id, phone, otp))
+    return None
@@ -0,0 +1,314 @@
+"""
+UPI payment reconciliation from bank/UPI statement exports (CSV or XLSX).
+
+A statement is read into one pandas frame; its header row is found among
+the first lines (banks put account details above it) and columns are
+recognised by their usual names (COLUMNS). Only credits are kept. Each
+credit gets a key, its UTR or a content hash when the bank gives none, and
+a booking id: the tr value of merchant exports, or the HP<id> reference
+from the UPI note (hira.payments.payment_reference) in the narration.
+
+Bookings and their earlier payments are joined in with merge(), and every
+credit is classified at once from the running total paid per booking:
+- matched: brings the booking to its total_amount; the booking is marked paid
+- partial: the booking is still short after it
+- duplicate: the booking was already paid in full (by hand or an earlier credit)
+- unmatched: no reference, or an unknown or cancelled booking
+
+Credits are recorded once per key, so importing a statement again, or one
+overlapping an earlier one, changes nothing. An import is one transaction:
+the credits go in with one executemany and the newly paid bookings through
+hira.summary.update_bookings, which keeps the event totals right.
+"""
+import csv
+import hashlib
+import io
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from .models import Booking, PaymentStatement, StatementTransaction
+from .summary import update_bookings
+
+# column: header names used by bank and UPI app exports (compared in lower case)
+COLUMNS = {
+    "txn_id": ("utr", "utr no", "utr number", "upi ref no", "upi ref id", "upi reference", "rrn",
+               "transaction id", "txn id", "bank reference no", "reference no", "ref no", "chq/ref no",
+               "cheque/ref no", "chq./ref.no"),
+    "booking_ref": ("tr", "order id", "merchant order id", "merchant transaction id", "transaction ref",
+                    "booking id"),
+    "narration": ("narration", "description", "remarks", "transaction remarks", "particulars", "details",
+                  "note", "transaction note"),
+    "amount": ("amount", "amount (inr)", "amount(inr)", "transaction amount", "txn amount"),
+    "credit": ("credit", "credit amount", "credit amt", "cr amount", "deposit", "deposit amt", "deposit amount"),
+    "type": ("cr/dr", "dr/cr", "type", "transaction type", "txn type"),
+    "date": ("date", "txn date", "transaction date", "tran date", "value date", "value dt"),
+}
+HEADER_SCAN_ROWS = 30
+IN_BATCH = 900        # keys per IN (...) list; SQLite allows 999 bound parameters
+RANGE_BATCH = 10000   # booking ids per BETWEEN query
+PAISA = 0.005  # amounts within this are equal
+
+
+# -------------------------------
+# READING STATEMENTS
+# -------------------------------
+def _header(value):
+    return re.sub(r"\s+", " ", value).strip().strip(".:").lower() if isinstance(value, str) else ""
+
+
+def _raw_table(data, name):
+    """All cells as text (None when empty), no header."""
+    if Path(name).suffix.lower() in (".xlsx", ".xlsm"):
+        return pd.read_excel(io.BytesIO(data), header=None, dtype=str)
+    # csv.reader copes with the ragged preamble lines pandas' parser rejects
+    lines = csv.reader(io.StringIO(data.decode("utf-8-sig", errors="replace")))
+    return pd.DataFrame([row for row in lines if any(cell.strip() for cell in row)]).replace("", None)
+
+
+def read_statement(data, name):
+    """
+    The statement's rows as a frame with the COLUMNS it has (text cells).
+    Raises ValueError when no header row with an amount and a reference is found.
+    """
+    raw = _raw_table(data, name)
+    aliases = {alias: column for column, names in COLUMNS.items() for alias in names}
+    for row in range(min(HEADER_SCAN_ROWS, len(raw))):
+        found = {}
+        for position, cell in enumerate(raw.iloc[row]):
+            column = aliases.get(_header(cell))
+            if column and column not in found:
+                found[column] = position
+        if found.keys() & {"amount", "credit"} and found.keys() & {"txn_id", "booking_ref", "narration"}:
+            table = raw.iloc[row + 1:, list(found.values())]
+            table.columns = list(found)
+            return table.reset_index(drop=True)
+    raise ValueError(f"No header row with an amount and a reference column in the first {HEADER_SCAN_ROWS} rows")
+
+
+def _text(table, column):
+    if column not in table:
+        return pd.Series("", index=table.index)
+    return table[column].fillna("").astype(str).str.strip()
+
+
+def _money(text):
+    """Rupee amounts from cells like '1,200.00', '₹500', '500.00 Cr'; NaN when there is none."""
+    cleaned = text.str.replace(r"[,\s₹]|INR|Rs\.?", "", regex=True, flags=re.I)
+    return pd.to_numeric(cleaned.str.extract(r"^(-?\d+(?:\.\d+)?)", expand=False), errors="coerce")
+
+
+def _dates(text):
+    """Statement dates: ISO (as Excel cells come out) or the day-first form Indian banks print."""
+    filled = text[text != ""]
+    if filled.empty:
+        return pd.Series(pd.NaT, index=text.index)
+    iso = re.match(r"\d{4}-", filled.iloc[0]) is not None
+    return pd.to_datetime(text.replace("", None), dayfirst=not iso, errors="coerce")
+
+
+def credits(table):
+    """
+    One row per credit, in statement order: order, txn_key, booking_id,
+    amount, paid_on, reference.
+    """
+    if "credit" in table:
+        amount = _money(_text(table, "credit"))
+        is_credit = amount > 0
+    else:
+        text = _text(table, "amount")
+        amount = _money(text)
+        if "type" in table:
+            is_credit = _text(table, "type").str.lower().str.match(r"c|deposit")
+        else:
+            is_credit = ~text.str.contains(r"dr\.?$", case=False)
+        is_credit &= amount > 0
+
+    reference = (_text(table, "narration") + " " + _text(table, "booking_ref")).str.strip()
+    frame = pd.DataFrame({
+        "order": np.arange(len(table)),
+        "txn_id": _text(table, "txn_id").str.slice(0, 64),
+        "booking_ref": _text(table, "booking_ref"),
+        "narration": _text(table, "narration"),
+        "amount": amount.round(2),
+        "paid_on": _dates(_text(table, "date")),
+        "reference": reference.str.slice(0, 255),
+        "date_text": _text(table, "date"),
+    })[is_credit.to_numpy()]
+
+    # No UTR: key on the row's content, numbered so identical rows stay apart
+    content = pd.util.hash_pandas_object(frame[["date_text", "amount", "reference"]], index=False)
+    occurrence = content.groupby(content).cumcount()
+    hashed = "row:" + content.map("{:016x}".format) + ":" + occurrence.astype(str)
+    frame["txn_key"] = frame["txn_id"].where(frame["txn_id"] != "", hashed)
+
+    prefix = re.escape(getattr(settings, "UPI_REFERENCE_PREFIX", "HP"))
+    explicit = frame["booking_ref"].str.extract(rf"^(?:{prefix})?0*(\d{{1,12}})$", flags=re.I, expand=False)
+    in_note = frame["narration"].str.extract(rf"(?<![A-Za-z0-9]){prefix}0*(\d{{1,12}})(?!\d)", flags=re.I, expand=False)
+    frame["booking_id"] = pd.to_numeric(explicit.fillna(in_note), errors="coerce")
+    return frame[["order", "txn_key", "booking_id", "amount", "paid_on", "reference"]]
+
+
+# -------------------------------
+# MATCHING
+# -------------------------------
+def recorded_keys(keys):
+    """The keys among `keys` that earlier statements already recorded."""
+    keys, seen = list(keys), set()
+    for start in range(0, len(keys), IN_BATCH):
+        batch = keys[start:start + IN_BATCH]
+        seen.update(StatementTransaction.objects.filter(txn_key__in=batch).values_list("txn_key", flat=True))
+    return seen
+
+
+def _id_ranges(ids, size=RANGE_BATCH):
+    """(first, last) of consecutive runs of `size` sorted ids: two parameters per query instead of `size`."""
+    ids = sorted(ids)
+    return [(ids[start], ids[min(start + size, len(ids)) - 1]) for start in range(0, len(ids), size)]
+
+
+def booking_frame(ids):
+    """
+    Bookings by id: total_amount, is_paid, booking status and the amount
+    earlier statements paid. Read by id range; rows in a range that no
+    credit refers to simply find nothing to join.
+    """
+    rows, paid = [], []
+    for first, last in _id_ranges(ids):
+        rows += Booking.objects.filter(id__range=(first, last)).values_list("id", "total_amount", "is_paid", "status")
+        paid += (
+            StatementTransaction.objects
+            .filter(booking_id__gte=first, booking_id__lte=last,
+                    status__in=[StatementTransaction.MATCHED, StatementTransaction.PARTIAL])
+            .values("booking_id").annotate(paid=Sum("amount")).values_list("booking_id", "paid")
+        )
+    bookings = pd.DataFrame(rows, columns=["booking_id", "due", "is_paid", "booking_status"]).set_index("booking_id")
+    bookings.index = bookings.index.astype(np.int64)  # an empty frame would get an object index and fail to merge
+    earlier = pd.Series({booking_id: float(amount) for booking_id, amount in paid}, dtype=np.float64)
+    bookings["earlier"] = earlier.reindex(bookings.index).fillna(0.0)
+    return bookings
+
+
+def _rupees(values):
+    return values.map("₹{:,.2f}".format).astype(str)
+
+
+def classify(frame):
+    """Add booking_id (known bookings only), status and detail to a frame of new credits."""
+    ids = [int(i) for i in frame["booking_id"].dropna().unique()]
+    frame = frame.merge(booking_frame(ids), how="left", left_on="booking_id", right_index=True)
+    frame = frame.sort_values(["booking_id", "paid_on", "order"], na_position="last")
+
+    known = frame["due"].notna()
+    live = known & (frame["booking_status"] != Booking.CANCELLED)
+    running = (frame.groupby("booking_id")["amount"].cumsum() + frame["earlier"]).fillna(0.0)
+    before = running - frame["amount"]
+    due = frame["due"].fillna(np.inf)  # unknown bookings are never covered
+    already_paid = frame["is_paid"].eq(True) | (before >= due - PAISA)
+
+    frame["status"] = np.select(
+        [~live, already_paid, running >= due - PAISA],
+        [StatementTransaction.UNMATCHED, StatementTransaction.DUPLICATE, StatementTransaction.MATCHED],
+        default=StatementTransaction.PARTIAL,
+    )
+
+    booking = "booking #" + frame["booking_id"].astype("Int64").astype(str)
+    frame["detail"] = np.select(
+        [
+            frame["booking_id"].isna(),
+            ~known,
+            ~live,
+            frame["status"] == StatementTransaction.DUPLICATE,
+            frame["status"] == StatementTransaction.PARTIAL,
+            running > due + PAISA,
+        ],
+        [
+            "no booking reference",
+            booking + " not found",
+            booking + " is cancelled",
+            booking + " already paid",
+            _rupees(running) + " of " + _rupees(due) + " paid",
+            "overpaid by " + _rupees(running - due),
+        ],
+        default="",
+    )
+    frame["booking_id"] = frame["booking_id"].where(known)
+    return frame.sort_values("order")
+
+
+# -------------------------------
+# IMPORT
+# -------------------------------
+def _insert(statement, frame):
+    """All credits in one executemany; the ORM would build a model instance per row."""
+    qn = connection.ops.quote_name
+    fields = ["statement", "txn_key", "booking", "amount", "paid_on", "reference", "status", "detail"]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        qn(StatementTransaction._meta.db_table),
+        ", ".join(qn(StatementTransaction._meta.get_field(name).column) for name in fields),
+        ", ".join(["%s"] * len(fields)),
+    )
+    params = zip(
+        [statement.pk] * len(frame),
+        frame["txn_key"],
+        frame["booking_id"].astype("Int64").astype(object).where(frame["booking_id"].notna(), None),
+        frame["amount"].map("{:.2f}".format),
+        frame["paid_on"].dt.strftime("%Y-%m-%d").astype(object).where(frame["paid_on"].notna(), None),
+        frame["reference"],
+        frame["status"],
+        frame["detail"],
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, list(params))
+
+
+def import_statement(source, name=None, dry_run=False):
+    """
+    Reconcile one statement (a path or a binary file object). Returns
+    (statement, created): created is False when this exact file was imported
+    before, and the statement is left unsaved on a dry run.
+    Raises ValueError for files that do not look like a statement.
+    """
+    if hasattr(source, "read"):
+        data, name = source.read(), name or getattr(source, "name", "statement.csv")
+    else:
+        data, name = Path(source).read_bytes(), name or Path(source).name
+    digest = hashlib.sha256(data).hexdigest()
+    existing = PaymentStatement.objects.filter(digest=digest).first()
+    if existing is not None:
+        return existing, False
+
+    frame = credits(read_statement(data, name))
+    statement = PaymentStatement(name=Path(name).name[:255], digest=digest, credits=len(frame))
+    with transaction.atomic():
+        fresh = frame[~frame["txn_key"].duplicated()]
+        fresh = fresh[~fresh["txn_key"].isin(recorded_keys(fresh["txn_key"]))]
+        statement.already_seen = len(frame) - len(fresh)
+        if fresh.empty:
+            # Every credit was recorded before (an overlapping export): nothing to classify
+            if not dry_run:
+                statement.save()
+            return statement, True
+        fresh = classify(fresh)
+        counts = fresh["status"].value_counts()
+        for status, _ in StatementTransaction.STATUS_CHOICES:
+            setattr(statement, status, int(counts.get(status, 0)))
+        if dry_run:
+            statement.marked_paid = statement.matched  # matched credits are for unpaid bookings only
+            return statement, True
+
+        statement.save()
+        _insert(statement, fresh)
+        statement.marked_paid = update_bookings(
+            Booking.objects.filter(
+                is_paid=False, payments__statement=statement, payments__status=StatementTransaction.MATCHED,
+            ),
+            is_paid=True,
+        )
+        statement.save(update_fields=["marked_paid"])
+    return statement, True
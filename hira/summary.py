@@ -0,0 +1,164 @@
+"""
+Per-event booking totals (EventSummary), kept current with F() deltas.
+
+Every counter is "sum of a value over the bookings matching a condition"
+(COUNTERS). A booking's contribution is computed from its fields; a write
+moves the event's row by (contribution after - contribution before) in one
+UPDATE inside the booking's own transaction, so readers never see a half
+applied change and concurrent writers cannot lose each other's deltas.
+
+Paths that write bookings:
+- Model save/delete: hira.signals (pre_save reads the old row).
+- Waitlist promotion and cancellation: hira.bookings calls record_change.
+- Bulk edits: update_bookings() wraps QuerySet.update with grouped
+  before/after totals (admin "mark paid", statement reconciliation).
+bulk_create and raw SQL bypass all of this; manage.py
+reconcile_event_summaries rebuilds the table and reports the drift.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from .models import Booking, Event, EventSummary
+
+# counter: (condition on the booking, value added: 1 or a field name)
+COUNTERS = {
+    "bookings": ({"status": Booking.CONFIRMED}, 1),
+    "people": ({"status": Booking.CONFIRMED}, "num_people"),
+    "amount": ({"status": Booking.CONFIRMED}, "total_amount"),
+    "paid_bookings": ({"status": Booking.CONFIRMED, "is_paid": True}, 1),
+    "paid_people": ({"status": Booking.CONFIRMED, "is_paid": True}, "num_people"),
+    "paid_amount": ({"status": Booking.CONFIRMED, "is_paid": True}, "total_amount"),
+    "vip_bookings": ({"status": Booking.CONFIRMED, "is_vip": True}, 1),
+    "vip_people": ({"status": Booking.CONFIRMED, "is_vip": True}, "num_people"),
+    "waitlisted_bookings": ({"status": Booking.WAITLISTED}, 1),
+    "waitlisted_people": ({"status": Booking.WAITLISTED}, "num_people"),
+    "cancelled_bookings": ({"status": Booking.CANCELLED}, 1),
+}
+SOURCE_FIELDS = ("event_id", "status", "num_people", "total_amount", "is_vip", "is_paid")
+
+
+# -------------------------------
+# CONTRIBUTIONS
+# -------------------------------
+def _field(booking, name):
+    return booking.get(name) if isinstance(booking, dict) else getattr(booking, name)
+
+
+def contribution(booking):
+    """{counter: amount} one booking adds; `booking` is a model instance or a dict of SOURCE_FIELDS."""
+    totals = {}
+    for counter, (condition, value) in COUNTERS.items():
+        if all(_field(booking, field) == wanted for field, wanted in condition.items()):
+            totals[counter] = value if value == 1 else _field(booking, value) or 0
+    return totals
+
+
+def _aggregates(overrides=None):
+    """Sum() per counter; with overrides, as if those fields held those (literal) values."""
+    overrides = overrides or {}
+    aggregates = {}
+    for counter, (condition, value) in COUNTERS.items():
+        amount = Value(1) if value == 1 else Value(overrides[value]) if value in overrides else F(value)
+        if any(overrides[field] != wanted for field, wanted in condition.items() if field in overrides):
+            amount = Value(0)
+        rest = {field: wanted for field, wanted in condition.items() if field not in overrides}
+        if rest:
+            amount = Case(When(Q(**rest), then=amount), default=Value(0))
+        aggregates[counter] = Sum(amount, output_field=IntegerField())
+    return aggregates
+
+
+def totals_by_event(queryset, overrides=None):
+    """{event_id: {counter: total}} for the bookings in `queryset`, in one GROUP BY."""
+    rows = queryset.order_by().values("event_id").annotate(**_aggregates(overrides))
+    return {row.pop("event_id"): {k: v or 0 for k, v in row.items()} for row in rows}
+
+
+# -------------------------------
+# APPLYING DELTAS
+# -------------------------------
+def apply(event_id, deltas):
+    """Move one event's counters by `deltas` in a single UPDATE (creating its row if missing)."""
+    deltas = {counter: amount for counter, amount in deltas.items() if amount}
+    if not deltas:
+        return
+    changes = {counter: F(counter) + amount for counter, amount in deltas.items()}
+    rows = EventSummary.objects.filter(event_id=event_id)
+    if not rows.update(updated_at=timezone.now(), **changes):
+        EventSummary.objects.bulk_create([EventSummary(event_id=event_id)], ignore_conflicts=True)
+        rows.update(updated_at=timezone.now(), **changes)
+
+
+def _difference(after, before):
+    return {counter: after.get(counter, 0) - before.get(counter, 0) for counter in COUNTERS}
+
+
+def record_change(before, after):
+    """
+    Apply the move from `before` to `after`, each a booking (instance or
+    dict of SOURCE_FIELDS) or None. Handles a booking moved between events.
+    """
+    old = contribution(before) if before is not None else {}
+    new = contribution(after) if after is not None else {}
+    old_event = _field(before, "event_id") if before is not None else None
+    new_event = _field(after, "event_id") if after is not None else None
+    if old_event == new_event:
+        apply(new_event, _difference(new, old))
+        return
+    if old_event is not None:
+        apply(old_event, _difference({}, old))
+    if new_event is not None:
+        apply(new_event, new)
+
+
+def update_bookings(queryset, **values):
+    """
+    QuerySet.update() for bookings that keeps the summaries right: totals of
+    the affected rows as they are and as they will be (the same GROUP BY with
+    `values` in place of the columns), applied per event in the same
+    transaction. `values` must be literals and must not move bookings between
+    events. Also stamps updated_at. Returns the number of rows updated.
+
+    The rows are selected by subquery, never as a list of ids, so selections
+    of any size cost three statements.
+    """
+    with transaction.atomic():
+        rows = Booking.objects.filter(id__in=queryset.order_by().values("id"))
+        before = totals_by_event(rows)
+        after = totals_by_event(rows, overrides=values)
+        updated = rows.update(updated_at=timezone.now(), **values)
+        for event_id in before.keys() | after.keys():
+            apply(event_id, _difference(after.get(event_id, {}), before.get(event_id, {})))
+    return updated
+
+
+# -------------------------------
+# RECONCILIATION
+# -------------------------------
+def reconcile(fix=True):
+    """
+    Recompute every event's totals from its bookings. Returns
+    {event_id: {counter: (stored, actual)}} for the counters that drifted
+    and, with fix=True, overwrites the stored rows.
+    """
+    with transaction.atomic():
+        actual = totals_by_event(Booking.objects.all())
+        stored = {
+            row.pop("event_id"): row
+            for row in EventSummary.objects.values("event_id", *COUNTERS)
+        }
+        drift = {}
+        for event_id in Event.objects.values_list("id", flat=True):
+            real = actual.get(event_id, dict.fromkeys(COUNTERS, 0))
+            have = stored.get(event_id)
+            changed = {
+                counter: (None if have is None else have[counter], real[counter])
+                for counter in COUNTERS
+                if have is None or have[counter] != real[counter]
+            }
+            if changed:
+                drift[event_id] = changed
+                if fix:
+                    EventSummary.objects.update_or_create(event_id=event_id, defaults=real)
+    return drift
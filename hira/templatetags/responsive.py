@@ -0,0 +1,40 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from hira.images import image_settings, manifest_entry
+
+register = template.Library()
+
+
+def _srcset(prefix, variants):
+    return ", ".join(f"{static(prefix + v['path'])} {v['w']}w" for v in variants)
+
+
+@register.simple_tag
+def picture(path, alt="", sizes="100vw", **attrs):
+    """
+    <picture> with WebP and JPEG srcsets built by `manage.py build_images`.
+    Falls back to a plain <img> when the image has no derivatives yet.
+    Loads eagerly unless given loading="lazy"; pass that only below the fold,
+    and fetchpriority="high" for the hero.
+
+        {% load responsive %}
+        {% picture "home/Invitation.png" alt="Invitation" class="img-fluid" sizes="(min-width: 768px) 40vw, 100vw" fetchpriority="high" %}
+    """
+    attrs = {name.replace("_", "-"): value for name, value in attrs.items()}
+    extra = format_html_join("", ' {}="{}"', attrs.items())
+
+    entry = manifest_entry(path)
+    if entry is None:
+        return format_html('<img src="{}" alt="{}"{}>', static(path), alt, extra)
+
+    prefix = image_settings()["static_prefix"]
+    jpeg = entry["variants"]["jpeg"]
+    return format_html(
+        '<picture style="display: contents"><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}"{}></picture>',
+        _srcset(prefix, entry["variants"]["webp"]), sizes,
+        static(prefix + jpeg[-1]["path"]), _srcset(prefix, jpeg), sizes,
+        entry["width"], entry["height"], alt, extra,
+    )
@@ -1,3 +1,864 @@
-from django.test import TestCase
+import datetime
+import os
+import threading
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core import mail
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.db.models import Sum
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import broadcast as broadcasts
+from . import search
+from .admin import hirapura_admin
+from .bookings import AlreadyBooked, IdempotencyConflict, cancel_booking, create_booking
+from .contacts import CONTACT_CACHE_KEY, get_cached_contact
+from .events import ACTIVE_EVENT_CACHE_KEY, get_active_event, invalidate_active_event
+from .exports import csv_lines, filtered, write_xlsx
+from .facets import facet_counts, normalize
+from .api import encode_cursor
+from .manifest import DELTA_MAGIC, FULL_MAGIC, GateManifest, build_delta, build_manifest, prune_removed
+from .metrics import query_budget
+from .ratelimit import Rate, get_store, hit, peek
+from .models import Area, Booking, Broadcast, BroadcastDelivery, Contact, Event, EventSummary, ImportFingerprint, PhoneOTP, PreEventFeedback, RemovedBooking, StatementTransaction
+from .payments import QR_OPTIONS, qr_etag
+from .sms import StubGateway, _deliver_in_worker, deliver_otp, get_gateway
+from .statements import import_statement
+from .summary import reconcile, update_bookings
+from .tickets import AlreadyCheckedIn, Gate, TicketError, issue_ticket, verify_ticket
+
+
+_scratch = tempfile.TemporaryDirectory()
+
+
+@override_settings(
+    # Not the dev server's cache directory or rate limit buckets
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    RATELIMIT_DB=os.path.join(_scratch.name, "ratelimit.sqlite3"),
+)
+class HiraTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        invalidate_active_event()
+
+
+def make_event(**fields):
+    fields = {
+        "date": datetime.date.today(), "time": datetime.time(18, 0), "place": "Hall",
+        "admin_name": "Admin", "admin_phone": "9000000000", **fields,
+    }
+    return Event.objects.create(**fields)
+
+
+# -------------------------------
+# IMPORT_EXCEL
+# -------------------------------
+class ImportExcelPhoneTests(HiraTestCase):
+    HEADER = ['Full Name', 'Subcast', 'Whatsapp Mobile Number', 'Address', 'Area', 'Zone']
+
+    def import_rows(self, *rows):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        workbook.active.append(self.HEADER)
+        for row in rows:
+            workbook.active.append(row)
+        with tempfile.NamedTemporaryFile(suffix='.xlsx') as sheet:
+            workbook.save(sheet.name)
+            call_command('import_excel', sheet.name, '--stream', stdout=StringIO())
+
+    def test_spellings_of_one_number_share_a_contact(self):
+        self.import_rows(['Ramesh', 'S', '+91 98765 43210', 'A', 'North', 'Zone 1'])
+        self.import_rows(['Ramesh', 'S', '9876543210', 'A', 'North', 'Zone 1'])
+        self.import_rows(['Ramesh', 'S', 9876543210.0, 'A', 'North', 'Zone 1'])
+        self.import_rows(['Ramesh', 'S', '098765-43210', 'A', 'North', 'Zone 1'])
+
+        self.assertEqual(list(Contact.objects.values_list('whatsapp_no', flat=True)), ['9876543210'])
+        self.assertEqual(list(ImportFingerprint.objects.values_list('phone', flat=True)), ['9876543210'])
+
+    def test_edited_contact_is_restored_by_the_next_import(self):
+        row = ['Ramesh', 'S', '9876543210', 'A', 'North', 'Zone 1']
+        self.import_rows(row)
+        contact = Contact.objects.get()
+        contact.full_name = 'Edited in the admin'
+        contact.save()
+        self.assertFalse(ImportFingerprint.objects.exists())
+
+        self.import_rows(row)
+        contact.refresh_from_db()
+        self.assertEqual(contact.full_name, 'Ramesh')
+        self.assertEqual(ImportFingerprint.objects.get().contact, contact)
+
+# -------------------------------
+# SEATS THROUGH THE ADMIN
+# -------------------------------
+class BookingAdminSeatTests(HiraTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(capacity=4)
+        self.client.force_login(User.objects.create_superuser("admin", password=None))
+
+    def confirmed_people(self):
+        return Booking.objects.filter(event=self.event, status=Booking.CONFIRMED).aggregate(n=Sum("num_people"))["n"]
+
+    def test_admin_add_and_delete_never_oversell(self):
+        create_booking(self.event, 4, name="First", phone="1", total_amount=400)
+        response = self.client.post("/admin/hira/booking/add/", {
+            "name": "Walk-in", "phone": "2", "num_people": 3, "total_amount": 300, "event": self.event.pk,
+        })
+        self.assertEqual(response.status_code, 302)
+        added = Booking.objects.get(name="Walk-in")
+        self.assertEqual(added.status, Booking.WAITLISTED)
+
+        self.client.post(f"/admin/hira/booking/{added.pk}/delete/", {"post": "yes"})
+        later = create_booking(self.event, 3, name="Later", phone="3", total_amount=300)
+
+        self.event.refresh_from_db()
+        self.assertEqual(later.status, Booking.WAITLISTED)
+        self.assertEqual(self.event.seats_booked, 4)
+        self.assertEqual(self.confirmed_people(), 4)
+
+    def test_seats_cannot_be_edited(self):
+        booking = create_booking(self.event, 2, name="Guest", phone="1", total_amount=200)
+        self.client.post(f"/admin/hira/booking/{booking.pk}/change/", {
+            "name": "Guest", "phone": "1", "num_people": 4, "total_amount": 200, "event": self.event.pk,
+        })
+        booking.refresh_from_db()
+        self.event.refresh_from_db()
+        self.assertEqual((booking.num_people, self.event.seats_booked), (2, 2))
+
+
+# -------------------------------
+# GATE
+# -------------------------------
+class GateTests(HiraTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event()
+        self.gate = Gate()
+
+    def ticket(self, name):
+        booking = create_booking(self.event, 2, name=name, phone="1", total_amount=200, is_paid=True)
+        return booking, verify_ticket(issue_ticket(booking))
+
+    def test_cancelled_after_first_scan_of_event_is_refused(self):
+        _, first = self.ticket("First")
+        booking, second = self.ticket("Second")
+        self.gate.admit(first)
+        cancel_booking(booking)
+        with self.assertRaises(TicketError):
+            self.gate.admit(second)
+
+    def test_second_scan_is_re_entry(self):
+        booking, ticket = self.ticket("Guest")
+        self.gate.admit(ticket)
+        booking.refresh_from_db()
+        self.assertIsNotNone(booking.checked_in_at)
+        with self.assertNumQueries(0):
+            with self.assertRaises(AlreadyCheckedIn):
+                self.gate.admit(ticket)
+
+    def test_re_entry_at_another_worker_is_refused_at_once(self):
+        _, ticket = self.ticket("Guest")
+        Gate().admit(ticket)
+        with self.assertRaises(AlreadyCheckedIn):
+            Gate().admit(ticket)
+
+
+# -------------------------------
+# PAYMENT STATEMENTS
+# -------------------------------
+class StatementImportTests(HiraTestCase):
+    def statement(self, *rows, preamble=""):
+        lines = [preamble, "Date,UTR,Narration,Amount,Cr/Dr"] + [",".join(row) for row in rows]
+        return BytesIO("\n".join(lines).encode())
+
+    def test_overlapping_statement_imported_twice(self):
+        booking = create_booking(make_event(), 2, name="Guest", phone="1", total_amount=200)
+        paid = ("01-10-2026", "UTR1", f"UPI/HP{booking.pk} Booking", "200.00", "CR")
+        stray = ("02-10-2026", "UTR2", "UPI/no reference", "50.00", "CR")
+
+        first, created = import_statement(self.statement(paid, stray), "first.csv")
+        self.assertTrue(created)
+        self.assertEqual((first.matched, first.unmatched, first.marked_paid), (1, 1, 1))
+
+        # A later export repeating only credits already recorded
+        second, created = import_statement(self.statement(paid, stray, preamble="Account 123"), "second.csv")
+        self.assertTrue(created)
+        self.assertEqual((second.credits, second.already_seen, second.matched), (2, 2, 0))
+        self.assertEqual(StatementTransaction.objects.count(), 2)
+
+        # Fresh credits none of which refer to a booking
+        third, _ = import_statement(self.statement(paid, ("03-10-2026", "UTR3", "cash", "10", "CR")), "third.csv")
+        self.assertEqual((third.already_seen, third.unmatched), (1, 1))
+        booking.refresh_from_db()
+        self.assertTrue(booking.is_paid)
+
+
+# -------------------------------
+# BOOKINGS
+# -------------------------------
+class CreateBookingTests(HiraTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event()
+        self.contact = Contact.objects.create(full_name="Guest", whatsapp_no="9000000001")
+
+    def book(self, **fields):
+        fields.setdefault("contact", self.contact)
+        return create_booking(self.event, 1, name="Guest", phone="9000000001", total_amount=50, **fields)
+
+    def test_second_live_booking_is_already_booked(self):
+        self.book()
+        with self.assertRaises(AlreadyBooked):
+            self.book()
+
+    def test_same_key_replays_for_its_contact_and_event(self):
+        booking = self.book(idempotency_key="form-1")
+        self.assertEqual(self.book(idempotency_key="form-1"), booking)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_key_of_another_contact_is_a_conflict(self):
+        self.book(idempotency_key="form-1")
+        other = Contact.objects.create(full_name="Other", whatsapp_no="9000000002")
+        with self.assertRaises(IdempotencyConflict):
+            self.book(contact=other, idempotency_key="form-1")
+        self.assertFalse(Booking.objects.filter(contact=other).exists())
+
+    def test_other_integrity_errors_are_not_already_booked(self):
+        create_booking(self.event, 1, name="Other", phone="1", total_amount=50, upi_token="taken")
+        with self.assertRaises(IntegrityError):
+            self.book(upi_token="taken")
+
+
+# -------------------------------
+# GATE MANIFESTS
+# -------------------------------
+@override_settings(CHECKIN_SYNC_SETTLE_SECONDS=0)
+class ManifestDeltaTests(HiraTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, self.other = make_event(), make_event()
+        self.kept, self.deleted, self.moved = (
+            create_booking(self.event, 1, name=name, phone="1", total_amount=50, is_paid=True)
+            for name in ("Kept", "Deleted", "Moved")
+        )
+
+    def sync(self, device):
+        cache.clear()  # another worker: nothing shared but the database
+        _, data = build_delta(self.event.id, device.version)
+        self.assertEqual(data[:4], DELTA_MAGIC)
+        return device.apply(data)
+
+    def test_deleted_and_moved_bookings_are_removed(self):
+        device = GateManifest.parse(build_manifest(self.event.id)[1])
+        self.assertEqual(len(device), 3)
+
+        self.moved.event = self.other
+        self.moved.save()
+        self.assertEqual(list(self.sync(device).ids), [self.kept.id, self.deleted.id])
+
+        self.deleted.delete()
+        self.assertEqual(list(self.sync(device).ids), [self.kept.id])
+        self.assertEqual(list(GateManifest.parse(build_manifest(self.other.id)[1]).ids), [self.moved.id])
+
+    @override_settings(REMOVED_BOOKING_RETENTION_DAYS=1)
+    def test_old_removals_are_pruned_and_old_versions_resync_in_full(self):
+        device = GateManifest.parse(build_manifest(self.event.id)[1])
+        self.deleted.delete()
+        RemovedBooking.objects.update(removed_at=timezone.now() - datetime.timedelta(days=2))
+        self.assertEqual(prune_removed(), 1)
+        self.assertFalse(RemovedBooking.objects.exists())
+
+        device.version -= 2 * 86400 * 10 ** 6  # last synced two days ago
+        _, data = build_delta(self.event.id, device.version)
+        self.assertEqual(data[:4], FULL_MAGIC)
+        self.assertEqual(list(device.apply(data).ids), [self.kept.id, self.moved.id])
+
+
+# -------------------------------
+# CHECK-IN API
+# -------------------------------
+@override_settings(CHECKIN_SYNC_SETTLE_SECONDS=0)
+class BookingChangesApiTests(HiraTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event, self.other = make_event(), make_event()
+        self.client.force_login(User.objects.create_user("volunteer", is_staff=True))
+
+    def get(self, url, **params):
+        return self.client.get(url, params).json()
+
+    def test_deleted_and_moved_bookings_are_reported(self):
+        kept, deleted, moved = (
+            create_booking(self.event, 1, name=name, phone="1", total_amount=50) for name in ("Kept", "Deleted", "Moved")
+        )
+        listing = self.get(reverse("api_bookings", args=[self.event.id]))
+        self.assertEqual(len(listing["results"]), 3)
+
+        deleted_id = deleted.id
+        deleted.delete()
+        moved.event = self.other
+        moved.save()
+        changes = self.get(reverse("api_booking_changes", args=[self.event.id]), since=listing["sync"])
+        self.assertEqual(changes["results"], [])
+        self.assertEqual(changes["removed"], sorted([deleted_id, moved.id]))
+
+        # Moved back: a row again, no longer a removal
+        moved.event = self.event
+        moved.save()
+        changes = self.get(reverse("api_booking_changes", args=[self.event.id]), since=listing["sync"])
+        self.assertEqual([row["id"] for row in changes["results"]], [moved.id])
+        self.assertEqual(changes["removed"], [deleted_id])
+
+    @override_settings(REMOVED_BOOKING_RETENTION_DAYS=1)
+    def test_cursor_older_than_retention_must_reload(self):
+        since = encode_cursor(timezone.now() - datetime.timedelta(days=2), 0)
+        response = self.client.get(reverse("api_booking_changes", args=[self.event.id]), {"since": since})
+        self.assertEqual(response.status_code, 410)
+
+
+# -------------------------------
+# EXPORTS
+# -------------------------------
+class ExportTests(HiraTestCase):
+    def test_formulas_are_exported_as_text(self):
+        create_booking(make_event(), 1, name='=HYPERLINK("http://x","y")', phone="+919000000001", total_amount=50)
+        queryset = filtered("bookings")
+        text = "".join(csv_lines("bookings", queryset))
+        self.assertIn("'=HYPERLINK", text)
+        self.assertIn("'+919000000001", text)
+
+        from openpyxl import load_workbook
+
+        with tempfile.NamedTemporaryFile(suffix=".xlsx") as out:
+            write_xlsx("bookings", queryset, out.name)
+            values = [cell.value for cell in load_workbook(out.name).active[2]]
+        self.assertIn('\'=HYPERLINK("http://x","y")', values)
+
+
+# -------------------------------
+# AREA / ZONE FACETS
+# -------------------------------
+class FacetTests(HiraTestCase):
+    def contact(self, phone, area, zone="Central"):
+        return Contact.objects.create(full_name="Guest", whatsapp_no=phone, area=area, zone=zone)
+
+    def test_normalize_merges_case_and_spacing(self):
+        self.assertEqual(normalize("  north   gate "), ("north gate", "North Gate"))
+        self.assertEqual(normalize("NORTH GATE"), ("north gate", "North Gate"))
+        self.assertEqual(normalize("McKinley Rd"), ("mckinley rd", "McKinley Rd"))
+        self.assertEqual(normalize("nan"), (None, ""))
+        self.assertEqual(normalize(None), (None, ""))
+
+    def test_spellings_share_one_area_and_keep_their_text(self):
+        first, second = self.contact("9000000001", "north gate "), self.contact("9000000002", "NORTH GATE")
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.area_ref_id, second.area_ref_id)
+        self.assertEqual(first.area_ref.name, "North Gate")
+        self.assertEqual((first.area, second.area), ("north gate ", "NORTH GATE"))
+
+    def test_save_with_update_fields_moves_the_ref(self):
+        contact = self.contact("9000000001", "North")
+        contact.area = "South"
+        contact.save(update_fields=["area"])
+        contact.refresh_from_db()
+        self.assertEqual(contact.area_ref.name, "South")
+
+    def test_counts_are_cached_until_contacts_or_names_change(self):
+        self.contact("9000000001", "North")
+        self.contact("9000000002", "north")
+        area = Area.objects.get()
+        self.assertEqual(facet_counts()["area"], [(area.id, "North", 2)])
+        with self.assertNumQueries(0):
+            facet_counts()
+
+        self.contact("9000000003", "South")
+        self.assertEqual([row[1:] for row in facet_counts()["area"]], [("North", 2), ("South", 1)])
+
+        area.name = "Uttar"
+        area.save()
+        self.assertEqual(facet_counts()["area"][0], (area.id, "Uttar", 2))
+
+    def test_admin_list_shows_renamed_area(self):
+        self.contact("9000000001", "North")
+        Area.objects.update(name="Uttar")
+        self.client.force_login(User.objects.create_superuser("admin", password=None))
+        response = self.client.get(reverse("hirapura_admin:hira_contact_changelist"))
+        self.assertContains(response, "Uttar")
+
+
+# -------------------------------
+# CONTACT SEARCH
+# -------------------------------
+class SearchTests(HiraTestCase):
+    def test_missing_index_is_looked_for_again(self):
+        self.addCleanup(setattr, search, "_available", False)
+        search._available = False
+        with mock.patch.object(connection.introspection, "table_names", return_value=[]):
+            self.assertFalse(search.fts_available())
+        self.assertTrue(search.fts_available())
+
+        with self.assertNumQueries(0):
+            self.assertTrue(search.fts_available())
+
+    def test_prefix_match(self):
+        contact = Contact.objects.create(full_name="Ramesh Patel", whatsapp_no="9000000001")
+        ids = search.search_contact_ids("rame")
+        self.assertEqual(list(Contact.objects.filter(pk__in=ids)), [contact])
+
+
+# -------------------------------
+# UPI PAYMENTS
+# -------------------------------
+@override_settings(UPI_ID="hirapura@upi")
+class PaymentTests(HiraTestCase):
+    def setUp(self):
+        super().setUp()
+        owner = Contact.objects.create(full_name="Owner", whatsapp_no="9000000001")
+        create_booking(make_event(), 2, contact=owner, name="Owner", phone="9000000001", total_amount=100, upi_token="tok")
+        self.other = Contact.objects.create(full_name="Other", whatsapp_no="9000000002")
+
+    def test_token_of_another_contact_is_not_found(self):
+        session = self.client.session
+        session["contact_id"] = self.other.id
+        session.save()
+        for url in (reverse("payment", args=["tok"]), reverse("upi_redirect", args=["tok"]),
+                    reverse("upi_qr", args=["tok", "svg"])):
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+
+    def test_booking_from_before_contact_links_matches_on_phone(self):
+        create_booking(make_event(), 1, name="Other", phone="9000000002", total_amount=50, upi_token="old")
+        session = self.client.session
+        session["contact_id"] = self.other.id
+        session.save()
+        self.assertEqual(self.client.get(reverse("payment", args=["old"])).status_code, 200)
+
+    def test_etag_covers_render_options(self):
+        etag = qr_etag("upi://pay", "png")
+        with mock.patch.dict(QR_OPTIONS, box_size=10):
+            self.assertNotEqual(qr_etag("upi://pay", "png"), etag)
+
+
+# -------------------------------
+# RESPONSIVE IMAGES
+# -------------------------------
+class PictureTagTests(HiraTestCase):
+    def render(self, tag):
+        return Template("{% load responsive %}" + tag).render(Context())
+
+    def test_eager_unless_asked_to_be_lazy(self):
+        hero = self.render('{% picture "home/Invitation.png" fetchpriority="high" %}')
+        self.assertIn('fetchpriority="high"', hero)
+        self.assertNotIn("loading=", hero)
+        self.assertIn('loading="lazy"', self.render('{% picture "home/Invitation.png" loading="lazy" %}'))
+
+
+# -------------------------------
+# QUERY BUDGETS
+# -------------------------------
+@override_settings(UPI_ID="hirapura@upi")
+class ViewQueryBudgetTests(HiraTestCase):
+    """The views in VIEW_QUERY_BUDGETS stay within their budget: session load plus one cache miss."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        event = make_event()
+        self.contact = Contact.objects.create(full_name="Guest", whatsapp_no="9000000001")
+        self.booking = create_booking(
+            event, 2, contact=self.contact, name="Guest", phone="9000000001", total_amount=100, upi_token="tok",
+        )
+        session = self.client.session
+        session.update({"contact_id": self.contact.id, "last_booking_id": self.booking.id, "last_upi_token": "tok"})
+        session.save()
+
+    def get(self, name, *args):
+        url = reverse(name, args=args)
+        self.client.get(url)  # warm the shared caches; a request may still miss one of them
+        with query_budget(settings.VIEW_QUERY_BUDGETS[name], name):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_home(self):
+        self.get("home")
+
+    def test_details(self):
+        self.get("details", self.contact.whatsapp_no)
+
+    def test_success_page(self):
+        self.get("success_page")
+
+    def test_payment(self):
+        self.get("payment", "tok")
+
+    def test_upi_qr(self):
+        self.get("upi_qr", "tok", "svg")
+
+
+# -------------------------------
+# ACTIVE EVENT
+# -------------------------------
+class ActiveEventTests(HiraTestCase):
+    def test_saving_an_event_changes_the_active_event(self):
+        event = make_event(title="Sammelan")
+        self.assertEqual(get_active_event().title, "Sammelan")
+
+        event.title = "Sneh Milan"
+        event.save()
+        # Gone from the shared cache too, so other workers reload it once their process copy expires
+        self.assertIsNone(cache.get(ACTIVE_EVENT_CACHE_KEY))
+        self.assertEqual(get_active_event().title, "Sneh Milan")
+
+        sooner = make_event(date=datetime.date.today(), time=datetime.time(9, 0))
+        self.assertEqual(get_active_event().pk, sooner.pk)
+        sooner.delete()
+        self.assertEqual(get_active_event().pk, event.pk)
+
+
+# -------------------------------
+# ADMIN CHANGELIST PAGING
+# -------------------------------
+class ChangelistPagingTests(HiraTestCase):
+    """Forward paging costs the same on page 5000 as on page 2: a keyset seek, no OFFSET, no COUNT(*)."""
+    PER_PAGE = 2
+    DEEP = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        event = make_event()
+        Booking.objects.bulk_create([
+            Booking(event=event, name=f"Guest {i}", phone="1", num_people=1, total_amount=50,
+                    status=Booking.WAITLISTED)
+            for i in range(cls.PER_PAGE * (cls.DEEP + 1))
+        ], batch_size=2000)
+        cls.admin = User.objects.create_superuser("admin", password=None)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+        self.url = reverse("hirapura_admin:hira_booking_changelist")
+        patcher = mock.patch.object(hirapura_admin._registry[Booking], "list_per_page", self.PER_PAGE)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def page_sql(self, page):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"p": page})
+        self.assertEqual(response.status_code, 200)
+        return [query["sql"] for query in queries]
+
+    def test_deep_page_costs_the_same_as_page_two(self):
+        self.page_sql(1)
+        shallow = self.page_sql(2)
+        self.page_sql(self.DEEP - 1)  # a jump: one index-only OFFSET, leaves a bookmark
+        deep = self.page_sql(self.DEEP)
+
+        self.assertEqual(len(deep), len(shallow))
+        for sql in deep:
+            self.assertNotIn("OFFSET", sql.upper())
+            self.assertNotIn("COUNT(", sql.upper())
+        self.assertContains(self.client.get(self.url, {"p": self.DEEP}), f"Guest {2 * self.PER_PAGE - 1}")
+
+
+# -------------------------------
+# RATE LIMITS
+# -------------------------------
+class RateLimitTests(HiraTestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = get_store()
+        self.now = 1_000_000.0
+
+    def take(self, *checks):
+        return self.store.take([(key, Rate.parse(rate)) for key, rate in checks], now=self.now)
+
+    def tokens(self, key, rate):
+        return self.store.peek(key, Rate.parse(rate), now=self.now).remaining
+
+    def test_store_follows_the_setting(self):
+        self.assertEqual(self.store.path, settings.RATELIMIT_DB)
+
+    def test_buckets_charged_together_are_all_or_nothing(self):
+        self.assertTrue(self.take(("ip", "5/m"), ("phone", "2/m")).allowed)
+        self.assertEqual((self.tokens("ip", "5/m"), self.tokens("phone", "2/m")), (4, 1))
+        self.take(("phone", "2/m"))
+
+        result = self.take(("ip", "5/m"), ("phone", "2/m"))
+        self.assertFalse(result.allowed)
+        self.assertEqual(result.key, "phone")
+        self.assertGreater(result.retry_after, 0)
+        # The ip token taken before "phone" refused went back
+        self.assertEqual(self.tokens("ip", "5/m"), 4)
+
+    def test_refused_charge_rolls_back(self):
+        self.take(("otp", "1/h"))
+        for _ in range(3):
+            self.assertFalse(self.take(("other", "3/h"), ("otp", "1/h")).allowed)
+        self.assertEqual(self.tokens("other", "3/h"), 3)
+        # Refusals did not push the empty bucket further back: an hour refills it
+        self.now += 3600
+        self.assertTrue(self.take(("otp", "1/h")).allowed)
+
+    def test_concurrent_callers_never_exceed_the_bucket(self):
+        allowed, lock = [], threading.Lock()
+
+        def worker():
+            for _ in range(10):
+                result = hit(("rush", "25/h"))
+                with lock:
+                    allowed.append(result.allowed)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(allowed.count(True), 25)
+        self.assertEqual(peek("rush", "25/h").remaining, 0)
+
+    def test_login_over_the_limit_is_429_with_retry_after(self):
+        ip = "203.0.113.7"
+        for _ in range(Rate.parse(settings.LOGIN_RATE_LIMIT).limit):
+            hit((f"login:{ip}", settings.LOGIN_RATE_LIMIT))
+        response = self.client.post(reverse("login"), {"action": "send_otp", "phone": "1"}, REMOTE_ADDR=ip)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        # Other clients are not affected
+        response = self.client.post(reverse("login"), {"action": "send_otp", "phone": "1"}, REMOTE_ADDR="203.0.113.8")
+        self.assertNotEqual(response.status_code, 429)
+
+
+# -------------------------------
+# LOGGED-IN CONTACT
+# -------------------------------
+class ContactSessionTests(HiraTestCase):
+    def setUp(self):
+        super().setUp()
+        self.contact = Contact.objects.create(full_name="Guest", whatsapp_no="9000000001")
+        session = self.client.session
+        session["contact_id"] = self.contact.id
+        session.save()
+
+    def test_feedback_is_saved_for_the_logged_in_contact(self):
+        event = make_event()
+        response = self.client.post(reverse("pre_feedback"), {"event": event.id, "expectations": "Music"})
+        self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
+        self.assertEqual(PreEventFeedback.objects.get().contact, self.contact)
+
+    def test_admin_change_reaches_the_shared_cache(self):
+        self.assertFalse(get_cached_contact(self.contact.id).vip)
+        self.contact.vip = True
+        self.contact.save()
+        self.assertIsNone(cache.get(CONTACT_CACHE_KEY.format(self.contact.id)))
+        self.assertTrue(get_cached_contact(self.contact.id).vip)
+
+    def test_registering_twice_keeps_one_booking(self):
+        event = make_event()
+        url = reverse("register_event", args=[event.id])
+        self.client.post(url)
+        response = self.client.post(url, follow=True)
+        self.assertContains(response, f"You are already registered for {event.title}")
+        self.assertEqual(Booking.objects.filter(contact=self.contact).count(), 1)
+
+    def test_contact_without_a_number_is_not_redirected_in_a_loop(self):
+        self.contact.whatsapp_no = None
+        self.contact.save()
+        self.assertEqual(self.client.get(reverse("home")).status_code, 200)
+        response = self.client.get(reverse("details", args=["9000000001"]))
+        self.assertRedirects(response, reverse("home"))
+
+
+# -------------------------------
+# BROADCASTS
+# -------------------------------
+class FlakyGateway(StubGateway):
+    """StubGateway that fails for the numbers in `failing`."""
+    failing = set()
+
+    def send_otp(self, phone, otp):
+        if phone in self.failing:
+            return {"Status": "Error", "Details": "unreachable"}
+        return super().send_otp(phone, otp)
+
+    def send_message(self, phone, text):
+        if phone in self.failing:
+            self.log.append((phone, None))
+            return {"Status": "Error", "Details": "unreachable"}
+        return super().send_message(phone, text)
+
+
+@override_settings(
+    OTP_SMS_GATEWAY="hira.tests.FlakyGateway", OTP_DISPATCH_RETRIES=0,
+    BROADCAST_RATES={"sms": "1000/s", "email": "1000/s"},
+)
+class BroadcastTests(HiraTestCase):
+    def setUp(self):
+        super().setUp()
+        get_gateway.cache_clear()
+        self.addCleanup(get_gateway.cache_clear)
+        FlakyGateway.failing = set()
+        self.contacts = [
+            Contact.objects.create(full_name=f"Guest {i}", whatsapp_no=f"900000000{i}", email=f"guest{i}@example.com")
+            for i in range(5)
+        ]
+
+    def broadcast(self, channel=Broadcast.SMS, message="Hello {name}"):
+        return Broadcast.objects.create(name=f"invite-{channel}", channel=channel, message=message)
+
+    def sent(self):
+        return [phone for phone, text in get_gateway().log if text is not None]
+
+    def test_resumed_run_sends_nothing_new(self):
+        invite = self.broadcast()
+
+        def crash_after_first_chunk(last_id, sent, failed):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            broadcasts.run(invite, chunk_size=2, progress=crash_after_first_chunk)
+        self.assertEqual(len(self.sent()), 2)
+
+        broadcasts.run(Broadcast.objects.get(pk=invite.pk), chunk_size=2)
+        self.assertEqual(sorted(self.sent()), sorted(c.whatsapp_no for c in self.contacts))
+        broadcasts.run(Broadcast.objects.get(pk=invite.pk), chunk_size=2)
+        self.assertEqual(len(self.sent()), 5)
+
+    def test_retry_failed_resends_only_the_failures(self):
+        FlakyGateway.failing = {"9000000001", "9000000003"}
+        call_command("send_broadcast", "invite", "--channel", "sms", "--message", "Hi {name}", stdout=StringIO())
+        self.assertEqual(BroadcastDelivery.objects.filter(status=BroadcastDelivery.FAILED).count(), 2)
+
+        FlakyGateway.failing = set()
+        get_gateway().log.clear()
+        call_command("send_broadcast", "invite", "--retry-failed", stdout=StringIO())
+        self.assertEqual(sorted(self.sent()), ["9000000001", "9000000003"])
+        self.assertEqual(BroadcastDelivery.objects.filter(status=BroadcastDelivery.SENT).count(), 5)
+
+    def test_checkpoint_moves_only_after_a_chunk_commits(self):
+        invite = self.broadcast()
+        save_chunk = broadcasts._save_chunk
+        calls = []
+
+        def fail_second_chunk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError("disk full")
+            return save_chunk(*args, **kwargs)
+
+        with mock.patch.object(broadcasts, "_save_chunk", fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                broadcasts.run(invite, chunk_size=2)
+        invite.refresh_from_db()
+        self.assertEqual(invite.last_contact_id, self.contacts[1].id)
+        self.assertEqual(BroadcastDelivery.objects.filter(status=BroadcastDelivery.SENT).count(), 2)
+
+    def test_email_goes_through_the_mail_backend(self):
+        broadcasts.run(self.broadcast(Broadcast.EMAIL, "Dear {name}"))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(sorted(m.body for m in mail.outbox), [f"Dear Guest {i}" for i in range(5)])
+
+    def test_bad_template_is_refused_before_sending(self):
+        with self.assertRaises(CommandError):
+            call_command("send_broadcast", "invite", "--channel", "sms", "--message", "Hi {name", stdout=StringIO())
+        with self.assertRaises(ValueError):
+            broadcasts.run(self.broadcast(message="Price: {₹50}}"))
+        self.assertEqual(self.sent(), [])
+        self.assertFalse(Broadcast.objects.filter(name="invite").exists())
+
+    @override_settings(OTP_DISPATCH_RETRIES=2, OTP_DISPATCH_BACKOFF=0)
+    def test_every_attempt_takes_a_token(self):
+        FlakyGateway.failing = {"9000000000"}
+        with mock.patch.object(broadcasts, "_throttle") as throttle:
+            broadcasts.run(self.broadcast())
+        self.assertEqual(throttle.call_count, 4 + 3)
+
+
+# -------------------------------
+# OTP DELIVERY
+# -------------------------------
+@override_settings(OTP_SMS_GATEWAY="hira.tests.FlakyGateway", OTP_DISPATCH_RETRIES=0)
+class OtpDeliveryTests(HiraTestCase):
+    def setUp(self):
+        super().setUp()
+        get_gateway.cache_clear()
+        self.addCleanup(get_gateway.cache_clear)
+        FlakyGateway.failing = set()
+        self.otp = PhoneOTP.objects.create(hashed_otp="x", expires_at=timezone.now() + datetime.timedelta(minutes=5))
+
+    def status(self):
+        self.otp.refresh_from_db()
+        return self.otp.delivery_status, self.otp.used
+
+    def test_sent(self):
+        self.assertTrue(deliver_otp(self.otp.id, "9000000001", "123456"))
+        self.assertEqual(self.status(), (PhoneOTP.SENT, False))
+        self.assertEqual(get_gateway().sent["9000000001"], "123456")
+
+    def test_failed_otp_is_spent(self):
+        FlakyGateway.failing = {"9000000001"}
+        self.assertFalse(deliver_otp(self.otp.id, "9000000001", "123456"))
+        self.assertEqual(self.status(), (PhoneOTP.FAILED, True))
+        self.assertEqual(self.otp.delivery_detail, "unreachable")
+
+    def test_worker_error_is_logged_and_recorded(self):
+        # close_old_connections would close the test transaction's connection
+        with mock.patch("hira.sms.close_old_connections"), \
+                mock.patch.object(FlakyGateway, "send_otp", side_effect=RuntimeError("boom")), \
+                self.assertLogs("hira.sms", "ERROR"):
+            self.assertFalse(_deliver_in_worker(self.otp.id, "9000000001", "123456"))
+        self.assertEqual(self.status(), (PhoneOTP.FAILED, True))
+
+
+# -------------------------------
+# EVENT SUMMARIES
+# -------------------------------
+class EventSummaryTests(HiraTestCase):
+    def book(self, event, people, **fields):
+        fields.setdefault("contact", Contact.objects.create(full_name="Guest", whatsapp_no="9000000001"))
+        return create_booking(event, people, name="Guest", phone="1", total_amount=50 * people, **fields)
+
+    def test_deltas_match_a_fresh_group_by(self):
+        event, other = make_event(capacity=5), make_event()
+        first = self.book(event, 3)
+        second = self.book(event, 2, is_vip=True, is_paid=True)
+        waiting = self.book(event, 2)
+        self.assertEqual(waiting.status, Booking.WAITLISTED)
+
+        cancel_booking(first)  # frees 3 seats: the waitlisted party is promoted
+        waiting.refresh_from_db()
+        self.assertEqual(waiting.status, Booking.CONFIRMED)
+
+        moved = self.book(event, 1)
+        moved.event = other
+        moved.save()
+        self.book(other, 4).delete()
+        update_bookings(Booking.objects.filter(event=event, is_paid=False), is_paid=True)
+
+        self.assertEqual(reconcile(fix=False), {})
+        summary = EventSummary.objects.get(event=event)
+        self.assertEqual(
+            (summary.bookings, summary.people, summary.paid_people, summary.vip_people, summary.cancelled_bookings),
+            (2, 4, 4, 2, 1),
+        )
+        self.assertEqual(EventSummary.objects.get(event=other).people, 1)
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        event = make_event()
+        self.book(event, 2)
+        Booking.objects.bulk_create([Booking(event=event, name="Raw", phone="1", num_people=5, total_amount=250)])
+        self.assertEqual(reconcile(), {event.id: {"bookings": (1, 2), "people": (2, 7), "amount": (100, 350)}})
+        self.assertEqual(reconcile(fix=False), {})
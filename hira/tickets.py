@@ -0,0 +1,156 @@
+"""
+Signed entry tickets for confirmed bookings.
+
+A ticket is "<booking>.<event>.<people>.<expires>.<signature>" (numbers in
+base 36, signature a truncated HMAC-SHA256 keyed from SECRET_KEY), small
+enough for a low-density QR code. The gate verifies the signature in
+memory and claims the check-in with one conditional UPDATE (confirmed and
+not yet checked in), so two workers scanning the same ticket cannot both
+admit it, and cancellations made anywhere are honoured. Each process keeps
+a bitmap of the bookings it has seen checked in, so a re-scan at the same
+worker is refused without a query.
+"""
+import base64
+import hmac
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .db import atomic_retry
+from .models import Booking
+
+_SALT = "hira.tickets"
+_SIG_BYTES = 12
+
+
+class TicketError(Exception):
+    pass
+
+
+class AlreadyCheckedIn(TicketError):
+    pass
+
+
+@dataclass(frozen=True)
+class Ticket:
+    booking_id: int
+    event_id: int
+    num_people: int
+    expires: int  # unix seconds
+
+
+# -------------------------------
+# ISSUE & VERIFY
+# -------------------------------
+def _sign(payload):
+    digest = salted_hmac(_SALT, payload, algorithm="sha256").digest()[:_SIG_BYTES]
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def _ticket_expiry(event):
+    # Valid until the end of the day after the event
+    day_after = datetime.combine(event.date + timedelta(days=2), datetime.min.time())
+    return int(timezone.make_aware(day_after).timestamp())
+
+
+def issue_ticket(booking):
+    """Signed ticket string for a confirmed, paid booking."""
+    if booking.status != Booking.CONFIRMED or not booking.is_paid:
+        raise TicketError("Tickets are only issued for confirmed, paid bookings.")
+    fields = (booking.id, booking.event_id, booking.num_people, _ticket_expiry(booking.event))
+    payload = ".".join(_b36(n) for n in fields)
+    return f"{payload}.{_sign(payload)}"
+
+
+def verify_ticket(token, now=None):
+    """Check signature and expiry without touching the database. Raises TicketError."""
+    payload, _, signature = token.strip().rpartition(".")
+    if not payload or not hmac.compare_digest(signature, _sign(payload)):
+        raise TicketError("Invalid ticket")
+    try:
+        booking_id, event_id, num_people, expires = (int(part, 36) for part in payload.split("."))
+    except ValueError:
+        raise TicketError("Invalid ticket")
+    if (now or time.time()) > expires:
+        raise TicketError("Ticket expired")
+    return Ticket(booking_id, event_id, num_people, expires)
+
+
+def _b36(n):
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+        if not n:
+            return out
+
+
+# -------------------------------
+# GATE STATE
+# -------------------------------
+class IdBitmap:
+    """Set of booking ids as one bit per id (125 KB covers a million ids)."""
+
+    def __init__(self):
+        self._bits = bytearray()
+
+    def add(self, n):
+        """Set bit n; return False if it was already set."""
+        byte, bit = divmod(n, 8)
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte - len(self._bits) + 1 + len(self._bits) // 2))
+        if self._bits[byte] & (1 << bit):
+            return False
+        self._bits[byte] |= 1 << bit
+        return True
+
+    def __contains__(self, n):
+        byte, bit = divmod(n, 8)
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << bit))
+
+
+@atomic_retry
+def _claim(ticket):
+    """Check the booking in if it is confirmed and not checked in yet. Returns True if this call did."""
+    now = timezone.now()
+    return Booking.objects.filter(
+        pk=ticket.booking_id, event_id=ticket.event_id, status=Booking.CONFIRMED, checked_in_at__isnull=True,
+    ).update(checked_in_at=now, updated_at=now) == 1
+
+
+class Gate:
+    """
+    Per-process scan state. The database decides every first scan at this
+    worker (_claim); the bitmap only remembers bookings known to be checked
+    in, so their re-scans are refused from memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_in = IdBitmap()
+
+    def admit(self, ticket):
+        """Admit a verified ticket once. Raises TicketError on re-entry or revoked bookings."""
+        with self._lock:
+            if ticket.booking_id in self._checked_in:
+                raise AlreadyCheckedIn("Already checked in")
+        if not _claim(ticket):
+            # Lost the claim: find out why (one more query, only for refusals)
+            status = Booking.objects.filter(pk=ticket.booking_id, event_id=ticket.event_id).values_list(
+                "status", flat=True
+            ).first()
+            if status != Booking.CONFIRMED:
+                raise TicketError("Booking cancelled")
+            with self._lock:
+                self._checked_in.add(ticket.booking_id)
+            raise AlreadyCheckedIn("Already checked in")
+        with self._lock:
+            self._checked_in.add(ticket.booking_id)
+
+
+gate = Gate()
@@ -1,12 +1,23 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("", views.home_view, name="home"),
     path("login/", views.login_view, name="login"),  # Home / login page
+    path("otp-status/", views.otp_status_view, name="otp_status"),
     path("details/<str:phone>/", views.user_details_view, name="details"),
     path("success/", views.success_page, name="success_page"),
     path("upi/<str:token>/", views.upi_redirect_view, name="upi_redirect"),
+    path("upi/<str:token>/qr.<str:fmt>", views.upi_qr_view, name="upi_qr"),
+    path("pay/<str:token>/", views.payment_view, name="payment"),
+    path("ticket/<int:booking_id>/", views.ticket_view, name="ticket"),
+    path("gate/scan/", views.gate_scan_view, name="gate_scan"),
+    path("metrics/views/", views.view_metrics_view, name="view_metrics"),
+
+    # Check-in API for volunteer tablets (hira/api.py)
+    path("api/events/<int:event_id>/bookings/", api.booking_list_api, name="api_bookings"),
+    path("api/events/<int:event_id>/bookings/changes/", api.booking_changes_api, name="api_booking_changes"),
+    path("api/events/<int:event_id>/manifest/", api.gate_manifest_api, name="api_gate_manifest"),
 
     # Feedback pages
     path('pre-feedback/', views.pre_event_feedback, name='pre_feedback'),
@@ -3,10 +3,11 @@ import hashlib
 from django.utils import timezone
 from datetime import timedelta
 from django.conf import settings
-from django.core.cache import cache
-import requests
 
+from .db import atomic_retry
 from .models import PhoneOTP, Contact
+from .sms import enqueue_otp, get_gateway
+from . import ratelimit
 
 # -------------------------------
 # OTP GENERATION & HASHING
@@ -23,19 +24,8 @@ def hash_otp(plain):
 # SEND OTP VIA SMS
 # -------------------------------
 def send_otp_via_sms(phone, otp):
-    api_key = getattr(settings, "TWO_FACTOR_API_KEY", None)
-    if not api_key:
-        return {"Status": "Error", "Details": "API key not configured."}
-
-    template_name = "HiraPuraLogin"  # your approved SMS template
-    url = f"https://2factor.in/API/V1/{api_key}/SMS/{phone}/{otp}/{template_name}?force=SMS"
-    try:
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        print("2Factor Response:", data)  # optional debug log
-        return data
-    except Exception as e:
-        return {"Status": "Error", "Details": str(e)}
+    """Send an OTP synchronously through the configured gateway (see hira.sms)."""
+    return get_gateway().send_otp(phone, otp)
 
 # -------------------------------
 # RATE LIMIT CHECK
@@ -43,62 +33,58 @@ def send_otp_via_sms(phone, otp):
 def can_send_otp(phone):
     """
     Returns (True, "") if OTP can be sent, else (False, "reason").
-    Enforces cooldown and hourly limits.
+    Enforces cooldown and hourly limits across all worker processes.
+    A True answer already counts as a send: the check and the record are
+    one atomic step, so parallel requests cannot both slip under the limit.
     """
-    cooldown_key = f"otp_cd_{phone}"
-    hourly_key = f"otp_hour_{phone}"
+    cooldown = getattr(settings, "OTP_RESEND_COOLDOWN", 60)
+    per_hour = getattr(settings, "OTP_RESEND_MAX_PER_HOUR", 5)
 
-    if cache.get(cooldown_key):
+    result = ratelimit.hit(
+        (f"otp_cd:{phone}", ratelimit.Rate(1, cooldown)),
+        (f"otp_hour:{phone}", ratelimit.Rate(per_hour, 3600)),
+    )
+    if result.allowed:
+        return True, ""
+    if result.key.startswith("otp_cd:"):
         return False, "Cooldown active. Try again later."
-
-    hour_count = cache.get(hourly_key) or 0
-    if hour_count >= getattr(settings, "OTP_RESEND_MAX_PER_HOUR", 5):
-        return False, "Resend limit reached for this hour."
-
-    return True, ""
-
-def record_send_otp(phone):
-    """Record that an OTP was sent: update cooldown and hourly counters."""
-    cooldown_key = f"otp_cd_{phone}"
-    hourly_key = f"otp_hour_{phone}"
-
-    cache.set(cooldown_key, 1, timeout=getattr(settings, "OTP_RESEND_COOLDOWN", 60))
-    hour_count = cache.get(hourly_key) or 0
-    cache.set(hourly_key, hour_count + 1, timeout=3600)
+    return False, "Resend limit reached for this hour."
 
 # -------------------------------
 # CREATE & DISPATCH OTP
 # -------------------------------
-def create_and_dispatch_otp(contact: Contact):
-    """
-    Create OTP record for Contact and send via SMS.
-    Marks all previous unused OTPs as used.
-    """
-    # Mark old OTPs as used
+@atomic_retry
+def create_otp(contact):
+    """Retire the contact's unused OTPs and store a new one. Returns (PhoneOTP, plain code)."""
     PhoneOTP.objects.filter(contact=contact, used=False).update(used=True)
 
-    # Generate new OTP
     otp_plain = generate_otp_code(4)  # 4-digit OTP to match template
-    hashed = hash_otp(otp_plain)
     expires_at = timezone.now() + timedelta(seconds=getattr(settings, "OTP_EXPIRY_SECONDS", 300))
-
     otp_obj = PhoneOTP.objects.create(
         contact=contact,
-        hashed_otp=hashed,
+        hashed_otp=hash_otp(otp_plain),
         expires_at=expires_at
     )
+    return otp_obj, otp_plain
 
+
+def create_and_dispatch_otp(contact: Contact):
+    """
+    Create OTP record for Contact and queue it for SMS delivery.
+    Marks all previous unused OTPs as used.
+    Delivery happens in the background; its outcome lands on
+    PhoneOTP.delivery_status (see otp_status_view).
+    """
     # Use phone number field for SMS
     phone_number = contact.whatsapp_no or contact.alternate_no
     if not phone_number:
-        otp_obj.delete()
         return False, "Phone number not available for SMS"
 
-    # Send OTP
-    resp = send_otp_via_sms(phone_number, otp_plain)
-    if resp.get("Status") == "Success":
-        record_send_otp(phone_number)
-        return True, "OTP sent successfully!"
-    else:
-        otp_obj.delete()
-        return False, resp.get("Details") or "Failed to send OTP"
+    # Store it first (committed), then hand it to the sender
+    otp_obj, otp_plain = create_otp(contact)
+
+    # Send OTP (inline only when OTP_DISPATCH_ASYNC is off)
+    sent = enqueue_otp(otp_obj.id, phone_number, otp_plain)
+    if sent is False:
+        return False, "Failed to send OTP"
+    return True, "OTP queued for delivery"
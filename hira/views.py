@@ -5,20 +5,37 @@ from functools import wraps
 
 from django.views import View
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+from django.utils.cache import get_conditional_response
 from django.contrib import messages
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.views.decorators.http import require_POST
 from django.urls import reverse
+from django.db.models import Q
 
 import qrcode
 
 from .models import Contact, Booking, Event, PhoneOTP
 from .forms import PhoneLoginForm, PreEventFeedbackForm, PostEventFeedbackForm
-from .utils import can_send_otp, record_send_otp, create_and_dispatch_otp
+from .utils import can_send_otp, create_and_dispatch_otp
+from .ratelimit import ratelimit
+from .events import get_active_event
+from .db import atomic_retry, retry_stats
+from .bookings import AlreadyBooked, IdempotencyConflict, create_booking, waitlist_position
+from .payments import CONTENT_TYPES, build_upi_url, cached_qr, payment_reference, qr_etag
+from . import metrics
+from .tickets import AlreadyCheckedIn, TicketError, gate, issue_ticket, verify_ticket
 
 
 
+class UPIRedirect(HttpResponseRedirect):
+    # redirect() refuses non-web schemes unless the response allows them
+    allowed_schemes = ["upi"]
+
+
 # -----------------------------------------
 # LOGIN  Requierd Decorator
 # -----------------------------------------
@@ -27,16 +44,28 @@ from .utils import can_send_otp, record_send_otp, create_and_dispatch_otp
 def contact_login_required(view_func):
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
-        if not request.session.get('contact_id'):
+        # request.contact is set lazily by hira.middleware.ContactMiddleware
+        if not request.contact:
             messages.warning(request, "⚠️ Please login first to access this page.")
             # Redirect to login with next parameter
             return redirect(f"/login/?next={request.path}")
         return view_func(request, *args, **kwargs)
     return wrapper
 
+
+def own_bookings(request):
+    """The logged-in contact's bookings; rows from before Booking.contact match on phone."""
+    contact = request.contact
+    mine = Q(contact=contact)
+    if contact.whatsapp_no:
+        mine |= Q(contact__isnull=True, phone=contact.whatsapp_no)
+    return Booking.objects.filter(mine)
+
+
 # -----------------------------------------
 # LOGIN VIA PHONE + OTP
 # -----------------------------------------
+@ratelimit("login", settings.LOGIN_RATE_LIMIT)
 def login_view(request):
     form = PhoneLoginForm()
     show_otp = False
@@ -64,9 +93,8 @@ def login_view(request):
 
             success, info = create_and_dispatch_otp(contact)
             if success:
-                record_send_otp(phone)
                 request.session['otp_contact_id'] = contact.id
-                messages.success(request, f"OTP sent to {phone}. Please enter OTP below.")
+                messages.success(request, f"OTP is being sent to {phone}. Please enter OTP below.")
                 show_otp = True
                 form = PhoneLoginForm(initial={"phone": phone})
             else:
@@ -102,7 +130,7 @@ def login_view(request):
                 return redirect('home')
             else:
                 otp_obj.attempts += 1
-                otp_obj.save(update_fields=["attempts"])
+                atomic_retry(otp_obj.save)(update_fields=["attempts"])
                 remaining = getattr(settings, "OTP_MAX_ATTEMPTS", 3) - otp_obj.attempts
                 messages.error(request, f"Invalid OTP. Remaining attempts: {remaining}")
                 show_otp = True
@@ -118,6 +146,25 @@ def login_view(request):
 
 
 
+def otp_status_view(request):
+    """
+    Delivery status of the latest OTP for the contact logging in.
+    Polled by the login page while the SMS is sent in the background.
+    """
+    contact_id = request.session.get("otp_contact_id")
+    otp = None
+    if contact_id:
+        otp = (
+            PhoneOTP.objects.filter(contact_id=contact_id)
+            .order_by("-created_at")
+            .values("delivery_status", "delivery_detail")
+            .first()
+        )
+    if not otp:
+        return JsonResponse({"status": "unknown", "detail": ""}, status=404)
+    return JsonResponse({"status": otp["delivery_status"], "detail": otp["delivery_detail"]})
+
+
 @contact_login_required
 def logout_view(request):
     request.session.flush()  # Clear all session data
@@ -135,8 +182,14 @@ def user_details_view(request, phone):
     Booking view for logged-in users.
     Handles VIP direct booking and Non-VIP bookings without QR code.
     """
-    contact = get_object_or_404(Contact, whatsapp_no=phone)
-    event = Event.objects.last()  # Get latest event
+    contact = request.contact
+    if not contact.whatsapp_no:
+        # Number removed since login: there is no details URL to send them to
+        messages.error(request, "Your WhatsApp number is missing. Please contact the organisers.")
+        return redirect("home")
+    if contact.whatsapp_no != phone:
+        return redirect("details", phone=contact.whatsapp_no)
+    event = get_active_event()
 
     if request.method == "POST":
 
@@ -153,21 +206,42 @@ def user_details_view(request, phone):
 
         total_amount = num_people * 50  # Calculate total amount
 
-        # Create Booking
-        booking = Booking.objects.create(
-            name=contact.full_name,
-            phone=contact.whatsapp_no,
-            num_people=num_people,
-            total_amount=total_amount,
-            is_vip=contact.vip,
-            is_paid=True if contact.vip else False,
-            event=event,
-        )
+        # Resubmitting the same form (double tap, retry) replays its booking
+        idempotency_key = request.POST.get("idempotency_key", "").strip()[:64] or None
 
-        # Generate secure token for Non-VIP users (if needed for future)
-        if not contact.vip:
-            booking.upi_token = secrets.token_urlsafe(8)
-            booking.save()
+        # Create Booking (waitlisted if the event is full), one per contact and event.
+        # Non-VIP users get their payment token in the same INSERT.
+        try:
+            booking = create_booking(
+                event,
+                num_people,
+                idempotency_key=idempotency_key,
+                contact=contact,
+                name=contact.full_name,
+                phone=contact.whatsapp_no,
+                total_amount=total_amount,
+                is_vip=contact.vip,
+                is_paid=True if contact.vip else False,
+                upi_token=None if contact.vip else secrets.token_urlsafe(8),
+            )
+        except AlreadyBooked:
+            messages.info(request, f"You are already registered for {event.title}")
+            return redirect("home")
+        except IdempotencyConflict:
+            # The form token belongs to someone else's booking: reload a fresh form
+            messages.error(request, "This booking form has expired, please submit it again.")
+            return redirect("details", phone=phone)
+
+        if booking.status == Booking.WAITLISTED:
+            messages.warning(
+                request,
+                f"⏳ Event is full. {num_people} લોકો માટે તમારું નામ waitlist પર છે "
+                f"(position {waitlist_position(booking)}). A seat will be confirmed automatically if one frees up."
+            )
+            return redirect("details", phone=phone)
+
+        request.session['last_booking_id'] = booking.id
+        request.session['last_upi_token'] = booking.upi_token
 
         # VIP users → Direct success
         messages.success(
@@ -179,7 +253,11 @@ def user_details_view(request, phone):
         return redirect("success_page")
 
     # Render details page
-    return render(request, "home/details.html", {"contact": contact, "event": event})
+    return render(request, "home/details.html", {
+        "contact": contact,
+        "event": event,
+        "idempotency_key": secrets.token_urlsafe(24),
+    })
 # -----------------------------------------
 # SUCCESS PAGE
 # -----------------------------------------
@@ -187,8 +265,74 @@ def success_page(request):
     """
     Generic success page after VIP booking.
     """
-    event = Event.objects.last()
-    return render(request, "home/success.html", {"event": event})
+    event = get_active_event()
+    return render(request, "home/success.html", {
+        "event": event,
+        "last_booking_id": request.session.get("last_booking_id"),
+        "last_upi_token": request.session.get("last_upi_token"),
+    })
+
+
+# -----------------------------------------
+# ENTRY TICKET (signed QR)
+# -----------------------------------------
+@contact_login_required
+def ticket_view(request, booking_id):
+    """
+    Show the signed entry QR for one of the logged-in contact's bookings.
+    """
+    booking = get_object_or_404(Booking.objects.select_related("event"), id=booking_id, contact=request.contact)
+
+    try:
+        token = issue_ticket(booking)
+    except TicketError as e:
+        messages.warning(request, str(e))
+        return redirect("home")
+
+    buffer = BytesIO()
+    qrcode.make(token, box_size=8, border=2).save(buffer, format="PNG")
+    qr_base64 = base64.b64encode(buffer.getvalue()).decode()
+    return render(request, "home/ticket.html", {"booking": booking, "qr_base64": qr_base64})
+
+
+# -----------------------------------------
+# GATE SCANNER
+# -----------------------------------------
+@staff_member_required
+@require_POST
+def gate_scan_view(request):
+    """
+    Verify a scanned ticket and admit it once.
+    POST token=<ticket>[&event=<id>]; the check-in is claimed in the DB, once across all workers.
+    """
+    try:
+        ticket = verify_ticket(request.POST.get("token", ""))
+        expected_event = request.POST.get("event")
+        if expected_event and str(ticket.event_id) != expected_event:
+            raise TicketError("Ticket is for another event")
+        gate.admit(ticket)
+    except TicketError as e:
+        status = 409 if isinstance(e, AlreadyCheckedIn) else 400
+        return JsonResponse({"ok": False, "reason": str(e)}, status=status)
+
+    return JsonResponse({"ok": True, "booking": ticket.booking_id, "event": ticket.event_id, "people": ticket.num_people})
+
+
+# -----------------------------------------
+# VIEW METRICS (staff only)
+# -----------------------------------------
+@staff_member_required
+def view_metrics_view(request):
+    """
+    Per-view query/latency histograms of this worker process as JSON.
+    POST clears them. Empty unless VIEW_METRICS_ENABLE is on.
+    """
+    if request.method == "POST":
+        metrics.registry.reset()
+    data = metrics.registry.snapshot()
+    data["db_lock_retries"] = retry_stats()
+    data["enabled"] = getattr(settings, "VIEW_METRICS_ENABLE", False)
+    return JsonResponse(data, json_dumps_params={"indent": 1})
 
 
 # -----------------------------------------
@@ -199,20 +343,47 @@ def upi_redirect_view(request, token):
     """
     Redirect user securely to UPI URL using server-side token.
     """
-    booking = get_object_or_404(Booking, upi_token=token)
+    booking = get_object_or_404(own_bookings(request), upi_token=token)
     upi_id = getattr(settings, "UPI_ID", None)
     if not upi_id:
         messages.error(request, "Payment system not configured.")
         return redirect("details", phone=booking.phone)
 
-    upi_url = (
-        f"upi://pay?pa={upi_id}&pn=Hirapura%20Event"
-        f"&mc=0000&tid={booking.id}&tr={booking.id}"
-        f"&tn=Booking%20for%20{booking.num_people}%20people"
-        f"&am={booking.total_amount}&cu=INR"
-    )
+    return UPIRedirect(build_upi_url(booking, upi_id))
+
+
+# -----------------------------------------
+# PAYMENT PAGE & UPI QR IMAGE
+# -----------------------------------------
+@contact_login_required
+def payment_view(request, token):
+    """Payment page with the booking's UPI QR (image served by upi_qr_view)."""
+    booking = get_object_or_404(own_bookings(request), upi_token=token)
+    return render(request, "home/payment_qr.html", {"booking": booking, "reference": payment_reference(booking.id)})
+
+
+@contact_login_required
+def upi_qr_view(request, token, fmt):
+    """
+    UPI QR image for a booking. Rendered once per payload and cached by
+    content hash; the hash is also the strong ETag, so revalidation is a 304.
+    """
+    if fmt not in CONTENT_TYPES:
+        raise Http404("Unknown image format.")
+    booking = get_object_or_404(own_bookings(request).only("id", "num_people", "total_amount"), upi_token=token)
+    upi_id = getattr(settings, "UPI_ID", None)
+    if not upi_id:
+        raise Http404("Payment system not configured.")
 
-    return redirect(upi_url)
+    payload = build_upi_url(booking, upi_id)
+    etag = f'"{qr_etag(payload, fmt)}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        _, data = cached_qr(payload, fmt)
+        response = HttpResponse(data, content_type=CONTENT_TYPES[fmt])
+    response["ETag"] = etag
+    response["Cache-Control"] = f"private, max-age={getattr(settings, 'UPI_QR_MAX_AGE', 3600)}"
+    return response
 
 
 # -----------------------------------------
@@ -220,11 +391,9 @@ def upi_redirect_view(request, token):
 # -----------------------------------------
 
 def home_view(request):
-    event = Event.objects.first()
-    if request.session.get('otp_contact_id'):
-        contact_id = request.session['otp_contact_id']
-        contact = Contact.objects.get(id=contact_id)
-        details_url = reverse('details', kwargs={'phone': contact.whatsapp_no})
+    event = get_active_event()
+    if request.contact and request.contact.whatsapp_no:
+        details_url = reverse('details', kwargs={'phone': request.contact.whatsapp_no})
     else:
         details_url = None
     return render(request, "home/home.html", {"event": event, "details_url": details_url})\
@@ -254,10 +423,11 @@ def pre_event_feedback(request):
         form = PreEventFeedbackForm(request.POST)
         if form.is_valid():
             feedback = form.save(commit=False)
-            feedback.contact = request.user.contact if hasattr(request.user, "contact") else None
+            feedback.contact = request.contact
             feedback.submitted_at = timezone.now()
-            feedback.save()
-            return redirect("pre_feedback_success")
+            atomic_retry(feedback.save)()
+            messages.success(request, "🙏 Thank you for your feedback!")
+            return redirect("home")
     else:
         form = PreEventFeedbackForm()
 
@@ -279,10 +449,11 @@ def post_event_feedback(request):
         form = PostEventFeedbackForm(request.POST)
         if form.is_valid():
             feedback = form.save(commit=False)
-            feedback.contact = request.user.contact if hasattr(request.user, "contact") else None
+            feedback.contact = request.contact
             feedback.submitted_at = timezone.now()
-            feedback.save()
-            return redirect("post_feedback_success")
+            atomic_retry(feedback.save)()
+            messages.success(request, "🙏 Thank you for your feedback!")
+            return redirect("home")
     else:
         form = PostEventFeedbackForm()
 
@@ -297,23 +468,27 @@ def post_event_feedback(request):
 # -----------------------------------------
 @contact_login_required
 def register_event(request, event_id):
-    contact_id = request.session.get('contact_id')
-    contact = get_object_or_404(Contact, id=contact_id)
-    event = get_object_or_404(Event, id=event_id)
-
-    # Check if already registered
-    if Booking.objects.filter(phone=contact.whatsapp_no, event=event).exists():
+    contact = request.contact
+    event = get_active_event()
+    if event is None or event.id != event_id:
+        event = get_object_or_404(Event, id=event_id)
+
+    try:
+        booking = create_booking(
+            event,
+            1,  # default, or from form
+            contact=contact,
+            name=contact.full_name,
+            phone=contact.whatsapp_no,
+            total_amount=50,
+            is_vip=contact.vip,
+            is_paid=contact.vip,  # VIP auto paid
+        )
+    except AlreadyBooked:
         messages.info(request, f"You are already registered for {event.title}")
         return redirect("home")
-
-    Booking.objects.create(
-        name=contact.full_name,
-        phone=contact.whatsapp_no,
-        num_people=1,  # default, or from form
-        total_amount=50,
-        is_vip=contact.vip,
-        is_paid=contact.vip,  # VIP auto paid
-        event=event
-    )
-    messages.success(request, f"Registered successfully for {event.title}")
+    if booking.status == Booking.WAITLISTED:
+        messages.warning(request, f"{event.title} is full. You are #{waitlist_position(booking)} on the waitlist.")
+    else:
+        messages.success(request, f"Registered successfully for {event.title}")
     return redirect("home")
\ No newline at end of file
@@ -22,6 +22,7 @@ from pathlib import Path
 
 # Read from .env file
 TWO_FACTOR_API_KEY = config("TWO_FACTOR_API_KEY")
+TWO_FACTOR_SENDER_ID = config("TWO_FACTOR_SENDER_ID", default="")  # approved sender id for broadcast SMS
 # print("2Factor API Key:", TWO_FACTOR_API_KEY)
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -47,19 +48,21 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'hira',  # before staticfiles so its collectstatic (which builds images) wins
     'django.contrib.staticfiles',
-    'hira',
     'widget_tweaks',
    
 ]
 
 MIDDLEWARE = [
+    'hira.metrics.ViewMetricsMiddleware',  # first, so latency covers everything; no-op unless enabled
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'hira.middleware.ContactMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -68,7 +71,7 @@ MIDDLEWARE = [
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'hira.metrics.TimedDjangoTemplates',  # DjangoTemplates + render timing for view metrics
         'DIRS': [os.path.join(BASE_DIR, 'templates')],  # optional: can include BASE_DIR / "templates" if you want
         'APP_DIRS': True,  # important: looks inside app/templates/
         'OPTIONS': {
@@ -76,6 +79,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'hira.events.active_event',
             ],
         },
     },
@@ -93,9 +97,27 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock at BEGIN: a deferred transaction that later
+            # upgrades to writing fails at once instead of waiting for the lock
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 5,
+        },
     }
 }
 
+# Applied to every new SQLite connection (hira/db.py). WAL and synchronous=NORMAL
+# are added only in serving processes (hirapura/wsgi.py), so manage.py and tests
+# never rewrite the journal mode stored in db.sqlite3.
+SQLITE_PRAGMAS = {
+    "busy_timeout": 5000,           # ms
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -16000,           # KiB
+    "temp_store": "MEMORY",
+}
+DB_LOCK_RETRIES = 4                 # attempts per atomic_retry call
+DB_LOCK_BACKOFF = 0.05              # seconds, doubled per retry (with jitter)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -166,10 +188,95 @@ OTP_MAX_ATTEMPTS = 3
 OTP_RESEND_COOLDOWN = 60        # seconds between resends to same phone
 OTP_RESEND_MAX_PER_HOUR = 5     # max resends per phone per hour
 
-# Cache: use Redis in production. For dev you can use locmem
+# SMS delivery runs on a background thread pool (hira/sms.py)
+OTP_SMS_GATEWAY = config("OTP_SMS_GATEWAY", default="hira.sms.TwoFactorGateway")  # hira.sms.StubGateway for local/load tests
+OTP_DISPATCH_ASYNC = True       # False = send inline inside the request
+OTP_DISPATCH_WORKERS = 4        # sender threads (and pooled HTTP connections) per process
+OTP_DISPATCH_RETRIES = 2        # extra attempts after a failed send
+OTP_DISPATCH_BACKOFF = 0.5      # seconds, doubled per retry (with jitter)
+OTP_STUB_LATENCY = config("OTP_STUB_LATENCY", default=0, cast=float)  # simulated gateway delay for StubGateway
+
+# Broadcasts (manage.py send_broadcast, hira/broadcast.py): SMS uses OTP_SMS_GATEWAY above
+BROADCAST_WORKERS = 4           # concurrent senders per run
+BROADCAST_RATES = {             # provider limits, shared by all runs through RATELIMIT_DB
+    "sms": "10/s",
+    "email": "5/s",
+}
+EMAIL_BACKEND = config("EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend")  # ...filebased.EmailBackend for local tests
+EMAIL_FILE_PATH = BASE_DIR / "cache" / "emails"
+EMAIL_HOST = config("EMAIL_HOST", default="localhost")
+EMAIL_PORT = config("EMAIL_PORT", default=25, cast=int)
+EMAIL_HOST_USER = config("EMAIL_HOST_USER", default="")
+EMAIL_HOST_PASSWORD = config("EMAIL_HOST_PASSWORD", default="")
+EMAIL_USE_TLS = config("EMAIL_USE_TLS", default=False, cast=bool)
+DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL", default="webmaster@localhost")
+
+# Rate limits are token buckets in a SQLite file shared by all gunicorn workers (hira/ratelimit.py)
+RATELIMIT_DB = BASE_DIR / "ratelimit.sqlite3"
+RATELIMIT_ENABLE = True
+LOGIN_RATE_LIMIT = "60/m"       # login POSTs per client IP (members often share carrier NAT)
+
+# Active event (hira/events.py): cached per process and in the shared cache (CACHES),
+# cleared by Event save/delete signals. The saving worker drops both; the others
+# drop their process copy when it expires, so they lag by at most ACTIVE_EVENT_LOCAL_TTL.
+ACTIVE_EVENT_CACHE_TTL = 300    # seconds in the shared cache
+ACTIVE_EVENT_LOCAL_TTL = 30     # seconds in process memory (staleness bound in other workers)
+
+# Per-view metrics (hira/metrics.py), served to staff at /metrics/views/
+VIEW_METRICS_ENABLE = config("VIEW_METRICS_ENABLE", default=False, cast=bool)
+VIEW_QUERY_BUDGETS = {   # URL name -> max SQL queries (session load + one cache miss); over budget logs a warning
+    "home": 2,
+    "details": 3,
+    "success_page": 2,
+    "payment": 3,
+    "upi_qr": 3,
+}
+
+# Logged-in contact (hira/contacts.py): request.contact is cached by id in the shared
+# cache; Contact saves drop it for every worker
+CONTACT_CACHE_TTL = 60
+
+# Admin changelists (hira/changelist.py): cached counts and keyset page bookmarks
+ADMIN_COUNT_CACHE_TTL = 60
+ADMIN_BOOKMARK_CACHE_TTL = 600
+
+# Feedback analytics (hira/analytics.py): per-event counts, topped up with new responses on view
+FEEDBACK_STATS_CACHE_TTL = 86400
+
+# Contact facet counts for the admin area/zone filters (hira/facets.py)
+FACETS_CACHE_TTL = 3600         # also dropped on every contact/area/zone change
+
+# Check-in API (hira/api.py): changes are served once this old, so none is skipped mid-commit
+CHECKIN_SYNC_SETTLE_SECONDS = 2
+# Removed-booking records are pruned after this long; older cursors and manifest
+# versions get a full resync instead of a delta
+REMOVED_BOOKING_RETENTION_DAYS = 7
+
+# UPI QR images (hira/payments.py): rendered once, cached by content hash
+UPI_QR_CACHE_DIR = BASE_DIR / "cache" / "upi_qr"
+UPI_QR_CACHE_MEMORY_BYTES = 4 * 1024 * 1024   # per-process LRU
+UPI_QR_CACHE_DISK_BYTES = 64 * 1024 * 1024     # shared directory
+UPI_QR_MAX_AGE = 3600                           # browser Cache-Control max-age
+
+# UPI reconciliation (manage.py import_statement, hira/statements.py)
+UPI_REFERENCE_PREFIX = "HP"     # booking reference in the UPI note: HP<booking id>
+
+# Responsive images (manage.py build_images, run by collectstatic)
+RESPONSIVE_IMAGE_SOURCE_DIR = BASE_DIR / "hira" / "static"
+RESPONSIVE_IMAGE_ROOT = BASE_DIR / "static" / "responsive"   # inside STATICFILES_DIRS
+RESPONSIVE_IMAGE_STATIC_PREFIX = "responsive/"
+RESPONSIVE_IMAGE_WIDTHS = [480, 960, 1600]
+RESPONSIVE_IMAGE_WEBP_QUALITY = 80
+RESPONSIVE_IMAGE_JPEG_QUALITY = 82
+
+# Cache: shared by all gunicorn workers, so a signal clearing a key in one
+# worker clears it for every worker (LocMemCache would be per process).
+# A directory on local disk, like RATELIMIT_DB; set CACHE_LOCATION to move it.
+# (OTP limits do not depend on it; see RATELIMIT_DB above)
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "unique-snowflake",
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": config("CACHE_LOCATION", default=str(BASE_DIR / "cache" / "django")),
+        "OPTIONS": {"MAX_ENTRIES": 20000},
     }
 }
\ No newline at end of file
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hirapura.settings')
 
 application = get_wsgi_application()
+
+# Serving only: WAL lets readers run alongside the writer (hira/db.py)
+from hira.db import use_wal  # noqa: E402
+
+use_wal()